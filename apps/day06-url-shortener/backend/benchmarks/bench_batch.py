@@ -0,0 +1,54 @@
+"""Compare POST /api/shorten/batch against one POST /api/shorten per URL.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_batch --count 20000
+"""
+
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from src.main import app
+
+
+async def single_requests(client: httpx.AsyncClient, urls: list[str]) -> None:
+    for url in urls:
+        response = await client.post("/api/shorten", json={"url": url})
+        response.raise_for_status()
+
+
+async def batch_request(client: httpx.AsyncClient, urls: list[str]) -> None:
+    async def body():
+        for url in urls:
+            yield f'{{"url": "{url}"}}\n'.encode()
+
+    async with client.stream(
+        "POST",
+        "/api/shorten/batch",
+        content=body(),
+        headers={"content-type": "application/x-ndjson"},
+    ) as response:
+        lines = 0
+        async for _ in response.aiter_lines():
+            lines += 1
+    assert lines == len(urls), lines
+
+
+async def main(count: int) -> None:
+    urls = [f"https://example.com/campaign/{i}" for i in range(count)]
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for name, runner in (("single", single_requests), ("batch", batch_request)):
+            start = time.perf_counter()
+            await runner(client, urls)
+            elapsed = time.perf_counter() - start
+            print(f"{name:>6}: {count} urls in {elapsed:.2f}s ({count / elapsed:,.0f} urls/s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=10_000)
+    asyncio.run(main(parser.parse_args().count))
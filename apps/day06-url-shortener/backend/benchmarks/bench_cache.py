@@ -0,0 +1,45 @@
+"""Hit ratio of W-TinyLFU vs plain LRU on a Zipf-distributed redirect trace.
+
+A cache miss is filled right away, as URLService does after reading the store. A one-off
+scan of cold codes is spliced into the middle of the trace to show scan resistance. Run
+from the backend directory:
+
+    python -m benchmarks.bench_cache --keys 100000 --requests 1000000
+"""
+
+import argparse
+
+from src.services.cache import LRUCache, TinyLFUCache
+
+from .common import zipf_trace
+
+
+def replay(cache: LRUCache | TinyLFUCache, trace: list[str]) -> float:
+    for key in trace:
+        if cache.get(key) is None:
+            cache.put(key, key)
+    return cache.hit_ratio
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--keys", type=int, default=100_000)
+    parser.add_argument("--requests", type=int, default=1_000_000)
+    parser.add_argument("--skew", type=float, default=0.9, help="Zipf exponent s")
+    parser.add_argument("--sizes", type=float, nargs="+", default=[0.001, 0.01, 0.05])
+    args = parser.parse_args()
+
+    trace = [f"k{i}" for i in zipf_trace(args.keys, args.requests, args.skew)]
+    middle = len(trace) // 2
+    trace[middle:middle] = [f"scan{i}" for i in range(args.keys // 2)]
+
+    print(f"{args.requests:,} requests over {args.keys:,} codes, s={args.skew}")
+    for fraction in args.sizes:
+        size = max(2, int(args.keys * fraction))
+        lru = replay(LRUCache(size), trace)
+        tiny = replay(TinyLFUCache(size), trace)
+        print(f"cache {size:>7,} ({fraction:.1%}): LRU {lru:.3f}  W-TinyLFU {tiny:.3f}")
+
+
+if __name__ == "__main__":
+    main()
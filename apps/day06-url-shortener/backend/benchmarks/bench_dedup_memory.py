@@ -0,0 +1,51 @@
+"""Measure the memory cost of the dedup reverse index per million URLs.
+
+Compares ReverseIndex (64-bit fingerprint keys) with a naive dict keyed by the full
+normalized URL string. Run from the backend directory:
+
+    python -m benchmarks.bench_dedup_memory --count 1000000
+"""
+
+import argparse
+import tracemalloc
+
+from src.services.dedup import ReverseIndex, normalize_url
+
+
+def measure(build) -> int:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    keep = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del keep
+    return after - before
+
+
+def main(count: int) -> None:
+    codes = [f"{i:06x}" for i in range(count)]
+    urls = [f"https://example.com/campaign/{i}/landing?utm_source=newsletter" for i in range(count)]
+    store = dict(zip(codes, urls))
+
+    def build_reverse_index() -> ReverseIndex:
+        index = ReverseIndex(store.get)
+        for code, url in store.items():
+            index.add(url, code)
+        return index
+
+    def build_full_key_dict() -> dict[str, str]:
+        return {normalize_url(url): code for code, url in store.items()}
+
+    per_million = 1_000_000 / count
+    for name, build in (("fingerprint", build_reverse_index), ("full-url", build_full_key_dict)):
+        size = measure(build)
+        print(
+            f"{name:>11}: {size / 2**20:8.1f} MiB for {count:,} urls "
+            f"({size / count:6.1f} B/entry, {size * per_million / 2**20:7.1f} MiB per million)"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=1_000_000)
+    main(parser.parse_args().count)
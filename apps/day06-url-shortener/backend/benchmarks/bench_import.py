@@ -0,0 +1,47 @@
+"""Bulk import and export throughput into the in-memory store.
+
+Rows are generated up front and fed to BulkImporter in 64 KiB blocks, the way a request
+body or a file arrives; the time includes rebuilding the negative cache afterwards. Run
+from the backend directory:
+
+    python -m benchmarks.bench_import --rows 1000000
+"""
+
+import argparse
+import time
+
+from src.services.bulk import BulkImporter, export_chunks
+from src.services.url_service import URLService
+
+BLOCK_BYTES = 64 << 10
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    rows = [(f"old{i:08d}", f"https://example.com/articles/{i}") for i in range(args.rows)]
+    for fmt in ("csv", "ndjson"):
+        data = b"".join(export_chunks(rows, fmt))
+        service = URLService()
+        importer = BulkImporter(service, fmt)
+        started = time.perf_counter()
+        with service.bulk_load():
+            for i in range(0, len(data), BLOCK_BYTES):
+                importer.feed(data[i : i + BLOCK_BYTES])
+            importer.finish()
+        imported = time.perf_counter() - started
+
+        started = time.perf_counter()
+        exported = sum(len(chunk) for chunk in export_chunks(service.iter_urls(), fmt))
+        export_elapsed = time.perf_counter() - started
+        assert importer.imported == args.rows and exported == len(data)
+        print(
+            f"{fmt:>6}: import {args.rows / imported:>10,.0f} rows/s  "
+            f"export {args.rows / export_elapsed:>10,.0f} rows/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
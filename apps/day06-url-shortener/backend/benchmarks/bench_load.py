@@ -0,0 +1,201 @@
+"""Mixed create/redirect load against the app, in-process or through uvicorn.
+
+``--mix 1:9`` sends one ``POST /api/shorten`` for every nine ``GET /{short_code}``.
+Redirects pick among ``--codes`` links created up front with Zipf skew ``--skew`` (0 for
+uniform), the shape real link traffic has. ``--target asgi`` (the default) calls
+``src.main:app`` directly, lifespan included, so the numbers are the app's own cost;
+``--target uvicorn`` runs it in a server process and adds HTTP parsing and sockets. Set
+environment variables for the app with ``--env`` (e.g. ``--env URL_SHORTENER_METRICS=0``).
+Run from the backend directory:
+
+    python -m benchmarks.bench_load --mix 1:9 --skew 1.0 --duration 10 --json load.json
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import time
+from collections.abc import Awaitable, Callable
+
+from .bench_redirect import seed
+from .common import (
+    asgi_lifespan,
+    free_port,
+    read_response,
+    save_results,
+    summarize,
+    uvicorn_server,
+    zipf_trace,
+)
+
+# One request: (method, path, body) -> status
+Send = Callable[[str, str, bytes], Awaitable[int]]
+
+
+def parse_mix(value: str) -> tuple[int, int]:
+    creates, redirects = (int(part) for part in value.split(":"))
+    if creates < 0 or redirects < 0 or not creates + redirects:
+        raise argparse.ArgumentTypeError("expected CREATES:REDIRECTS, e.g. 1:9")
+    return creates, redirects
+
+
+def asgi_sender(app: Callable) -> Send:
+    """Sender that calls the ASGI app directly with a fresh scope per request."""
+
+    async def send(method: str, path: str, body: bytes) -> int:
+        status = 0
+        sent_body = False
+
+        async def receive() -> dict:
+            nonlocal sent_body
+            if sent_body:
+                return {"type": "http.disconnect"}
+            sent_body = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        async def reply(message: dict) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+
+        headers = [(b"host", b"bench")]
+        if body:
+            headers += [
+                (b"content-type", b"application/json"),
+                (b"content-length", b"%d" % len(body)),
+            ]
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "root_path": "",
+            "query_string": b"",
+            "headers": headers,
+            "client": ("127.0.0.1", 50000),
+            "server": ("bench", 80),
+            "state": {},
+        }
+        await app(scope, receive, reply)
+        return status
+
+    return send
+
+
+async def http_sender(port: int) -> Send:
+    """Sender over one keep-alive connection (one per load worker)."""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+
+    async def send(method: str, path: str, body: bytes) -> int:
+        head = f"{method} {path} HTTP/1.1\r\nhost: bench\r\n"
+        if body:
+            head += f"content-type: application/json\r\ncontent-length: {len(body)}\r\n"
+        writer.write(head.encode() + b"\r\n" + body)
+        return await read_response(reader)
+
+    return send
+
+
+async def run_load(
+    senders: list[Send], paths: list[str], args: argparse.Namespace
+) -> dict[str, dict[str, float]]:
+    """Drive one worker per sender for ``args.duration`` seconds; redirects go to `paths`."""
+    creates, redirects = args.mix
+    trace = [paths[i] for i in zipf_trace(len(paths), 100_000, args.skew, seed=args.seed)]
+    latencies: dict[str, list[float]] = {"create": [], "redirect": []}
+    errors = 0
+    stop_at = time.perf_counter() + args.duration
+
+    async def worker(index: int, send: Send) -> None:
+        nonlocal errors
+        rng = random.Random(args.seed + index)
+        step = index
+        while time.perf_counter() < stop_at:
+            step += 1
+            if rng.random() * (creates + redirects) < creates:
+                kind, method, path = "create", "POST", "/api/shorten"
+                body = b'{"url": "https://example.com/load/%d/%d"}' % (index, step)
+                expected = 201
+            else:
+                kind, method, path, body = "redirect", "GET", trace[step % len(trace)], b""
+                expected = 307
+            started = time.perf_counter()
+            status = await send(method, path, body)
+            latencies[kind].append(time.perf_counter() - started)
+            errors += status != expected
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i, send) for i, send in enumerate(senders)))
+    elapsed = time.perf_counter() - started
+    results = {kind: summarize(values, elapsed) for kind, values in latencies.items() if values}
+    results["total"] = summarize([v for values in latencies.values() for v in values], elapsed)
+    results["total"]["errors"] = errors
+    return results
+
+
+async def in_process(args: argparse.Namespace) -> dict[str, dict[str, float]]:
+    from src.main import app
+    from src.services import url_service
+
+    async with asgi_lifespan(app):
+        codes = url_service.create_many(
+            [f"https://example.com/seed/{i}" for i in range(args.codes)]
+        )
+        senders = [asgi_sender(app)] * args.concurrency
+        return await run_load(senders, [f"/{code}" for code in codes], args)
+
+
+async def over_http(port: int, args: argparse.Namespace) -> dict[str, dict[str, float]]:
+    senders = [await http_sender(port) for _ in range(args.concurrency)]
+    paths = await asyncio.to_thread(seed, port, args.codes)
+    return await run_load(senders, paths, args)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--target", choices=["asgi", "uvicorn"], default="asgi")
+    parser.add_argument("--mix", type=parse_mix, default=(1, 9), help="CREATES:REDIRECTS")
+    parser.add_argument("--skew", type=float, default=1.0, help="Zipf exponent s, 0 = uniform")
+    parser.add_argument("--codes", type=int, default=10_000, help="links created up front")
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    env = dict(item.split("=", 1) for item in args.env)
+    if args.target == "asgi":
+        os.environ.update(env)  # before src.main is imported
+        results = asyncio.run(in_process(args))
+    else:
+        port = free_port()
+        with uvicorn_server("src.main:app", port, env={**os.environ, **env}):
+            results = asyncio.run(over_http(port, args))
+
+    creates, redirects = args.mix
+    print(
+        f"{args.target}, mix {creates}:{redirects}, s={args.skew}, "
+        f"{args.concurrency} concurrent, {args.duration:g}s"
+    )
+    for kind, result in results.items():
+        print(
+            f"{kind:>9}: {result['rps']:>9,.0f} req/s  p50 {result['p50_ms']:.3f} ms  "
+            f"p99 {result['p99_ms']:.3f} ms  p999 {result['p999_ms']:.3f} ms"
+        )
+    if results["total"]["errors"]:
+        print(f"   errors: {results['total']['errors']:,}")
+
+    if args.json:
+        params = {key: value for key, value in vars(args).items() if key != "json"}
+        params["mix"] = f"{creates}:{redirects}"
+        params["env"] = env
+        save_results(args.json, "load", params, results)
+
+
+if __name__ == "__main__":
+    main()
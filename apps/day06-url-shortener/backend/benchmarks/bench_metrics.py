@@ -0,0 +1,78 @@
+"""What the metrics middleware costs per request, measured in-process.
+
+Drives the ASGI app directly (no server or sockets, so the middleware is not drowned out
+by HTTP parsing) with redirect hits, and reports the time per request with and without
+MetricsMiddleware, plus the cost of a bare ``LatencyHistogram.record``. Run from the
+backend directory:
+
+    python -m benchmarks.bench_metrics --requests 200000
+"""
+
+import argparse
+import asyncio
+import time
+
+from fastapi import FastAPI
+from starlette.types import ASGIApp
+
+from src.fast_path import RedirectFastPath
+from src.services.metrics import LatencyHistogram, MetricsMiddleware, RequestMetrics
+from src.services.url_service import URLService
+
+
+async def receive() -> dict:
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def send(message: dict) -> None:
+    pass
+
+
+async def drive(app: ASGIApp, paths: list[str], requests: int) -> float:
+    """Seconds per request; every request gets a fresh scope, as from a server."""
+    started = time.perf_counter()
+    for i in range(requests):
+        scope = {"type": "http", "method": "GET", "path": paths[i % len(paths)], "headers": []}
+        await app(scope, receive, send)
+    return (time.perf_counter() - started) / requests
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200_000)
+    parser.add_argument("--codes", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=3, help="best of this many runs")
+    args = parser.parse_args()
+
+    service = URLService()
+    paths = [
+        f"/{code}"
+        for code in service.create_many([f"https://example.com/{i}" for i in range(args.codes)])
+    ]
+    metrics = RequestMetrics()
+    cases = {
+        "fast path": RedirectFastPath(FastAPI(), service),
+        "+ metrics": MetricsMiddleware(
+            RedirectFastPath(FastAPI(), service, metrics=metrics), metrics
+        ),
+    }
+    results = {}
+    for label, app in cases.items():
+        results[label] = min(
+            asyncio.run(drive(app, paths, args.requests)) for _ in range(args.rounds)
+        )
+        print(f"{label:>10}: {results[label] * 1e6:6.2f} us/request")
+    overhead = results["+ metrics"] - results["fast path"]
+    print(f"  overhead: {overhead * 1e6:6.2f} us/request ({overhead / results['fast path']:.1%})")
+
+    histogram = LatencyHistogram()
+    values = [(i * 7919) % 50_000 for i in range(args.requests)]
+    started = time.perf_counter()
+    for micros in values:
+        histogram.record(micros)
+    per_record = (time.perf_counter() - started) / len(values)
+    print(f"    record: {per_record * 1e9:6.0f} ns")
+
+
+if __name__ == "__main__":
+    main()
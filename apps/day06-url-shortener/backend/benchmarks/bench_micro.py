@@ -0,0 +1,107 @@
+"""Microbenchmarks of the URLService calls on the request path.
+
+- ``generate_short_code`` with the code space (3-character codes, so it can be filled)
+  already taken by imported links to several fill ratios; allocated codes never collide,
+  so only imported ones make it skip.
+- ``get_original_url`` for present and absent codes, with ``--links`` stored.
+- ``list_all_urls`` over ``--links`` stored links.
+
+Each figure is the best of ``--rounds`` runs. Run from the backend directory:
+
+    python -m benchmarks.bench_micro --links 100000 --json micro.json
+"""
+
+import argparse
+import random
+import time
+from collections.abc import Callable
+
+from src.services.allocator import CodeAllocator, encode_base62, tier_size
+from src.services.url_service import URLService
+
+from .common import save_results
+
+FILL_LENGTH = 3
+
+
+def best_of(rounds: int, run: Callable[[], int]) -> float:
+    """Fastest time per operation; `run` returns how many operations it did."""
+    best = float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter()
+        operations = run()
+        best = min(best, (time.perf_counter() - started) / operations)
+    return best
+
+
+def generate_at_fill(fill: float, calls: int, rounds: int) -> float:
+    size = tier_size(FILL_LENGTH)
+    rng = random.Random(0)
+    imported = rng.sample(range(size), int(size * fill))
+    best = float("inf")
+    for _ in range(rounds):
+        # A fresh service per round, filled outside the timed part
+        service = URLService(allocator=CodeAllocator(key=b"bench", min_length=FILL_LENGTH))
+        with service.bulk_load():
+            service.import_links(
+                {encode_base62(value, FILL_LENGTH): "https://example.com/" for value in imported}
+            )
+        generate = service.generate_short_code
+        started = time.perf_counter()
+        for _ in range(calls):
+            generate()
+        best = min(best, (time.perf_counter() - started) / calls)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--links", type=int, default=100_000)
+    parser.add_argument("--lookups", type=int, default=200_000)
+    parser.add_argument("--fills", type=float, nargs="+", default=[0.0, 0.5, 0.9, 0.99])
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+    results: dict[str, dict[str, float]] = {}
+
+    def report(name: str, seconds: float) -> None:
+        results[name] = {"ops_per_second": 1 / seconds, "us_per_op": seconds * 1e6}
+        print(f"{name:>32}: {seconds * 1e6:10.3f} us/op  {1 / seconds:>12,.0f} ops/s")
+
+    size = tier_size(FILL_LENGTH)
+    for fill in args.fills:
+        # Leave most of the free codes untouched so the fill ratio barely moves while timing
+        calls = max(1, min(10_000, int(size * (1 - fill)) // 4))
+        report(f"generate_short_code fill={fill:g}", generate_at_fill(fill, calls, args.rounds))
+
+    service = URLService()
+    codes = service.create_many([f"https://example.com/{i}" for i in range(args.links)])
+    rng = random.Random(1)
+    hits = [rng.choice(codes) for _ in range(args.lookups)]
+    misses = [f"x{i:05d}" for i in range(args.lookups)]
+
+    def lookups(paths: list[str]) -> Callable[[], int]:
+        def run() -> int:
+            get = service.get_original_url
+            for short_code in paths:
+                get(short_code)
+            return len(paths)
+
+        return run
+
+    report("get_original_url hit", best_of(args.rounds, lookups(hits)))
+    report("get_original_url miss", best_of(args.rounds, lookups(misses)))
+
+    def list_all() -> int:
+        service.list_all_urls()
+        return 1
+
+    report(f"list_all_urls {args.links:,} links", best_of(args.rounds, list_all))
+
+    if args.json:
+        params = {key: value for key, value in vars(args).items() if key != "json"}
+        save_results(args.json, "micro", params, results)
+
+
+if __name__ == "__main__":
+    main()
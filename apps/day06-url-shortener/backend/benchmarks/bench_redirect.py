@@ -0,0 +1,78 @@
+"""Redirect throughput and latency under uvicorn, with and without the ASGI fast path.
+
+`src.main:api` is the plain FastAPI app and `src.main:app` wraps it in RedirectFastPath.
+The fast path is measured bare, with request metrics, and with click analytics on top, to
+check that neither adds more than a few percent to redirect latency. The 404 cases replay
+scanner-style misses, which the fast path answers from the negative cache. Run from the
+backend directory:
+
+    python -m benchmarks.bench_redirect --duration 10 --concurrency 32
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import urllib.request
+
+from .common import free_port, http_get_load, summarize, uvicorn_server
+
+
+def seed(port: int, count: int) -> list[str]:
+    body = "".join(f'{{"url": "https://example.com/r/{i}"}}\n' for i in range(count)).encode()
+    request = urllib.request.Request(
+        f"http://127.0.0.1:{port}/api/shorten/batch",
+        data=body,
+        headers={"content-type": "application/x-ndjson"},
+    )
+    with urllib.request.urlopen(request) as response:
+        return [f"/{json.loads(line)['short_code']}" for line in response]
+
+
+SCANNER_PATHS = ["/wp-login.php", "/.env", "/admin.php", "/xmlrpc.php"]
+
+# (label, app, env, replay misses instead of live codes)
+CASES = [
+    ("fastapi route", "src.main:api", {}, False),
+    (
+        "fast path",
+        "src.main:app",
+        {"URL_SHORTENER_ANALYTICS": "0", "URL_SHORTENER_METRICS": "0"},
+        False,
+    ),
+    ("fast + metrics", "src.main:app", {"URL_SHORTENER_ANALYTICS": "0"}, False),
+    ("fast + clicks", "src.main:app", {"URL_SHORTENER_ANALYTICS": "1"}, False),
+    ("fastapi 404", "src.main:api", {}, True),
+    ("fast path 404", "src.main:app", {}, True),
+]
+
+
+def run(app: str, env: dict[str, str], misses: bool, args: argparse.Namespace) -> dict[str, float]:
+    port = free_port()
+    with uvicorn_server(app, port, env={**os.environ, **env}):
+        paths = seed(port, args.codes)
+        if misses:
+            paths = SCANNER_PATHS + [f"/x{i:05d}" for i in range(args.codes)]
+        latencies, elapsed = asyncio.run(
+            http_get_load(port, paths, args.concurrency, args.duration)
+        )
+    return summarize(latencies, elapsed)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--codes", type=int, default=1000)
+    args = parser.parse_args()
+
+    for label, app, env, misses in CASES:
+        result = run(app, env, misses, args)
+        print(
+            f"{label:>15}: {result['rps']:>9,.0f} req/s  "
+            f"p50 {result['p50_ms']:.2f} ms  p99 {result['p99_ms']:.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Lookup throughput of ShardedURLService with 1, 2 and 4 local shards.
+
+Each shard is its own process on a Unix socket; lookups come from a pool of client
+threads in this process. Scaling needs roughly one free core per shard. Run from the
+backend directory:
+
+    python -m benchmarks.bench_sharding --duration 5 --threads 8
+"""
+
+import argparse
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from src.services.sharding import ShardedURLService, spawn_shard
+
+
+def lookup_rate(
+    service: ShardedURLService, codes: list[str], threads: int, seconds: float
+) -> float:
+    def worker(offset: int) -> int:
+        done = 0
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            service.get_original_url(codes[(offset + done) % len(codes)])
+            done += 1
+        return done
+
+    with ThreadPoolExecutor(threads) as pool:
+        return sum(pool.map(worker, range(0, threads * 997, 997))) / seconds
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--links", type=int, default=100_000)
+    args = parser.parse_args()
+
+    urls = [f"https://example.com/{i}" for i in range(args.links)]
+    baseline = None
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in (1, 2, 4):
+            names = [f"shard{count}-{i}" for i in range(count)]
+            processes = [spawn_shard(str(Path(tmp) / f"{name}.sock")) for name in names]
+            service = ShardedURLService({name: str(Path(tmp) / f"{name}.sock") for name in names})
+            codes = service.create_many(urls)
+            rate = lookup_rate(service, codes, args.threads, args.duration)
+            baseline = baseline or rate
+            print(f"{count} shard(s): {rate:>9,.0f} lookups/s  ({rate / baseline:.2f}x)")
+            service.close()
+            for process in processes:
+                process.terminate()
+                process.join()
+
+
+if __name__ == "__main__":
+    main()
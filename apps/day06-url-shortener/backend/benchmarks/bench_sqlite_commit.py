@@ -0,0 +1,67 @@
+"""Durable shorten throughput on SQLiteStore: group commit vs one commit per request.
+
+Each simulated request does what ``POST /api/shorten`` does: create a link, then await
+``wait_durable()``. Run from the backend directory:
+
+    python -m benchmarks.bench_sqlite_commit --concurrency 64 --duration 5
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+
+from src.services.allocator import allocator_from_env
+from src.services.sqlite_store import SQLiteStore
+from src.services.url_service import URLService
+
+from .common import summarize
+
+CASES = [
+    ("per-request commit", {"batch_size": 1, "flush_interval": 0.0}),
+    ("group commit", {}),
+]
+
+
+async def load(service: URLService, concurrency: int, duration: float) -> tuple[list[float], float]:
+    latencies: list[float] = []
+    deadline = time.perf_counter() + duration
+
+    async def client(worker: int) -> None:
+        i = 0
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            service.create_short_url(f"https://example.com/{worker}/{i}")
+            await service.wait_durable()
+            latencies.append(time.perf_counter() - start)
+            i += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client(worker) for worker in range(concurrency)))
+    return latencies, time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--concurrency", type=int, default=64)
+    args = parser.parse_args()
+
+    for label, options in CASES:
+        with tempfile.TemporaryDirectory() as tmp:
+            store = SQLiteStore(Path(tmp) / "urls.db", **options)
+            service = URLService(store=store, allocator=allocator_from_env(store))
+            latencies, elapsed = asyncio.run(load(service, args.concurrency, args.duration))
+            commits = store.commits
+            store.close()
+        result = summarize(latencies, elapsed)
+        print(
+            f"{label:>18}: {result['rps']:>8,.0f} writes/s  "
+            f"p50 {result['p50_ms']:.2f} ms  p99 {result['p99_ms']:.2f} ms  "
+            f"({result['requests'] / max(commits, 1):.1f} writes per commit)"
+        )
+
+
+if __name__ == "__main__":
+    main()
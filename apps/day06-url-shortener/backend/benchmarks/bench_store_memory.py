@@ -0,0 +1,68 @@
+"""Memory footprint of MemoryStore (dict) vs ArenaStore at increasing link counts.
+
+Each case runs in a fresh subprocess and reports the growth of its peak RSS. Large sizes
+take a while to fill from Python. Run from the backend directory:
+
+    python -m benchmarks.bench_store_memory --sizes 1000000 10000000 50000000
+"""
+
+import argparse
+import resource
+import subprocess
+import sys
+import time
+
+from src.services.allocator import encode_base62
+from src.services.arena_store import ArenaStore
+from src.services.storage import MemoryStore
+
+STORES = {"dict": MemoryStore, "arena": ArenaStore}
+
+
+def peak_rss() -> int:
+    # ru_maxrss is reported in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def child(kind: str, size: int) -> None:
+    before = peak_rss()
+    store = STORES[kind]()
+    start = time.perf_counter()
+    for i in range(size):
+        store.put(encode_base62(i, 6), f"https://example.com/articles/{i}?utm_source=news")
+    fill = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(0, size, max(1, size // 100_000)):
+        store.get(encode_base62(i, 6))
+    lookups = min(size, 100_000)
+    lookup = (time.perf_counter() - start) / lookups
+    print(peak_rss() - before, fill, lookup)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000_000])
+    parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(args.child[0], int(args.child[1]))
+        return
+
+    for size in args.sizes:
+        for kind in STORES:
+            out = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_store_memory", "--child", kind, str(size)],
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout.split()
+            rss, fill, lookup = int(out[0]), float(out[1]), float(out[2])
+            print(
+                f"{size:>11,} {kind:>5}: {rss / 2**20:9.1f} MiB ({rss / size:6.1f} B/link)  "
+                f"fill {fill:6.1f}s  get {lookup * 1e6:5.2f} us"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""Shared helpers for the benchmark scripts."""
+
+import asyncio
+import bisect
+import contextlib
+import itertools
+import json
+import platform
+import random
+import socket
+import subprocess
+import sys
+import time
+from collections.abc import AsyncIterator, Iterator, Sequence
+from datetime import UTC, datetime
+from pathlib import Path
+
+from starlette.types import ASGIApp
+
+
+def percentile(sorted_values: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted sequence."""
+    if not sorted_values:
+        return 0.0
+    rank = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def summarize(latencies: list[float], elapsed: float) -> dict[str, float]:
+    """Requests/sec and latency percentiles (milliseconds)."""
+    ordered = sorted(latencies)
+    return {
+        "requests": len(ordered),
+        "rps": len(ordered) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(ordered, 50) * 1000,
+        "p99_ms": percentile(ordered, 99) * 1000,
+        "p999_ms": percentile(ordered, 99.9) * 1000,
+    }
+
+
+def zipf_trace(keys: int, length: int, s: float = 1.0, seed: int = 0) -> list[int]:
+    """`length` key indices in [0, keys) where index i is drawn with weight 1 / (i + 1)**s."""
+    cumulative = list(itertools.accumulate(1 / (i + 1) ** s for i in range(keys)))
+    total = cumulative[-1]
+    rng = random.Random(seed)
+    return [bisect.bisect(cumulative, rng.random() * total) for _ in range(length)]
+
+
+def git_revision() -> str | None:
+    """Short hash of the checked-out commit, with a ``-dirty`` suffix for local changes."""
+    try:
+        revision = subprocess.run(
+            ["git", "describe", "--always", "--dirty"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return revision or None
+
+
+def save_results(path: str | Path, benchmark: str, params: dict, results: dict) -> None:
+    """Write results as JSON along with what they were measured on.
+
+    ``python -m benchmarks.compare`` reads two such files and reports the differences.
+    """
+    record = {
+        "benchmark": benchmark,
+        "revision": git_revision(),
+        "recorded_at": datetime.now(UTC).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "params": params,
+        "results": results,
+    }
+    Path(path).write_text(json.dumps(record, indent=2) + "\n")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextlib.contextmanager
+def uvicorn_server(app: str, port: int, env: dict[str, str] | None = None) -> Iterator[None]:
+    """Run `uvicorn <app>` in a subprocess until the block exits."""
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", app, "--port", str(port), "--log-level", "warning"],
+        env=env,
+    )
+    try:
+        deadline = time.monotonic() + 20
+        while time.monotonic() < deadline:
+            with contextlib.suppress(OSError), socket.create_connection(("127.0.0.1", port), 0.2):
+                break
+            time.sleep(0.1)
+        else:
+            raise RuntimeError(f"uvicorn {app} did not start")
+        yield
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+async def read_response(reader: asyncio.StreamReader) -> int:
+    head = await reader.readuntil(b"\r\n\r\n")
+    status = int(head[9:12])
+    length = 0
+    for line in head.split(b"\r\n"):
+        if line[:15].lower() == b"content-length:":
+            length = int(line[15:])
+    if length:
+        await reader.readexactly(length)
+    return status
+
+
+async def http_get_load(
+    port: int, paths: Sequence[str], concurrency: int, duration: float
+) -> tuple[list[float], float]:
+    """Issue keep-alive GETs from `concurrency` raw connections for `duration` seconds.
+
+    A minimal HTTP/1.1 client keeps the load generator cheap enough that the server, not
+    the client, is the bottleneck. Returns per-request latencies and the elapsed time.
+    """
+    latencies: list[float] = []
+    stop_at = time.perf_counter() + duration
+
+    async def worker(offset: int) -> None:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        i = offset
+        while time.perf_counter() < stop_at:
+            path = paths[i % len(paths)]
+            i += concurrency
+            start = time.perf_counter()
+            writer.write(f"GET {path} HTTP/1.1\r\nhost: bench\r\n\r\n".encode())
+            await read_response(reader)
+            latencies.append(time.perf_counter() - start)
+        writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    return latencies, time.perf_counter() - start
+
+
+@contextlib.asynccontextmanager
+async def asgi_lifespan(app: ASGIApp) -> AsyncIterator[None]:
+    """Run the app's lifespan startup and shutdown around the block, as a server would."""
+    inbox: asyncio.Queue[dict] = asyncio.Queue()
+    outbox: asyncio.Queue[dict] = asyncio.Queue()
+    task = asyncio.create_task(
+        app({"type": "lifespan", "asgi": {"version": "3.0"}, "state": {}}, inbox.get, outbox.put)
+    )
+    await inbox.put({"type": "lifespan.startup"})
+    message = await outbox.get()
+    if message["type"] != "lifespan.startup.complete":
+        raise RuntimeError(f"Lifespan startup failed: {message}")
+    try:
+        yield
+    finally:
+        await inbox.put({"type": "lifespan.shutdown"})
+        await outbox.get()
+        await task
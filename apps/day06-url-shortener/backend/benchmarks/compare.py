@@ -0,0 +1,73 @@
+"""Compare two benchmark result files written with ``--json``.
+
+Prints every metric the two runs share with its relative change (positive when it got
+better), and exits with status 1 if any got worse by more than ``--threshold``
+(throughput down, or latency up). Results are only comparable from the same machine and
+parameters; differing parameters are listed first. Run from the backend directory:
+
+    python -m benchmarks.compare baseline.json current.json --threshold 0.1
+"""
+
+import argparse
+import json
+import sys
+
+# Metrics where a larger value is better; every other numeric metric is a time
+HIGHER_IS_BETTER = ("rps", "ops_per_second")
+# Counts that describe the run rather than measure it
+IGNORED = ("requests",)
+
+
+def change(metric: str, old: float, new: float) -> float:
+    """Relative change, positive when `new` is worse than `old`."""
+    if not old:
+        # e.g. errors appearing where there were none
+        return float("inf") if new and metric not in HIGHER_IS_BETTER else 0.0
+    delta = (new - old) / old
+    return -delta if metric in HIGHER_IS_BETTER else delta
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=0.1, help="e.g. 0.1 for 10%%")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    if baseline["benchmark"] != current["benchmark"]:
+        parser.error(
+            f"{baseline['benchmark']} results cannot be compared with {current['benchmark']}"
+        )
+
+    print(f"{baseline['revision']} -> {current['revision']}")
+    for key in sorted(baseline["params"].keys() | current["params"].keys()):
+        old, new = baseline["params"].get(key), current["params"].get(key)
+        if old != new:
+            print(f"  params differ: {key} {old!r} -> {new!r}")
+
+    regressions = 0
+    for name, old_metrics in baseline["results"].items():
+        new_metrics = current["results"].get(name)
+        if new_metrics is None:
+            continue
+        for metric, old in old_metrics.items():
+            new = new_metrics.get(metric)
+            if metric in IGNORED or not isinstance(new, int | float):
+                continue
+            worse = change(metric, old, new)
+            flag = ""
+            if worse > args.threshold:
+                flag = "  REGRESSION"
+                regressions += 1
+            print(f"{name:>32} {metric:>14}: {old:>12,.3f} -> {new:>12,.3f} ({-worse:+.1%}){flag}")
+    if regressions:
+        print(f"{regressions} metric(s) regressed by more than {args.threshold:.0%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
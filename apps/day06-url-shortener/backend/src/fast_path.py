@@ -0,0 +1,124 @@
+"""Raw ASGI redirect lane, shared by the primary app and read replicas."""
+
+import re
+from collections.abc import Iterator
+from urllib.parse import quote
+
+from fastapi import FastAPI
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from .services import ClickAnalytics, RequestMetrics, URLService
+from .services.bulk import CODE_PATTERN
+
+# Same characters RedirectResponse leaves unescaped in the Location header
+LOCATION_SAFE_CHARS = ":/%#?=@[]!$&'()*+,;"
+MAX_SHORT_CODE_LENGTH = 32
+REDIRECT_PATH = "/{short_code}"
+# Codes an import may bring in besides base62 ones; the routed path serves those
+_IMPORTED_CODE = re.compile(CODE_PATTERN)
+EMPTY_BODY_HEADER = (b"content-length", b"0")
+# Same body FastAPI renders for the redirect route's HTTPException, serialized once
+NOT_FOUND_BODY = b'{"detail":"Short URL not found"}'
+NOT_FOUND_HEADERS = [
+    (b"content-length", str(len(NOT_FOUND_BODY)).encode()),
+    (b"content-type", b"application/json"),
+]
+
+
+def _flat_routes(routes: list) -> Iterator[object]:
+    """Routes of the app including those of its routers, which FastAPI now keeps nested."""
+    for route in routes:
+        router = getattr(route, "original_router", None)
+        if router is not None:
+            yield from _flat_routes(router.routes)
+        else:
+            yield route
+
+
+class RedirectFastPath:
+    """Raw ASGI lane for the ``GET /{short_code}`` hot route.
+
+    Single-segment base62 paths are looked up directly in the URLService: a hit is answered
+    with a redirect and a miss with a preserialized 404, skipping FastAPI routing,
+    dependency resolution and Response objects entirely. Paths that cannot be a short code,
+    scanner noise such as ``/wp-login.php``, get the 404 without a lookup. Codes that also
+    use ``-`` or ``_`` (only imports create those) go to the app's redirect route, or are
+    looked up here if it has none (read replicas). Other methods, nested paths and the
+    app's own routes such as ``/docs`` fall through unchanged. With `metrics`, hits and
+    misses are counted and the request is labelled with the redirect route, as if the
+    router had matched it.
+    """
+
+    def __init__(
+        self,
+        app: FastAPI,
+        service: URLService,
+        analytics: ClickAnalytics | None = None,
+        permanent: bool = False,
+        metrics: RequestMetrics | None = None,
+    ) -> None:
+        self.app: ASGIApp = app
+        self.service = service
+        self.analytics = analytics
+        self.status = 301 if permanent else 307
+        self.metrics = metrics
+        routes = list(_flat_routes(app.routes))
+        self.reserved_paths = frozenset(
+            path for route in routes if "{" not in (path := getattr(route, "path", "{"))
+        )
+        self.route = next(
+            (route for route in routes if getattr(route, "path", None) == REDIRECT_PATH), None
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and scope["method"] in ("GET", "HEAD"):
+            path: str = scope["path"]
+            short_code = path[1:]
+            if "/" not in short_code and path not in self.reserved_paths:
+                if len(short_code) <= MAX_SHORT_CODE_LENGTH and short_code.isascii():
+                    imported = not short_code.isalnum()
+                    if imported and not _IMPORTED_CODE.fullmatch(short_code):
+                        await self.answer(scope, send, short_code, None)
+                        return
+                    if imported and self.route is not None:
+                        await self.app(scope, receive, send)
+                        return
+                    service = self.service
+                    original_url = await service.offload(service.get_original_url, short_code)
+                    await self.answer(scope, send, short_code, original_url)
+                    return
+                await self.answer(scope, send, short_code, None)
+                return
+        await self.app(scope, receive, send)
+
+    async def answer(
+        self, scope: Scope, send: Send, short_code: str, original_url: str | None
+    ) -> None:
+        if self.metrics is not None:
+            scope["route"] = self.route
+            if original_url is None:
+                self.metrics.redirect_misses += 1
+            else:
+                self.metrics.redirect_hits += 1
+        if original_url is None:
+            await self.not_found(send, scope["method"] == "HEAD")
+            return
+        if self.analytics is not None:
+            client = scope.get("client")
+            self.analytics.record(short_code, client[0] if client else "")
+        await self.redirect(send, original_url)
+
+    async def redirect(self, send: Send, original_url: str) -> None:
+        location = quote(original_url, safe=LOCATION_SAFE_CHARS).encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": self.status,
+                "headers": [(b"location", location), EMPTY_BODY_HEADER],
+            }
+        )
+        await send({"type": "http.response.body", "body": b""})
+
+    async def not_found(self, send: Send, head: bool = False) -> None:
+        await send({"type": "http.response.start", "status": 404, "headers": NOT_FOUND_HEADERS})
+        await send({"type": "http.response.body", "body": b"" if head else NOT_FOUND_BODY})
@@ -1,29 +1,101 @@
-from fastapi import FastAPI
+import asyncio
+import math
+from contextlib import asynccontextmanager, suppress
+
+from fastapi import FastAPI, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from starlette.types import ASGIApp
+
+from .fast_path import RedirectFastPath
+from .routes import api_router, metrics_router, redirect_router, stats_router
+from .routes.urls import STORE_FULL
+from .services import (
+    ANALYTICS_ENABLED,
+    METRICS_ENABLED,
+    MetricsMiddleware,
+    click_analytics,
+    request_metrics,
+    url_service,
+)
+from .services.replication import replication_from_env
+from .services.storage import StoreFullError
 
-from .routes import api_router, redirect_router
 
-app = FastAPI(
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Aggregate buffered clicks in the background, away from the redirect path
+    drainer = asyncio.create_task(click_analytics.run())
+    # Delete expired links; lookups already hide them before the reaper gets there
+    reaper = asyncio.create_task(url_service.run_reaper())
+    # Stream the log to read replicas, if configured
+    replication = replication_from_env(url_service)
+    yield
+    if replication is not None:
+        replication.close()
+    for task in (drainer, reaper):
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    click_analytics.drain()
+    # Flush any batched writes before the process exits
+    url_service.close()
+
+
+api = FastAPI(
     title="URL Shortener API",
     description="A simple URL shortening service",
     version="1.0.0",
-)
-
-# Configure CORS for frontend
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["http://localhost:5173"],  # Vite default dev server
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    lifespan=lifespan,
 )
 
 # Include routers
-app.include_router(api_router)
-app.include_router(redirect_router)
+api.include_router(api_router)
+api.include_router(stats_router)
+api.include_router(metrics_router)
+api.include_router(redirect_router)
+
 
+@api.exception_handler(RequestValidationError)
+async def validation_error(request: Request, exc: RequestValidationError) -> JSONResponse:
+    """The default 422, except that JSON's Infinity and NaN are echoed back as strings."""
+    detail = jsonable_encoder(
+        exc.errors(), custom_encoder={float: lambda x: x if math.isfinite(x) else str(x)}
+    )
+    return JSONResponse(status_code=422, content={"detail": detail})
 
-@app.get("/")
+
+@api.exception_handler(StoreFullError)
+async def store_full(request: Request, exc: StoreFullError) -> JSONResponse:
+    """A full store is an operator problem, not a server bug: 507 instead of a bare 500."""
+    return JSONResponse(status_code=507, content={"detail": STORE_FULL})
+
+
+@api.get("/")
 async def root() -> dict[str, str]:
     """Health check endpoint."""
     return {"status": "ok", "message": "URL Shortener API"}
+
+
+# Forget the clicks of deleted and reaped links
+if ANALYTICS_ENABLED:
+    url_service.on_delete = click_analytics.evict
+
+fast_path = RedirectFastPath(
+    api,
+    url_service,
+    click_analytics if ANALYTICS_ENABLED else None,
+    metrics=request_metrics if METRICS_ENABLED else None,
+)
+# Configure CORS for frontend; outside the fast path, so its redirects and 404s get the
+# same headers as the routed responses
+cors = CORSMiddleware(
+    fast_path,
+    allow_origins=["http://localhost:5173"],  # Vite default dev server
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+app: ASGIApp = MetricsMiddleware(cors, request_metrics) if METRICS_ENABLED else cors
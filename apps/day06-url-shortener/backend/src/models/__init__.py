@@ -1,3 +1,31 @@
+from .stats import (
+    CacheStats,
+    ClickStats,
+    HeavyHitter,
+    HeavyHittersResponse,
+    MinuteClicks,
+    NegativeCacheStats,
+    ReplicationStatus,
+    SnapshotStatus,
+    TopLink,
+    TopLinksResponse,
+    UniqueClientsResponse,
+)
 from .url import URLCreate, URLListResponse, URLResponse
 
-__all__ = ["URLCreate", "URLResponse", "URLListResponse"]
+__all__ = [
+    "URLCreate",
+    "URLResponse",
+    "URLListResponse",
+    "ClickStats",
+    "MinuteClicks",
+    "TopLink",
+    "TopLinksResponse",
+    "HeavyHitter",
+    "HeavyHittersResponse",
+    "UniqueClientsResponse",
+    "NegativeCacheStats",
+    "CacheStats",
+    "SnapshotStatus",
+    "ReplicationStatus",
+]
@@ -0,0 +1,106 @@
+from datetime import datetime
+
+from pydantic import BaseModel
+
+
+class MinuteClicks(BaseModel):
+    """Clicks within one minute."""
+
+    minute: datetime
+    clicks: int
+
+
+class ClickStats(BaseModel):
+    """Response model for a single link's click stats."""
+
+    short_code: str
+    total_clicks: int
+    last_click_at: datetime | None = None
+    clicks_per_minute: list[MinuteClicks]
+
+
+class TopLink(BaseModel):
+    """One entry in the most-clicked list."""
+
+    short_code: str
+    clicks: int
+
+
+class TopLinksResponse(BaseModel):
+    """Response model for the most-clicked links."""
+
+    links: list[TopLink]
+
+
+class HeavyHitter(BaseModel):
+    """A hot link from the Space-Saving sketch."""
+
+    short_code: str
+    estimated_clicks: int
+    # True clicks lie in [estimated_clicks - max_overestimate, estimated_clicks]
+    max_overestimate: int
+
+
+class HeavyHittersResponse(BaseModel):
+    """Response model for approximate top links."""
+
+    total_clicks: int
+    links: list[HeavyHitter]
+
+
+class UniqueClientsResponse(BaseModel):
+    """Response model for a link's approximate distinct clients."""
+
+    short_code: str
+    # None when the link has no clicks or its sketch was evicted
+    unique_clients: int | None
+    relative_error: float
+
+
+class CacheStats(BaseModel):
+    """Response model for the hot-link cache in front of the store."""
+
+    size: int
+    capacity: int
+    hits: int
+    misses: int
+    evictions: int
+    hit_ratio: float
+
+
+class SnapshotStatus(BaseModel):
+    """Response model for background snapshots of the log store."""
+
+    in_progress: bool
+    rows_written: int | None = None
+    rows_total: int | None = None
+    elapsed_seconds: float | None = None
+    snapshots_started: int
+    last_succeeded: bool | None = None
+    last_duration_seconds: float | None = None
+
+
+class NegativeCacheStats(BaseModel):
+    """Response model for the redirect negative cache (cuckoo filter)."""
+
+    links: int
+    capacity: int
+    memory_bytes: int
+    rejected_lookups: int
+    false_positives: int
+    # Observed share of lookups for missing codes that still reached the store
+    false_positive_rate: float
+    expected_false_positive_rate: float
+
+
+class ReplicationStatus(BaseModel):
+    """Response model for a read replica following the primary's log."""
+
+    primary: str
+    connected: bool
+    links: int
+    applied_offset: int
+    primary_offset: int
+    lag_bytes: int
+    lag_seconds: float
+    snapshots_applied: int
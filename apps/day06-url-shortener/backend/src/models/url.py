@@ -1,10 +1,38 @@
-from pydantic import BaseModel, HttpUrl
+from datetime import UTC, datetime, timedelta
+
+from pydantic import BaseModel, Field, HttpUrl, model_validator
+
+# Longest lifetime a link can be given, about ten years
+MAX_TTL = 10 * 365 * 24 * 3600
 
 
 class URLCreate(BaseModel):
     """Request model for creating a shortened URL."""
 
     url: HttpUrl
+    # Optional expiry: either a lifetime in seconds or an absolute time, not both
+    ttl: float | None = Field(default=None, gt=0, le=MAX_TTL, allow_inf_nan=False)
+    expires_at: datetime | None = None
+
+    @model_validator(mode="after")
+    def check_expiry(self) -> "URLCreate":
+        if self.ttl is not None and self.expires_at is not None:
+            raise ValueError("Set either ttl or expires_at, not both")
+        if self.expires_at is not None:
+            if self.expires_at.tzinfo is None:
+                self.expires_at = self.expires_at.replace(tzinfo=UTC)
+            now = datetime.now(UTC)
+            if self.expires_at <= now:
+                raise ValueError("expires_at must be in the future")
+            if self.expires_at > now + timedelta(seconds=MAX_TTL):
+                raise ValueError("expires_at must be within ten years")
+        return self
+
+    def lifetime(self) -> float | None:
+        """Seconds until the link expires, or None if it never does."""
+        if self.expires_at is not None:
+            return self.expires_at.timestamp() - datetime.now(UTC).timestamp()
+        return self.ttl
 
 
 class URLResponse(BaseModel):
@@ -13,9 +41,12 @@ class URLResponse(BaseModel):
     short_code: str
     original_url: str
     short_url: str
+    expires_at: datetime | None = None
 
 
 class URLListResponse(BaseModel):
-    """Response model for listing all URLs."""
+    """Response model for one page of URLs."""
 
     urls: list[URLResponse]
+    # Pass as ?after= to fetch the next page; None on the last page
+    next_cursor: str | None = None
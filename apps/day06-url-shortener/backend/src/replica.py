@@ -0,0 +1,97 @@
+"""Read-only replica app: serves redirects from a copy of the primary's links.
+
+The primary ships its log with ``URL_SHORTENER_REPLICATION_LISTEN`` set; a replica follows
+it and answers ``GET /{short_code}`` locally. Writes get a 307 to the primary, which
+keeps the method and body, so clients can send everything to either. Run with::
+
+    URL_SHORTENER_REPLICATE_FROM=/tmp/primary.sock \\
+    URL_SHORTENER_PRIMARY_URL=http://localhost:8000 uvicorn src.replica:app --port 8001
+"""
+
+import asyncio
+import os
+from contextlib import asynccontextmanager, suppress
+
+from fastapi import FastAPI
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from .fast_path import RedirectFastPath
+from .models import ReplicationStatus
+from .services.replication import Replica
+from .services.sharding import parse_address
+
+READ_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+primary_address = os.environ.get("URL_SHORTENER_REPLICATE_FROM")
+primary_url = os.environ.get("URL_SHORTENER_PRIMARY_URL", "").rstrip("/")
+if not primary_address or not primary_url:
+    raise RuntimeError(
+        "Set URL_SHORTENER_REPLICATE_FROM (primary's log-shipping address) "
+        "and URL_SHORTENER_PRIMARY_URL (its HTTP base URL)"
+    )
+replica = Replica(parse_address(primary_address))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    follower = asyncio.create_task(replica.run())
+    yield
+    follower.cancel()
+    with suppress(asyncio.CancelledError):
+        await follower
+
+
+api = FastAPI(
+    title="URL Shortener Replica",
+    description="Read-only redirects replicated from the primary",
+    version="1.0.0",
+    lifespan=lifespan,
+)
+
+
+@api.get("/")
+async def root() -> dict[str, str]:
+    """Health check endpoint."""
+    return {"status": "ok", "message": "URL Shortener replica"}
+
+
+@api.get("/api/replication", response_model=ReplicationStatus)
+async def replication_status() -> ReplicationStatus:
+    """How far this replica trails the primary."""
+    return ReplicationStatus(
+        primary=primary_url,
+        connected=replica.connected,
+        links=len(replica.service),
+        applied_offset=replica.applied_offset,
+        primary_offset=replica.primary_offset,
+        lag_bytes=replica.lag_bytes,
+        lag_seconds=replica.lag_seconds,
+        snapshots_applied=replica.snapshots,
+    )
+
+
+class WritesToPrimary:
+    """Answers every write with a 307 to the same path on the primary."""
+
+    def __init__(self, app: ASGIApp, primary: str) -> None:
+        self.app = app
+        self.primary = primary
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] in READ_METHODS:
+            await self.app(scope, receive, send)
+            return
+        location = self.primary + scope["path"]
+        if scope["query_string"]:
+            location += "?" + scope["query_string"].decode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 307,
+                "headers": [(b"location", location.encode()), (b"content-length", b"0")],
+            }
+        )
+        await send({"type": "http.response.body", "body": b""})
+
+
+app = WritesToPrimary(RedirectFastPath(api, replica.service), primary_url)
@@ -1,3 +1,5 @@
+from .metrics import metrics_router
+from .stats import stats_router
 from .urls import api_router, redirect_router
 
-__all__ = ["api_router", "redirect_router"]
+__all__ = ["api_router", "metrics_router", "redirect_router", "stats_router"]
@@ -0,0 +1,17 @@
+from fastapi import APIRouter
+from fastapi.responses import Response
+
+from ..services import request_metrics, url_service
+
+# Prometheus text exposition format, version 0.0.4
+PROMETHEUS_MEDIA_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+metrics_router = APIRouter(tags=["metrics"])
+
+
+@metrics_router.get("/metrics", response_class=Response)
+async def get_metrics() -> Response:
+    """Latency histograms per route, in-flight requests, redirect and store gauges."""
+    # Counting links asks every shard when sharded, so rendering goes through offload
+    body = await url_service.offload(request_metrics.render, url_service)
+    return Response(body, media_type=PROMETHEUS_MEDIA_TYPE)
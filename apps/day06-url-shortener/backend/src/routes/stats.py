@@ -0,0 +1,154 @@
+from datetime import UTC, datetime
+
+from fastapi import APIRouter, HTTPException, Query
+
+from ..models import (
+    CacheStats,
+    ClickStats,
+    HeavyHitter,
+    HeavyHittersResponse,
+    MinuteClicks,
+    NegativeCacheStats,
+    SnapshotStatus,
+    TopLink,
+    TopLinksResponse,
+    UniqueClientsResponse,
+)
+from ..services import click_analytics, url_service
+from ..services.sketches import TrafficSketches
+from ..services.storage import LogStore
+
+# Analytics endpoints; they only read the aggregates, never the redirect hot path
+stats_router = APIRouter(prefix="/api", tags=["stats"])
+
+
+def _timestamp(seconds: float) -> datetime:
+    return datetime.fromtimestamp(seconds, tz=UTC)
+
+
+@stats_router.get("/urls/{short_code}/stats", response_model=ClickStats)
+async def get_url_stats(short_code: str) -> ClickStats:
+    """Click totals and per-minute clicks over the last hour for one short URL."""
+    if await url_service.offload(url_service.get_original_url, short_code) is None:
+        raise HTTPException(status_code=404, detail="Short URL not found")
+
+    click_analytics.drain()
+    last_click = click_analytics.last_click(short_code)
+    return ClickStats(
+        short_code=short_code,
+        total_clicks=click_analytics.total_clicks(short_code),
+        last_click_at=_timestamp(last_click) if last_click else None,
+        clicks_per_minute=[
+            MinuteClicks(minute=_timestamp(minute), clicks=clicks)
+            for minute, clicks in click_analytics.clicks_per_minute(short_code)
+        ],
+    )
+
+
+@stats_router.get("/stats/top", response_model=TopLinksResponse)
+async def get_top_urls(n: int = Query(default=10, ge=1, le=1000)) -> TopLinksResponse:
+    """The most clicked short URLs."""
+    click_analytics.drain()
+    return TopLinksResponse(
+        links=[TopLink(short_code=code, clicks=clicks) for code, clicks in click_analytics.top(n)]
+    )
+
+
+def _sketches() -> TrafficSketches:
+    if click_analytics.sketches is None:
+        raise HTTPException(status_code=404, detail="Traffic sketches are disabled")
+    click_analytics.drain()
+    return click_analytics.sketches
+
+
+@stats_router.get("/stats/heavy-hitters", response_model=HeavyHittersResponse)
+async def get_heavy_hitters(n: int = Query(default=10, ge=1, le=1000)) -> HeavyHittersResponse:
+    """Approximate hottest links from the fixed-size Space-Saving sketch."""
+    sketches = _sketches()
+    return HeavyHittersResponse(
+        total_clicks=sketches.heavy_hitters.total,
+        links=[
+            HeavyHitter(short_code=code, estimated_clicks=count, max_overestimate=error)
+            for code, count, error in sketches.heavy_hitters.top(n)
+        ],
+    )
+
+
+@stats_router.get("/stats/uniques/{short_code}", response_model=UniqueClientsResponse)
+async def get_unique_clients(short_code: str) -> UniqueClientsResponse:
+    """Approximate number of distinct clients that followed a short URL."""
+    sketches = _sketches()
+    return UniqueClientsResponse(
+        short_code=short_code,
+        unique_clients=sketches.unique_clients(short_code),
+        relative_error=1.04 / 2 ** (sketches.hll_precision / 2),
+    )
+
+
+@stats_router.get("/stats/negative-cache", response_model=NegativeCacheStats)
+async def get_negative_cache_stats() -> NegativeCacheStats:
+    """Size and false-positive rate of the filter that short-circuits redirect misses."""
+    known = url_service.negative_cache
+    if known is None:
+        raise HTTPException(status_code=404, detail="Negative cache is disabled")
+    return NegativeCacheStats(
+        links=len(known),
+        capacity=known.capacity,
+        memory_bytes=known.memory_bytes,
+        rejected_lookups=url_service.filter_rejections,
+        false_positives=url_service.filter_false_positives,
+        false_positive_rate=url_service.filter_false_positive_rate,
+        expected_false_positive_rate=known.expected_false_positive_rate,
+    )
+
+
+@stats_router.get("/stats/cache", response_model=CacheStats)
+async def get_cache_stats() -> CacheStats:
+    """Hit, miss and eviction counters of the hot-link cache."""
+    cache = url_service.cache
+    if cache is None:
+        raise HTTPException(status_code=404, detail="Link cache is disabled")
+    return CacheStats(
+        size=len(cache),
+        capacity=cache.capacity,
+        hits=cache.hits,
+        misses=cache.misses,
+        evictions=cache.evictions,
+        hit_ratio=cache.hit_ratio,
+    )
+
+
+def _snapshot_store() -> LogStore:
+    store = url_service.snapshots
+    if store is None:
+        raise HTTPException(status_code=404, detail="The store does not take snapshots")
+    return store
+
+
+def _snapshot_status(store: LogStore) -> SnapshotStatus:
+    running = store.poll_bgsave()
+    progress = store.bgsave_progress
+    return SnapshotStatus(
+        in_progress=running,
+        rows_written=progress[0] if progress else None,
+        rows_total=progress[1] if progress else None,
+        elapsed_seconds=store.bgsave_elapsed,
+        snapshots_started=store.bgsaves,
+        last_succeeded=store.last_bgsave_ok,
+        last_duration_seconds=store.last_bgsave_duration,
+    )
+
+
+@stats_router.get("/stats/snapshot", response_model=SnapshotStatus)
+async def get_snapshot_status() -> SnapshotStatus:
+    """Progress of the running background snapshot and how the last one went."""
+    return _snapshot_status(_snapshot_store())
+
+
+@stats_router.post("/snapshot", response_model=SnapshotStatus, status_code=202)
+async def start_snapshot() -> SnapshotStatus:
+    """Start a forked background snapshot of the log store (BGSAVE)."""
+    store = _snapshot_store()
+    if not store.bgsave():
+        raise HTTPException(status_code=409, detail="A snapshot is already running")
+    return _snapshot_status(store)
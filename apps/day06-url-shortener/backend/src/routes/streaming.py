@@ -0,0 +1,115 @@
+"""Helpers for streaming NDJSON/CSV request and response bodies."""
+
+import csv
+import json
+from collections.abc import AsyncIterator
+
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+CSV_MEDIA_TYPE = "text/csv"
+# Longer request lines are reported as errors instead of being buffered whole
+MAX_LINE_BYTES = 64 * 1024
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    """StreamingResponse that may keep reading the request body while it streams.
+
+    On older ASGI servers StreamingResponse watches ``receive`` for a disconnect while it
+    sends, which would swallow the body chunks the generator is still consuming.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+def body_format(request: Request) -> str:
+    """Return "csv" or "ndjson" based on the request Content-Type."""
+    content_type = request.headers.get("content-type", "")
+    return "csv" if content_type.startswith(CSV_MEDIA_TYPE) else "ndjson"
+
+
+async def iter_lines(request: Request) -> AsyncIterator[bytes | None]:
+    """Yield raw lines from the request body without buffering the whole body.
+
+    A line over MAX_LINE_BYTES is dropped as it streams in and yielded as None.
+    """
+    pending = b""
+    overlong = False
+    async for chunk in request.stream():
+        lines = (pending + chunk).split(b"\n")
+        pending = lines.pop()
+        for line in lines:
+            if overlong or len(line) > MAX_LINE_BYTES:
+                overlong = False
+                yield None
+            else:
+                yield line.rstrip(b"\r")
+        if len(pending) > MAX_LINE_BYTES:
+            pending = b""
+            overlong = True
+    if overlong:
+        yield None
+    elif pending:
+        yield pending.rstrip(b"\r")
+
+
+async def iter_chunks(
+    rows: AsyncIterator[tuple[int, dict | str]], size: int
+) -> AsyncIterator[list[tuple[int, dict | str]]]:
+    """Group rows into lists of at most `size` items."""
+    chunk: list[tuple[int, dict | str]] = []
+    async for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+async def iter_rows(
+    lines: AsyncIterator[bytes | None], fmt: str
+) -> AsyncIterator[tuple[int, dict | str]]:
+    """Yield (line_number, row) pairs.
+
+    NDJSON rows are decoded objects; CSV rows become dicts keyed by the header line. A row
+    that cannot be parsed (too long, invalid UTF-8, bad JSON) is yielded as an error string
+    so the caller can report it.
+    """
+    header: list[str] | None = None
+    line_number = 0
+    async for raw in lines:
+        line_number += 1
+        if raw is None:
+            yield line_number, f"Line longer than {MAX_LINE_BYTES} bytes"
+            continue
+        try:
+            line = raw.decode(errors="strict")
+        except UnicodeDecodeError:
+            yield line_number, "Invalid UTF-8"
+            continue
+        if not line.strip():
+            continue
+        if fmt == "csv":
+            cells = next(csv.reader([line]))
+            if header is None:
+                header = [cell.strip().lower() for cell in cells]
+                continue
+            yield line_number, dict(zip(header, cells))
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as exc:
+            yield line_number, f"Invalid JSON: {exc.msg}"
+            continue
+        yield line_number, row if isinstance(row, dict) else f"Expected an object, got {row!r}"
+
+
+def ndjson_line(row: dict) -> bytes:
+    """Serialize one NDJSON output line."""
+    return json.dumps(row, separators=(",", ":")).encode() + b"\n"
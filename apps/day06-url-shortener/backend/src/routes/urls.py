@@ -1,8 +1,40 @@
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import RedirectResponse
+from collections.abc import AsyncIterator, Iterator
+from datetime import UTC, datetime
+from itertools import islice
+from typing import Literal
+
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import RedirectResponse, StreamingResponse
+from pydantic import HttpUrl, TypeAdapter, ValidationError
 
 from ..models import URLCreate, URLListResponse, URLResponse
-from ..services import URLService
+from ..services import ANALYTICS_ENABLED, click_analytics, url_service
+from ..services.bulk import BulkImporter, export_chunks
+from ..services.storage import StoreFullError
+from .streaming import (
+    CSV_MEDIA_TYPE,
+    NDJSON_MEDIA_TYPE,
+    DuplexStreamingResponse,
+    body_format,
+    iter_chunks,
+    iter_lines,
+    iter_rows,
+    ndjson_line,
+)
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# Rows validated and allocated together by the batch endpoint
+BATCH_CHUNK_SIZE = 1000
+# Rows a streamed listing pulls from the service per offloaded call
+SCAN_BATCH = 1000
+
+# Reported when the store has no room left (507 Insufficient Storage, or per row)
+STORE_FULL = "Link storage is full; no new links can be created"
+
+
+_http_url = TypeAdapter(HttpUrl)
 
 # API router for /api/* endpoints
 api_router = APIRouter(prefix="/api", tags=["urls"])
@@ -10,40 +42,169 @@ api_router = APIRouter(prefix="/api", tags=["urls"])
 # Redirect router for /{short_code} endpoint (no prefix)
 redirect_router = APIRouter(tags=["redirect"])
 
-# Global service instance
-url_service = URLService()
-
 
 @api_router.post("/shorten", response_model=URLResponse, status_code=201)
 async def create_short_url(url_data: URLCreate) -> URLResponse:
     """Create a shortened URL."""
     original_url = str(url_data.url)
-    short_code = url_service.create_short_url(original_url)
+    short_code = await url_service.offload(
+        url_service.create_short_url, original_url, url_data.lifetime()
+    )
+    await url_service.wait_durable()
 
     # For the short_url, we'll use a relative path
     # The frontend can construct the full URL
     short_url = f"/{short_code}"
 
-    return URLResponse(short_code=short_code, original_url=original_url, short_url=short_url)
+    return URLResponse(
+        short_code=short_code,
+        original_url=original_url,
+        short_url=short_url,
+        expires_at=_datetime(await url_service.offload(url_service.expires_at, short_code)),
+    )
+
+
+def _datetime(deadline: float | None) -> datetime | None:
+    return None if deadline is None else datetime.fromtimestamp(deadline, UTC)
+
+
+@api_router.post("/shorten/batch")
+async def create_short_urls_batch(request: Request) -> DuplexStreamingResponse:
+    """Create shortened URLs from a streamed NDJSON or CSV body.
+
+    NDJSON lines are ``{"url": "..."}`` objects; CSV needs a header row with a ``url``
+    column (send ``Content-Type: text/csv``). One NDJSON result line is streamed back per
+    input row, carrying either the new short code or an error.
+    """
+    rows = iter_rows(iter_lines(request), body_format(request))
+    return DuplexStreamingResponse(_shorten_batch(rows), media_type=NDJSON_MEDIA_TYPE)
+
+
+async def _shorten_batch(rows: AsyncIterator[tuple[int, dict | str]]) -> AsyncIterator[bytes]:
+    async for chunk in iter_chunks(rows, BATCH_CHUNK_SIZE):
+        valid: list[tuple[int, str]] = []
+        errors: dict[int, str] = {}
+        for line, row in chunk:
+            if isinstance(row, str):
+                errors[line] = row
+                continue
+            try:
+                valid.append((line, str(_http_url.validate_python(row.get("url")))))
+            except ValidationError as exc:
+                errors[line] = exc.errors()[0]["msg"]
+
+        try:
+            short_codes = await url_service.offload(
+                url_service.create_many, [url for _, url in valid]
+            )
+        except StoreFullError:
+            errors.update((line, STORE_FULL) for line, _ in valid)
+            valid, short_codes = [], []
+        await url_service.wait_durable()
+        results = {
+            line: {"short_code": code, "original_url": url, "short_url": f"/{code}"}
+            for (line, url), code in zip(valid, short_codes)
+        }
+        yield b"".join(
+            ndjson_line({"line": line, **results[line]})
+            if line in results
+            else ndjson_line({"line": line, "error": errors[line]})
+            for line, _ in chunk
+        )
+
+
+@api_router.post("/import")
+async def import_urls(request: Request) -> DuplexStreamingResponse:
+    """Import existing links under their own codes from a streamed CSV or NDJSON body.
+
+    CSV needs a header row with ``code`` and ``url`` columns; NDJSON lines are
+    ``{"code": "...", "url": "..."}`` objects. An NDJSON line is streamed back for every
+    rejected row (an ``error``, or a ``conflict`` carrying the URL the code already has),
+    followed by a line with the totals.
+    """
+    if not hasattr(url_service, "import_links"):
+        raise HTTPException(status_code=501, detail="Bulk import is not supported with shards")
+    importer = BulkImporter(url_service, body_format(request))
+    return DuplexStreamingResponse(_import_urls(request, importer), media_type=NDJSON_MEDIA_TYPE)
+
+
+async def _import_urls(request: Request, importer: BulkImporter) -> AsyncIterator[bytes]:
+    with url_service.bulk_load():
+        try:
+            async for data in request.stream():
+                problems = importer.feed(data)
+                if problems:
+                    yield b"".join(map(ndjson_line, problems))
+            problems = importer.finish()
+        except StoreFullError:
+            problems = [{"error": STORE_FULL}]
+    await url_service.wait_durable()
+    yield b"".join(map(ndjson_line, [*problems, importer.summary()]))
+
+
+@api_router.get("/export")
+async def export_urls(
+    format: Literal["csv", "ndjson"] = Query(default="csv"),
+) -> StreamingResponse:
+    """Stream every link as CSV or NDJSON, in the shape ``POST /api/import`` reads."""
+    media_type = CSV_MEDIA_TYPE if format == "csv" else NDJSON_MEDIA_TYPE
+    return StreamingResponse(_export_urls(format), media_type=media_type)
+
+
+async def _export_urls(fmt: str) -> AsyncIterator[bytes]:
+    async for chunk in _drain(export_chunks(url_service.iter_urls(), fmt), 1):
+        yield chunk
 
 
 @api_router.get("/urls", response_model=URLListResponse)
-async def list_urls() -> URLListResponse:
-    """List all shortened URLs."""
-    all_urls = url_service.list_all_urls()
+async def list_urls(
+    after: str | None = Query(default=None, description="Return codes after this cursor"),
+    limit: int | None = Query(default=None, ge=1),
+    stream: Literal["ndjson"] | None = Query(default=None),
+) -> URLListResponse | StreamingResponse:
+    """List shortened URLs ordered by short code.
+
+    Pages hold at most 1000 rows (100 by default) and carry ``next_cursor``. With
+    ``stream=ndjson`` rows are streamed one per line straight from the index instead.
+    """
+    if stream == "ndjson":
+        return StreamingResponse(_stream_urls(after, limit), media_type=NDJSON_MEDIA_TYPE)
+
+    page_size = min(limit or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)
+    page = await url_service.offload(url_service.list_urls_page, after, page_size)
     urls = [
-        URLResponse(short_code=code, original_url=url, short_url=f"/{code}")
-        for code, url in all_urls.items()
+        URLResponse(
+            short_code=code,
+            original_url=url,
+            short_url=f"/{code}",
+            expires_at=_datetime(deadline),
+        )
+        for code, url, deadline in page
     ]
-    return URLListResponse(urls=urls)
+    next_cursor = page[-1][0] if len(page) == page_size else None
+    return URLListResponse(urls=urls, next_cursor=next_cursor)
+
+
+async def _drain[T](iterator: Iterator[T], batch: int) -> AsyncIterator[T]:
+    """Items of a service-backed iterator, pulled `batch` at a time through offload."""
+    while items := await url_service.offload(list, islice(iterator, batch)):
+        for item in items:
+            yield item
+
+
+async def _stream_urls(after: str | None, limit: int | None) -> AsyncIterator[bytes]:
+    async for code, url in _drain(islice(url_service.iter_urls(after=after), limit), SCAN_BATCH):
+        yield ndjson_line({"short_code": code, "original_url": url, "short_url": f"/{code}"})
 
 
 @redirect_router.get("/{short_code}")
-async def redirect_to_url(short_code: str) -> RedirectResponse:
+async def redirect_to_url(short_code: str, request: Request) -> RedirectResponse:
     """Redirect from a short code to the original URL."""
-    original_url = url_service.get_original_url(short_code)
+    original_url = await url_service.offload(url_service.get_original_url, short_code)
 
     if not original_url:
         raise HTTPException(status_code=404, detail="Short URL not found")
 
+    if ANALYTICS_ENABLED:
+        click_analytics.record(short_code, request.client.host if request.client else "")
     return RedirectResponse(url=original_url, status_code=307)
@@ -1,3 +1,40 @@
+from .allocator import CodeAllocator
+from .analytics import ANALYTICS_ENABLED, ClickAnalytics, click_analytics
+from .arena_store import ArenaStore
+from .metrics import METRICS_ENABLED, MetricsMiddleware, RequestMetrics, request_metrics
+from .shm_store import SharedMemoryStore
+from .sqlite_store import SQLiteStore
+from .storage import LogStore, MemoryStore, URLStore
 from .url_service import URLService
 
-__all__ = ["URLService"]
+# Importing the submodule bound its name here; drop it so `url_service` resolves to the
+# app's service, built lazily by the submodule on first access
+del url_service  # noqa: F821
+
+
+def __getattr__(name: str):
+    if name == "url_service":
+        from .url_service import url_service
+
+        return url_service
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+__all__ = [
+    "URLService",
+    "url_service",
+    "URLStore",
+    "MemoryStore",
+    "LogStore",
+    "ArenaStore",
+    "SharedMemoryStore",
+    "SQLiteStore",
+    "CodeAllocator",
+    "ClickAnalytics",
+    "click_analytics",
+    "ANALYTICS_ENABLED",
+    "RequestMetrics",
+    "MetricsMiddleware",
+    "request_metrics",
+    "METRICS_ENABLED",
+]
@@ -0,0 +1,241 @@
+"""Collision-free short code allocation.
+
+Codes come from a monotonic counter per code length ("tier"), pushed through a keyed
+Feistel permutation over the base62 space of that length. Every counter value maps to a
+distinct code, so allocation never has to check the store, and without the key the next
+code cannot be guessed from the previous ones. When a tier runs out the allocator moves on
+to the next length. Counter values are leased in blocks from a CounterSource, so several
+workers sharing one source never hand out the same code.
+"""
+
+import fcntl
+import hashlib
+import json
+import os
+import secrets
+import string
+import threading
+from pathlib import Path
+from typing import Protocol
+
+ALPHABET = string.digits + string.ascii_lowercase + string.ascii_uppercase
+BASE = len(ALPHABET)
+FEISTEL_ROUNDS = 4
+
+
+def tier_size(length: int) -> int:
+    """Number of distinct codes of the given length."""
+    return BASE**length
+
+
+def encode_base62(value: int, length: int) -> str:
+    """Encode value as exactly `length` base62 digits."""
+    chars = []
+    for _ in range(length):
+        value, digit = divmod(value, BASE)
+        chars.append(ALPHABET[digit])
+    return "".join(reversed(chars))
+
+
+def decode_base62(code: str) -> int:
+    """Inverse of encode_base62."""
+    value = 0
+    for char in code:
+        value = value * BASE + ALPHABET.index(char)
+    return value
+
+
+class FeistelPermutation:
+    """Keyed bijection on [0, BASE**length) using a balanced Feistel network.
+
+    The network permutes the smallest even-bit power of two covering the tier; values
+    that land outside the tier are re-encrypted ("cycle walking") until they fall inside,
+    which keeps the mapping a bijection on the tier itself.
+    """
+
+    def __init__(self, key: bytes, length: int) -> None:
+        self.length = length
+        self.size = tier_size(length)
+        self._half_bits = (max(self.size - 1, 1).bit_length() + 1) // 2
+        self._mask = (1 << self._half_bits) - 1
+        self._key = key
+        self._tweak = length.to_bytes(2, "little")
+
+    def _round(self, i: int, value: int) -> int:
+        data = self._tweak + bytes((i,)) + value.to_bytes(8, "little")
+        digest = hashlib.blake2b(data, key=self._key, digest_size=8).digest()
+        return int.from_bytes(digest, "little") & self._mask
+
+    def _encrypt(self, value: int) -> int:
+        left, right = value >> self._half_bits, value & self._mask
+        for i in range(FEISTEL_ROUNDS):
+            left, right = right, left ^ self._round(i, right)
+        return (left << self._half_bits) | right
+
+    def __call__(self, value: int) -> int:
+        if not 0 <= value < self.size:
+            raise ValueError(f"{value} is outside the {self.length}-character tier")
+        value = self._encrypt(value)
+        while value >= self.size:
+            value = self._encrypt(value)
+        return value
+
+
+class CounterSource(Protocol):
+    """Hands out disjoint ranges of counter values per code length."""
+
+    def reserve(self, length: int, count: int) -> range: ...
+
+
+class LocalCounterSource:
+    """In-process counters; enough when a single worker owns the store."""
+
+    def __init__(self) -> None:
+        self._next: dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def reserve(self, length: int, count: int) -> range:
+        with self._lock:
+            start = self._next.get(length, 0)
+            end = min(start + count, tier_size(length))
+            self._next[length] = max(start, end)
+            return range(start, end)
+
+
+class FileCounterSource:
+    """Counters persisted in a JSON file and guarded by flock.
+
+    Safe to share between processes (e.g. uvicorn workers), and survives restarts so a
+    persistent store never sees a code handed out twice.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.touch(exist_ok=True)
+
+    def reserve(self, length: int, count: int) -> range:
+        with open(self.path, "r+") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                raw = f.read()
+                counters = json.loads(raw) if raw else {}
+                start = counters.get(str(length), 0)
+                end = min(start + count, tier_size(length))
+                counters[str(length)] = max(start, end)
+                f.seek(0)
+                f.truncate()
+                json.dump(counters, f)
+                f.flush()
+                os.fsync(f.fileno())
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+        return range(start, end)
+
+
+class CodeAllocator:
+    """O(1), collision-free short code allocator."""
+
+    def __init__(
+        self,
+        key: bytes | None = None,
+        min_length: int = 6,
+        source: CounterSource | None = None,
+        block_size: int = 1,
+    ) -> None:
+        self.key = key if key is not None else secrets.token_bytes(16)
+        self.min_length = min_length
+        self.source: CounterSource = source if source is not None else LocalCounterSource()
+        self.block_size = block_size
+        self._length = min_length
+        self._permutations: dict[int, FeistelPermutation] = {}
+        self._leases: dict[int, range] = {}
+        # Highest counter value this allocator has taken per tier
+        self._taken: dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def current_length(self) -> int:
+        """Length of the codes currently being handed out by default."""
+        return self._length
+
+    @property
+    def utilization(self) -> float:
+        """Share of the current tier handed out, as far as this allocator has seen.
+
+        Workers sharing a counter source each report the highest counter they took, so
+        the figure may trail the true one by the others' unused leases.
+        """
+        length = self._length
+        return (self._taken.get(length, -1) + 1) / tier_size(length)
+
+    def _permutation(self, length: int) -> FeistelPermutation:
+        perm = self._permutations.get(length)
+        if perm is None:
+            perm = self._permutations[length] = FeistelPermutation(self.key, length)
+        return perm
+
+    def _take(self, length: int) -> int | None:
+        lease = self._leases.get(length)
+        if not lease:
+            lease = self.source.reserve(length, self.block_size)
+            if not lease:
+                return None
+        self._leases[length] = lease[1:]
+        self._taken[length] = lease[0]
+        return lease[0]
+
+    def _allocate_locked(self, length: int | None) -> str:
+        if length is not None:
+            counter = self._take(length)
+            if counter is None:
+                raise RuntimeError(f"All {length}-character short codes are allocated")
+        else:
+            length = self._length
+            counter = self._take(length)
+            while counter is None:
+                length = self._length = length + 1
+                counter = self._take(length)
+        return encode_base62(self._permutation(length)(counter), length)
+
+    def allocate(self, length: int | None = None) -> str:
+        """Return a fresh code, of exactly `length` characters if given."""
+        with self._lock:
+            return self._allocate_locked(length)
+
+    def allocate_many(self, count: int) -> list[str]:
+        """Return `count` fresh codes, taking the lock once for the whole batch."""
+        with self._lock:
+            return [self._allocate_locked(None) for _ in range(count)]
+
+
+def allocator_from_env(store: object = None) -> CodeAllocator:
+    """Build the allocator matching store_from_env().
+
+    With ``URL_SHORTENER_DATA_DIR`` set, the permutation key and counters are kept next to
+    the data so codes stay unique across restarts and workers. Shared-memory and SQLite
+    stores provide both themselves.
+    """
+    from .shm_store import SharedMemoryStore
+    from .sqlite_store import SQLiteStore
+
+    if isinstance(store, SharedMemoryStore | SQLiteStore):
+        return CodeAllocator(key=store.key, source=store, block_size=1000)
+    data_dir = os.environ.get("URL_SHORTENER_DATA_DIR")
+    if not data_dir:
+        return CodeAllocator()
+    key_path = Path(data_dir) / "code.key"
+    if not key_path.exists():
+        # Write then hard-link so concurrent workers agree on whichever key lands first
+        key_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = key_path.with_name(f"code.key.{os.getpid()}")
+        tmp.write_bytes(secrets.token_bytes(16))
+        try:
+            os.link(tmp, key_path)
+        except FileExistsError:
+            pass
+        finally:
+            tmp.unlink()
+    key = key_path.read_bytes()
+    source = FileCounterSource(Path(data_dir) / "counters.json")
+    return CodeAllocator(key=key, source=source, block_size=1000)
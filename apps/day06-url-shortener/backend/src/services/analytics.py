@@ -0,0 +1,179 @@
+"""Click analytics: a cheap record() on the redirect path, aggregation off the hot path."""
+
+import asyncio
+import heapq
+import os
+import time
+from array import array
+from collections import deque
+
+from .sketches import TrafficSketches
+
+# Set URL_SHORTENER_ANALYTICS=0 to skip click recording on redirects
+ANALYTICS_ENABLED = os.environ.get("URL_SHORTENER_ANALYTICS", "1") != "0"
+
+
+class ClickAnalytics:
+    """Per-link click counters fed from a preallocated ring buffer.
+
+    ``record`` is all the redirect path pays: two slot writes and an index bump, with no
+    allocation and no lock. It is meant to be called from the event loop thread only
+    (single producer). ``drain`` folds buffered events into compact aggregates: a
+    total-clicks array indexed by link number and, per clicked link, a rolling window of
+    per-minute buckets. If the buffer fills up before a drain, new events are counted in
+    ``dropped`` instead of blocking the redirect. When ``sketches`` is given, drained
+    events also feed the heavy-hitter and unique-client sketches. ``evict`` forgets a
+    deleted link's aggregates, sketch entries included, at the next drain, after any clicks
+    still buffered for it.
+    """
+
+    def __init__(
+        self,
+        capacity: int = 1 << 16,
+        window_minutes: int = 60,
+        sketches: TrafficSketches | None = None,
+    ) -> None:
+        if capacity & (capacity - 1):
+            raise ValueError("capacity must be a power of two")
+        self.capacity = capacity
+        self.window_minutes = window_minutes
+        self.dropped = 0
+        self._mask = capacity - 1
+        self._ring_codes: list[str | None] = [None] * capacity
+        self._ring_times = array("d", bytes(8 * capacity))
+        self._ring_clients: list[str] = [""] * capacity
+        self.sketches = sketches
+        self._head = 0  # events written
+        self._tail = 0  # events drained
+
+        # Aggregates, indexed by link number
+        self._link_index: dict[str, int] = {}
+        self._link_codes: list[str] = []
+        self._totals = array("Q")
+        self._last_click = array("d")
+        # Per link: clicks per minute slot, and which absolute minute each slot holds
+        self._minute_counts: dict[int, array] = {}
+        self._minute_stamps: dict[int, array] = {}
+        # Codes of deleted links, queued from any thread and forgotten by drain
+        self._evicted: deque[str] = deque()
+
+    def record(self, short_code: str, client: str = "") -> None:
+        """Buffer one click. Called on every redirect, so keep it minimal."""
+        head = self._head
+        if head - self._tail > self._mask:
+            self.dropped += 1
+            return
+        slot = head & self._mask
+        self._ring_codes[slot] = short_code
+        self._ring_times[slot] = time.time()
+        self._ring_clients[slot] = client
+        self._head = head + 1
+
+    @property
+    def pending(self) -> int:
+        return self._head - self._tail
+
+    def _link(self, short_code: str) -> int:
+        index = self._link_index.get(short_code)
+        if index is None:
+            index = self._link_index[short_code] = len(self._link_codes)
+            self._link_codes.append(short_code)
+            self._totals.append(0)
+            self._last_click.append(0.0)
+        return index
+
+    def drain(self) -> int:
+        """Fold every buffered event into the aggregates; returns how many were applied."""
+        head, tail = self._head, self._tail
+        window = self.window_minutes
+        for i in range(tail, head):
+            slot = i & self._mask
+            short_code = self._ring_codes[slot]
+            clicked_at = self._ring_times[slot]
+            self._ring_codes[slot] = None
+            if self.sketches is not None:
+                self.sketches.add(short_code, self._ring_clients[slot])
+            index = self._link(short_code)
+            self._totals[index] += 1
+            self._last_click[index] = max(self._last_click[index], clicked_at)
+
+            minute = int(clicked_at // 60)
+            counts = self._minute_counts.get(index)
+            if counts is None:
+                counts = self._minute_counts[index] = array("I", bytes(4 * window))
+                self._minute_stamps[index] = array("q", [-1]) * window
+            stamps = self._minute_stamps[index]
+            bucket = minute % window
+            if stamps[bucket] != minute:
+                stamps[bucket] = minute
+                counts[bucket] = 0
+            counts[bucket] += 1
+        self._tail = head
+        while self._evicted:
+            self._forget(self._evicted.popleft())
+        return head - tail
+
+    def evict(self, short_code: str) -> None:
+        """Drop a deleted link's aggregates; applied by the next drain."""
+        self._evicted.append(short_code)
+
+    def _forget(self, short_code: str) -> None:
+        index = self._link_index.pop(short_code, None)
+        if index is None:
+            return
+        if self.sketches is not None:
+            self.sketches.forget(short_code, self._totals[index])
+        self._minute_counts.pop(index, None)
+        self._minute_stamps.pop(index, None)
+        # Move the last link into the freed number so the arrays stay dense
+        last = len(self._link_codes) - 1
+        if index != last:
+            moved = self._link_codes[index] = self._link_codes[last]
+            self._link_index[moved] = index
+            self._totals[index] = self._totals[last]
+            self._last_click[index] = self._last_click[last]
+            if last in self._minute_counts:
+                self._minute_counts[index] = self._minute_counts.pop(last)
+                self._minute_stamps[index] = self._minute_stamps.pop(last)
+        self._link_codes.pop()
+        self._totals.pop()
+        self._last_click.pop()
+
+    async def run(self, interval: float = 0.5) -> None:
+        """Background task: drain the buffer every `interval` seconds until cancelled."""
+        while True:
+            self.drain()
+            await asyncio.sleep(interval)
+
+    def total_clicks(self, short_code: str) -> int:
+        index = self._link_index.get(short_code)
+        return 0 if index is None else self._totals[index]
+
+    def last_click(self, short_code: str) -> float | None:
+        index = self._link_index.get(short_code)
+        return None if index is None else self._last_click[index]
+
+    def clicks_per_minute(self, short_code: str, now: float | None = None) -> list[tuple[int, int]]:
+        """(minute start as epoch seconds, clicks) for the rolling window, oldest first."""
+        index = self._link_index.get(short_code)
+        if index is None or index not in self._minute_counts:
+            return []
+        current = int((time.time() if now is None else now) // 60)
+        counts = self._minute_counts[index]
+        stamps = self._minute_stamps[index]
+        buckets = []
+        for minute in range(current - self.window_minutes + 1, current + 1):
+            bucket = minute % self.window_minutes
+            if stamps[bucket] == minute and counts[bucket]:
+                buckets.append((minute * 60, counts[bucket]))
+        return buckets
+
+    def top(self, n: int) -> list[tuple[str, int]]:
+        """The n most clicked links as (code, clicks)."""
+        totals = self._totals
+        best = heapq.nlargest(n, range(len(totals)), key=totals.__getitem__)
+        return [(self._link_codes[i], totals[i]) for i in best]
+
+
+# Global instance
+click_analytics = ClickAnalytics(sketches=TrafficSketches())
@@ -0,0 +1,185 @@
+"""Compact in-memory store for very large link counts."""
+
+from array import array
+from collections.abc import Iterator
+
+from .allocator import ALPHABET, BASE
+
+# Packed code: base62 value << 4 | length, so codes up to 10 characters fit in 64 bits
+MAX_CODE_LENGTH = 10
+EMPTY = -1
+DELETED = -2
+GOLDEN = 0x9E3779B97F4A7C15
+MASK64 = (1 << 64) - 1
+# URL bytes live in fixed-size chunks that are never resized, so memoryviews handed out
+# by get_bytes stay valid while the store keeps growing
+ARENA_CHUNK = 1 << 20
+_DIGITS = {char: value for value, char in enumerate(ALPHABET)}
+
+
+def pack_code(short_code: str) -> int:
+    """Pack a base62 short code into one unsigned 64-bit integer."""
+    if not 0 < len(short_code) <= MAX_CODE_LENGTH:
+        raise ValueError(f"Short codes must be 1-{MAX_CODE_LENGTH} characters: {short_code!r}")
+    value = 0
+    for char in short_code:
+        digit = _DIGITS.get(char)
+        if digit is None:
+            raise ValueError(f"Short codes must be base62: {short_code!r}")
+        value = value * BASE + digit
+    return (value << 4) | len(short_code)
+
+
+def unpack_code(packed: int) -> str:
+    value, length = packed >> 4, packed & 0xF
+    chars = []
+    for _ in range(length):
+        value, digit = divmod(value, BASE)
+        chars.append(ALPHABET[digit])
+    return "".join(reversed(chars))
+
+
+class ArenaStore:
+    """Store that keeps links in a handful of flat arrays instead of Python objects.
+
+    - ``_codes``: packed short code per entry (8 bytes, 0 once deleted)
+    - ``_starts`` / ``_lengths``: where each entry's URL sits in the arena (8 + 4 bytes)
+    - ``_chunks``: the arena, every URL's UTF-8 bytes back to back in 1 MiB chunks
+    - ``_slots``: open-addressing hash table (linear probing) of entry numbers
+
+    That is roughly 35-45 bytes per link plus the URL text, versus well over 100 bytes of
+    object overhead for a dict of str. Deleted entries leave their bytes in the arena
+    until the store is rebuilt.
+    """
+
+    # The codes pack_code accepts, for importers bringing codes from elsewhere
+    code_pattern = rf"[0-9A-Za-z]{{1,{MAX_CODE_LENGTH}}}"
+    code_rule = f"Short code must be 1-{MAX_CODE_LENGTH} letters or digits"
+
+    def __init__(self, capacity: int = 1024, max_load: float = 0.7) -> None:
+        self._max_load = max_load
+        self._codes = array("Q")
+        self._starts = array("Q")
+        self._lengths = array("I")
+        self._chunks: list[bytearray] = []
+        self._chunk_used = ARENA_CHUNK
+        self._live = 0
+        self._used_slots = 0
+        self._resize(capacity)
+
+    def _resize(self, capacity: int) -> None:
+        """Rebuild the hash table sized for `capacity` live entries, dropping tombstones."""
+        size = 8
+        while size * self._max_load < capacity:
+            size <<= 1
+        self._slots = array("q", [EMPTY]) * size
+        self._mask = size - 1
+        self._shift = 64 - (size.bit_length() - 1)
+        self._used_slots = 0
+        for entry, packed in enumerate(self._codes):
+            if packed:
+                self._slots[self._free_slot(packed)] = entry
+                self._used_slots += 1
+
+    def _home(self, packed: int) -> int:
+        # Fibonacci hashing: take the top bits of the product
+        return ((packed * GOLDEN) & MASK64) >> self._shift
+
+    def _find(self, packed: int) -> int:
+        """Slot holding `packed`, or -1."""
+        slot = self._home(packed)
+        slots = self._slots
+        while True:
+            entry = slots[slot]
+            if entry == EMPTY:
+                return -1
+            if entry >= 0 and self._codes[entry] == packed:
+                return slot
+            slot = (slot + 1) & self._mask
+
+    def _free_slot(self, packed: int) -> int:
+        slot = self._home(packed)
+        while self._slots[slot] >= 0:
+            slot = (slot + 1) & self._mask
+        return slot
+
+    def get_bytes(self, short_code: str) -> memoryview | None:
+        """Zero-copy view of the stored URL bytes."""
+        try:
+            slot = self._find(pack_code(short_code))
+        except ValueError:
+            return None
+        if slot < 0:
+            return None
+        return self._view(self._slots[slot])
+
+    def _view(self, entry: int) -> memoryview:
+        chunk, start = divmod(self._starts[entry], ARENA_CHUNK)
+        return memoryview(self._chunks[chunk])[start : start + self._lengths[entry]]
+
+    def _append_bytes(self, data: bytes) -> int:
+        if len(data) > ARENA_CHUNK:
+            raise ValueError(f"URLs longer than {ARENA_CHUNK} bytes are not supported")
+        if self._chunk_used + len(data) > ARENA_CHUNK:
+            self._chunks.append(bytearray(ARENA_CHUNK))
+            self._chunk_used = 0
+        start = self._chunk_used
+        self._chunks[-1][start : start + len(data)] = data
+        self._chunk_used += len(data)
+        return (len(self._chunks) - 1) * ARENA_CHUNK + start
+
+    def get(self, short_code: str) -> str | None:
+        view = self.get_bytes(short_code)
+        return None if view is None else str(view, "utf-8")
+
+    def put(self, short_code: str, original_url: str) -> None:
+        packed = pack_code(short_code)
+        data = original_url.encode()
+        start = self._append_bytes(data)
+        slot = self._find(packed)
+        if slot >= 0:
+            self._codes[self._slots[slot]] = 0
+            self._slots[slot] = DELETED
+            self._live -= 1
+        entry = len(self._codes)
+        self._codes.append(packed)
+        self._starts.append(start)
+        self._lengths.append(len(data))
+        self._live += 1
+        if (self._used_slots + 1) > len(self._slots) * self._max_load:
+            self._resize(self._live * 2)
+        else:
+            self._slots[self._free_slot(packed)] = entry
+            self._used_slots += 1
+
+    def delete(self, short_code: str) -> bool:
+        try:
+            slot = self._find(pack_code(short_code))
+        except ValueError:
+            return False
+        if slot < 0:
+            return False
+        self._codes[self._slots[slot]] = 0
+        self._slots[slot] = DELETED
+        self._live -= 1
+        return True
+
+    def __contains__(self, short_code: object) -> bool:
+        if not isinstance(short_code, str):
+            return False
+        try:
+            return self._find(pack_code(short_code)) >= 0
+        except ValueError:
+            return False
+
+    def __len__(self) -> int:
+        return self._live
+
+    def items(self) -> Iterator[tuple[str, str]]:
+        for entry in range(len(self._codes)):
+            packed = self._codes[entry]
+            if packed:
+                yield unpack_code(packed), str(self._view(entry), "utf-8")
+
+    def close(self) -> None:
+        pass
@@ -0,0 +1,302 @@
+"""Streaming bulk import and export of existing (code, url) mappings as CSV or NDJSON.
+
+Imports keep the given codes. Input is processed in chunks of about ``CHUNK_BYTES``, so
+memory use does not grow with the size of the file. A chunk in the shape the export
+writes (``code,url`` CSV lines or ``{"code":...,"url":...}`` NDJSON objects) is parsed and
+validated by a single regex scan over the whole chunk; only chunks with anything unusual
+in them (quoting, escapes, other columns, bad rows) go through the row-by-row parser,
+which can say what is wrong with each row.
+
+Run from the backend directory against the store configured by the environment (e.g.
+``URL_SHORTENER_DATA_DIR``), with the server stopped::
+
+    python -m src.services.bulk import links.csv
+    python -m src.services.bulk export links.ndjson
+"""
+
+import argparse
+import csv
+import io
+import json
+import re
+import sys
+import time
+from collections.abc import Iterable, Iterator
+from functools import cache
+from itertools import islice
+
+from pydantic import HttpUrl, TypeAdapter, ValidationError
+
+from .url_service import URLService
+
+CHUNK_BYTES = 1 << 20
+# Rows per chunk of export output
+EXPORT_CHUNK_ROWS = 10_000
+
+# Codes accepted unless the store narrows them (see URLService.code_rule)
+CODE_PATTERN = r"[0-9A-Za-z_-]{1,32}"
+CODE_RULE = "Short code must be 1-32 letters, digits, '-' or '_'"
+# Rows outside the whole-chunk scans are checked like the batch endpoint checks URLs
+URL_PATTERN = r"https?://[^\x00-\x20\x7f]+"
+URL_RULE = "URL must be an absolute http(s) URL without whitespace or control characters"
+_URL = re.compile(URL_PATTERN)
+_http_url = TypeAdapter(HttpUrl)
+# The scans only take plain hostnames with an in-range port, a subset of what HttpUrl
+# accepts; anything else goes through _http_url row by row
+_AUTHORITY = (
+    r"[A-Za-z0-9.-]+"
+    r"(?::(?:[0-9]{1,4}|[1-5][0-9]{4}|6[0-4][0-9]{3}|65[0-4][0-9]{2}|655[0-2][0-9]|6553[0-5]))?"
+)
+CODE_COLUMNS = ("code", "short_code")
+URL_COLUMNS = ("url", "original_url")
+
+
+@cache
+def _patterns(code_pattern: str) -> tuple[re.Pattern, re.Pattern, re.Pattern]:
+    """The code regex plus whole-chunk scans for the export's own formats.
+
+    URLs that CSV would quote or JSON would escape do not match the scans and send the
+    chunk down the row-by-row path.
+    """
+    csv_rows = re.compile(
+        rf'^({code_pattern}),(https?://{_AUTHORITY}(?:[/?#][^\x00-\x20\x7f,"]*)?)\r?$', re.M
+    )
+    ndjson_rows = re.compile(
+        rf'^\{{"code": ?"({code_pattern})", ?"url": ?'
+        rf'"(https?://{_AUTHORITY}(?:[/?#][^\x00-\x20\x7f"\\]*)?)"\}}\r?$',
+        re.M,
+    )
+    return re.compile(code_pattern), csv_rows, ndjson_rows
+
+
+class BulkImporter:
+    """Feeds CSV or NDJSON bytes into ``URLService.import_links`` chunk by chunk.
+
+    ``feed`` and ``finish`` return the problems found so far, one dict per row: an
+    ``error`` for rows that are not valid, a ``conflict`` (the URL the code already points
+    at) for codes taken by a different link. Counts are kept in ``summary()``.
+    """
+
+    def __init__(self, service: URLService, fmt: str = "csv") -> None:
+        if fmt not in ("csv", "ndjson"):
+            raise ValueError(f"Unknown format {fmt!r}")
+        self.service = service
+        self.fmt = fmt
+        self.code_rule = service.code_rule or (CODE_PATTERN, CODE_RULE)
+        self._code, self._csv_rows, ndjson_rows = _patterns(self.code_rule[0])
+        self.imported = 0
+        self.unchanged = 0
+        self.conflicts = 0
+        self.errors = 0
+        self._header: list[str] | None = None
+        self._fast = ndjson_rows if fmt == "ndjson" else None
+        self._pending = bytearray()
+        self._line = 0
+
+    def summary(self) -> dict[str, int]:
+        return {
+            "imported": self.imported,
+            "unchanged": self.unchanged,
+            "conflicts": self.conflicts,
+            "errors": self.errors,
+        }
+
+    def feed(self, data: bytes) -> list[dict]:
+        self._pending += data
+        if len(self._pending) < CHUNK_BYTES:
+            return []
+        end = self._pending.rfind(b"\n") + 1
+        if not end:
+            return []
+        chunk = bytes(self._pending[:end])
+        del self._pending[:end]
+        return self._import_chunk(chunk)
+
+    def finish(self) -> list[dict]:
+        chunk = bytes(self._pending)
+        self._pending.clear()
+        if chunk and not chunk.endswith(b"\n"):
+            chunk += b"\n"
+        return self._import_chunk(chunk) if chunk else []
+
+    def _import_chunk(self, chunk: bytes) -> list[dict]:
+        first = self._line + 1
+        if self.fmt == "csv" and self._header is None:
+            chunk = self._read_header(chunk)
+            first = self._line + 1
+        lines = chunk.count(b"\n")
+        self._line += lines
+        if self._fast is not None:
+            try:
+                rows = self._fast.findall(chunk.decode())
+            except UnicodeDecodeError:
+                rows = []
+            if len(rows) == lines:
+                incoming = dict(rows)
+                if len(incoming) == lines:
+                    taken = self._store(incoming)
+                    if not taken:
+                        return []
+                    line_numbers = {
+                        code: first + i for i, (code, _) in enumerate(rows) if code in taken
+                    }
+                    return self._report(incoming, taken, line_numbers, [])
+        return self._import_rows(chunk.split(b"\n")[:-1], first)
+
+    def _read_header(self, chunk: bytes) -> bytes:
+        while chunk:
+            line, _, chunk = chunk.partition(b"\n")
+            self._line += 1
+            if line.strip():
+                cells = next(csv.reader([line.decode(errors="replace")]))
+                self._header = [cell.strip().lower() for cell in cells]
+                if self._header == ["code", "url"]:
+                    self._fast = self._csv_rows
+                break
+        return chunk
+
+    def _import_rows(self, lines: list[bytes], first: int) -> list[dict]:
+        incoming: dict[str, str] = {}
+        line_numbers: dict[str, int] = {}
+        repeats: list[tuple[int, str, str]] = []
+        problems: list[dict] = []
+        for number, raw in enumerate(lines, first):
+            if not raw.strip():
+                continue
+            short_code, original_url, error = self._parse(raw)
+            if error is not None:
+                problems.append({"line": number, "code": short_code, "error": error})
+                self.errors += 1
+            elif short_code in incoming:
+                repeats.append((number, short_code, original_url))
+            else:
+                incoming[short_code] = original_url
+                line_numbers[short_code] = number
+        taken = self._store(incoming)
+        # A code repeated within the chunk is judged against whatever the first occurrence
+        # resolved to, exactly as if it had come in a later chunk
+        for number, short_code, original_url in repeats:
+            current = taken.get(short_code, incoming[short_code])
+            if original_url == current:
+                self.unchanged += 1
+            else:
+                problems.append({"line": number, "code": short_code, "conflict": current})
+                self.conflicts += 1
+        return self._report(incoming, taken, line_numbers, problems)
+
+    def _parse(self, raw: bytes) -> tuple[str | None, str | None, str | None]:
+        """(code, url, None) for a valid row, else (code if known, None, error)."""
+        try:
+            line = raw.rstrip(b"\r").decode()
+        except UnicodeDecodeError:
+            return None, None, "Invalid UTF-8"
+        if self.fmt == "csv":
+            row: object = dict(zip(self._header or [], next(csv.reader([line]))))
+        else:
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as exc:
+                return None, None, f"Invalid JSON: {exc.msg}"
+            if not isinstance(row, dict):
+                return None, None, f"Expected an object, got {row!r}"
+        short_code = next((row[key] for key in CODE_COLUMNS if key in row), None)
+        original_url = next((row[key] for key in URL_COLUMNS if key in row), None)
+        if not isinstance(short_code, str) or not self._code.fullmatch(short_code):
+            code = short_code if isinstance(short_code, str) else None
+            return code, None, self.code_rule[1]
+        if not isinstance(original_url, str) or not _URL.fullmatch(original_url):
+            return short_code, None, URL_RULE
+        try:
+            _http_url.validate_python(original_url)
+        except ValidationError as exc:
+            return short_code, None, f"Invalid URL: {exc.errors()[0]['msg']}"
+        return short_code, original_url, None
+
+    def _store(self, incoming: dict[str, str]) -> dict[str, str]:
+        taken = self.service.import_links(incoming)
+        self.imported += len(incoming) - len(taken)
+        return taken
+
+    def _report(
+        self,
+        incoming: dict[str, str],
+        taken: dict[str, str],
+        line_numbers: dict[str, int],
+        problems: list[dict],
+    ) -> list[dict]:
+        for short_code, existing in taken.items():
+            if existing == incoming[short_code]:
+                self.unchanged += 1
+                continue
+            self.conflicts += 1
+            problems.append(
+                {"line": line_numbers[short_code], "code": short_code, "conflict": existing}
+            )
+        problems.sort(key=lambda problem: problem["line"])
+        return problems
+
+
+def export_chunks(rows: Iterable[tuple[str, str]], fmt: str = "csv") -> Iterator[bytes]:
+    """Serialize (code, url) rows in chunks, in a format BulkImporter reads back."""
+    rows = iter(rows)
+    if fmt == "csv":
+        yield b"code,url\n"
+    while True:
+        chunk = list(islice(rows, EXPORT_CHUNK_ROWS))
+        if not chunk:
+            return
+        if fmt == "csv":
+            out = io.StringIO()
+            csv.writer(out, lineterminator="\n").writerows(chunk)
+            yield out.getvalue().encode()
+        else:
+            dumps = json.dumps
+            yield "".join(
+                f'{{"code":{dumps(code)},"url":{dumps(url)}}}\n' for code, url in chunk
+            ).encode()
+
+
+def _format(path: str, requested: str | None) -> str:
+    if requested:
+        return requested
+    return "ndjson" if path.endswith((".ndjson", ".jsonl")) else "csv"
+
+
+def main() -> None:
+    from .url_service import url_service
+
+    parser = argparse.ArgumentParser(description="Bulk import or export short links.")
+    parser.add_argument("command", choices=["import", "export"])
+    parser.add_argument("path", help="file to read or write, '-' for stdin/stdout")
+    parser.add_argument("--format", choices=["csv", "ndjson"])
+    args = parser.parse_args()
+    fmt = _format(args.path, args.format)
+
+    if args.command == "export":
+        out = sys.stdout.buffer if args.path == "-" else open(args.path, "wb")
+        with out:
+            for chunk in export_chunks(url_service.iter_urls(), fmt):
+                out.write(chunk)
+        url_service.close()
+        return
+
+    if not hasattr(url_service, "import_links"):
+        parser.error("bulk import is not supported with shards")
+    importer = BulkImporter(url_service, fmt)
+    started = time.perf_counter()
+    source = sys.stdin.buffer if args.path == "-" else open(args.path, "rb")
+    with source, url_service.bulk_load():
+        while block := source.read(CHUNK_BYTES):
+            for problem in importer.feed(block):
+                print(json.dumps(problem), file=sys.stderr)
+        for problem in importer.finish():
+            print(json.dumps(problem), file=sys.stderr)
+    url_service.close()
+    summary = importer.summary()
+    rows = sum(summary.values())
+    elapsed = time.perf_counter() - started
+    print(json.dumps({**summary, "rows_per_second": round(rows / max(elapsed, 1e-9))}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""Bounded in-process caches for hot short codes."""
+
+from collections import OrderedDict
+
+from .sketches import CountMinSketch
+
+
+class LRUCache:
+    """Plain least-recently-used cache; the baseline TinyLFUCache is measured against."""
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[str, str] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def get(self, key: str) -> str | None:
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: str, value: str) -> None:
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+
+class TinyLFUCache:
+    """W-TinyLFU cache (Einziger et al., as in Caffeine).
+
+    New entries land in a small LRU window (1% of ``capacity``). Entries leaving the window
+    compete with the main area's eviction victim and are only admitted if a Count-Min
+    sketch says they have been requested more often, so a burst of one-off lookups (a
+    scan, scanner traffic) cannot flush the hot set. The main area is a segmented LRU:
+    hits in probation move to the protected segment (80% of the main area). The sketch
+    is halved every ``10 * capacity`` requests so old popularity fades.
+    """
+
+    def __init__(
+        self, capacity: int, window_fraction: float = 0.01, protected_fraction: float = 0.8
+    ) -> None:
+        if capacity < 2:
+            raise ValueError("capacity must be at least 2")
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._window_capacity = max(1, int(capacity * window_fraction))
+        self._main_capacity = capacity - self._window_capacity
+        self._protected_capacity = max(1, int(self._main_capacity * protected_fraction))
+        self._window: OrderedDict[str, str] = OrderedDict()
+        self._probation: OrderedDict[str, str] = OrderedDict()
+        self._protected: OrderedDict[str, str] = OrderedDict()
+        width = 64
+        while width < capacity:
+            width <<= 1
+        self._sketch = CountMinSketch(width=width, depth=4)
+        self._sample_size = 10 * capacity
+        self._requests = 0
+
+    def __len__(self) -> int:
+        return len(self._window) + len(self._probation) + len(self._protected)
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def _record(self, key: str) -> None:
+        self._sketch.add(key)
+        self._requests += 1
+        if self._requests >= self._sample_size:
+            self._sketch.halve()
+            self._requests //= 2
+
+    def get(self, key: str) -> str | None:
+        self._record(key)
+        if key in self._window:
+            self._window.move_to_end(key)
+            value = self._window[key]
+        elif key in self._protected:
+            self._protected.move_to_end(key)
+            value = self._protected[key]
+        elif key in self._probation:
+            value = self._probation.pop(key)
+            self._protected[key] = value
+            if len(self._protected) > self._protected_capacity:
+                demoted, demoted_value = self._protected.popitem(last=False)
+                self._probation[demoted] = demoted_value
+        else:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value
+
+    def put(self, key: str, value: str) -> None:
+        for segment in (self._window, self._protected, self._probation):
+            if key in segment:
+                segment[key] = value
+                return
+        self._window[key] = value
+        if len(self._window) > self._window_capacity:
+            self._admit(*self._window.popitem(last=False))
+
+    def _admit(self, candidate: str, value: str) -> None:
+        if len(self._probation) + len(self._protected) < self._main_capacity:
+            self._probation[candidate] = value
+            return
+        victims = self._probation or self._protected
+        victim = next(iter(victims))
+        self.evictions += 1
+        if self._sketch.estimate(candidate) > self._sketch.estimate(victim):
+            del victims[victim]
+            self._probation[candidate] = value
+
+    def invalidate(self, key: str) -> None:
+        for segment in (self._window, self._probation, self._protected):
+            if segment.pop(key, None) is not None:
+                return
@@ -0,0 +1,76 @@
+"""Reverse index from original URL to short code, for opt-in deduplication."""
+
+import hashlib
+from collections.abc import Callable
+from urllib.parse import urlsplit, urlunsplit
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form used to decide whether two URLs are the same link.
+
+    Lowercases scheme and host, drops default ports and the fragment, and turns an empty
+    path into "/". Query strings are kept as-is since their order can matter.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port is not None and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    if parts.username or parts.password:
+        host = f"{parts.netloc.rsplit('@', 1)[0]}@{host}"
+    return urlunsplit((scheme, host, parts.path or "/", parts.query, ""))
+
+
+def url_fingerprint(normalized_url: str) -> int:
+    """64-bit hash of a normalized URL."""
+    digest = hashlib.blake2b(normalized_url.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+class ReverseIndex:
+    """Maps URL fingerprints to short codes.
+
+    Only the 64-bit fingerprint is kept as the key, and the value is the code string the
+    store already holds, so an entry costs a small int plus a dict slot rather than a
+    second copy of the URL. A fingerprint hit is confirmed against the stored URL; the rare
+    real collision falls back to an overflow dict keyed by the full normalized URL.
+    """
+
+    def __init__(self, lookup_url: Callable[[str], str | None]) -> None:
+        self._lookup_url = lookup_url
+        self._by_fingerprint: dict[int, str] = {}
+        self._overflow: dict[str, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._by_fingerprint) + len(self._overflow)
+
+    def _matches(self, short_code: str, normalized_url: str) -> bool:
+        stored = self._lookup_url(short_code)
+        return stored is not None and normalize_url(stored) == normalized_url
+
+    def get(self, original_url: str) -> str | None:
+        """Return the existing code for this URL, if any."""
+        normalized = normalize_url(original_url)
+        short_code = self._by_fingerprint.get(url_fingerprint(normalized))
+        if short_code is not None and self._matches(short_code, normalized):
+            return short_code
+        return self._overflow.get(normalized)
+
+    def add(self, original_url: str, short_code: str) -> None:
+        normalized = normalize_url(original_url)
+        fingerprint = url_fingerprint(normalized)
+        existing = self._by_fingerprint.get(fingerprint)
+        if existing is None:
+            self._by_fingerprint[fingerprint] = short_code
+        elif not self._matches(existing, normalized):
+            self._overflow[normalized] = short_code
+
+    def discard(self, original_url: str, short_code: str) -> None:
+        normalized = normalize_url(original_url)
+        fingerprint = url_fingerprint(normalized)
+        if self._by_fingerprint.get(fingerprint) == short_code:
+            del self._by_fingerprint[fingerprint]
+        elif self._overflow.get(normalized) == short_code:
+            del self._overflow[normalized]
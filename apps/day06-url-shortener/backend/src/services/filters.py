@@ -0,0 +1,134 @@
+"""Approximate membership filter over the live short codes."""
+
+import random
+from array import array
+from collections.abc import Iterable
+
+BUCKET_SIZE = 4
+MAX_KICKS = 500
+HASH_MASK = (1 << 64) - 1
+
+
+class CuckooFilter:
+    """Cuckoo filter (Fan et al.) with 16-bit fingerprints and four slots per bucket.
+
+    ``might_contain`` never returns False for an added key; it returns True for an absent
+    key with probability about ``2 * BUCKET_SIZE / 2**16 * load`` (0.012% when full).
+    Unlike a Bloom filter it supports ``remove``, as long as only keys that were added
+    are removed. Memory is two bytes per slot, sized for ``capacity`` keys at 95% load.
+    """
+
+    def __init__(self, capacity: int = 1024) -> None:
+        buckets = 1
+        while buckets * BUCKET_SIZE * 0.95 < capacity:
+            buckets <<= 1
+        self.capacity = int(buckets * BUCKET_SIZE * 0.95)
+        self._mask = buckets - 1
+        self._slots = array("H", bytes(2 * buckets * BUCKET_SIZE))
+        self._count = 0
+        # Fingerprint evicted by a failed insert, kept so nothing is ever forgotten
+        self._victim: tuple[int, int] | None = None
+        self._random = random.Random(0)
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def memory_bytes(self) -> int:
+        return self._slots.itemsize * len(self._slots)
+
+    @property
+    def expected_false_positive_rate(self) -> float:
+        load = self._count / ((self._mask + 1) * BUCKET_SIZE)
+        return 2 * BUCKET_SIZE * load / (1 << 16)
+
+    def _locate(self, key: str) -> tuple[int, int, int]:
+        # The filter never leaves the process, so the built-in (per-process salted) string
+        # hash will do; strings cache it, which makes it far cheaper than a keyed digest
+        h = hash(key) & HASH_MASK
+        fingerprint = (h >> 48) or 1  # 0 marks an empty slot
+        first = h & self._mask
+        return fingerprint, first, self._alternate(first, fingerprint)
+
+    def _alternate(self, bucket: int, fingerprint: int) -> int:
+        return (bucket ^ (fingerprint * 0x5BD1E995)) & self._mask
+
+    def might_contain(self, key: str) -> bool:
+        fingerprint, first, second = self._locate(key)
+        slots = self._slots
+        for bucket in (first, second):
+            base = bucket * BUCKET_SIZE
+            if fingerprint in slots[base : base + BUCKET_SIZE]:
+                return True
+        victim = self._victim
+        return victim is not None and victim[1] == fingerprint and victim[0] in (first, second)
+
+    def add(self, key: str) -> bool:
+        """Insert `key`; False means the filter is full and should be rebuilt larger."""
+        if self._victim is not None:
+            return False
+        fingerprint, first, second = self._locate(key)
+        self._count += 1
+        if self._place(first, fingerprint) or self._place(second, fingerprint):
+            return True
+        bucket = self._random.choice((first, second))
+        for _ in range(MAX_KICKS):
+            base = bucket * BUCKET_SIZE + self._random.randrange(BUCKET_SIZE)
+            fingerprint, self._slots[base] = self._slots[base], fingerprint
+            bucket = self._alternate(bucket, fingerprint)
+            if self._place(bucket, fingerprint):
+                return True
+        self._victim = (bucket, fingerprint)
+        return True
+
+    def add_many(self, keys: Iterable[str]) -> bool:
+        """Insert every key, as ``add`` would; inlines the common case of a free slot."""
+        slots = self._slots
+        mask = self._mask
+        for key in keys:
+            if self._victim is not None:
+                return False
+            h = hash(key) & HASH_MASK
+            fingerprint = (h >> 48) or 1
+            bucket = h & mask
+            base = bucket * BUCKET_SIZE
+            window = slots[base : base + BUCKET_SIZE]
+            if 0 not in window:
+                base = self._alternate(bucket, fingerprint) * BUCKET_SIZE
+                window = slots[base : base + BUCKET_SIZE]
+                if 0 not in window:
+                    self.add(key)
+                    continue
+            slots[base + window.index(0)] = fingerprint
+            self._count += 1
+        return self._victim is None
+
+    def _place(self, bucket: int, fingerprint: int) -> bool:
+        base = bucket * BUCKET_SIZE
+        for slot in range(base, base + BUCKET_SIZE):
+            if not self._slots[slot]:
+                self._slots[slot] = fingerprint
+                return True
+        return False
+
+    def remove(self, key: str) -> bool:
+        fingerprint, first, second = self._locate(key)
+        victim = self._victim
+        if victim is not None and victim[1] == fingerprint and victim[0] in (first, second):
+            self._victim = None
+            self._count -= 1
+            return True
+        for bucket in (first, second):
+            base = bucket * BUCKET_SIZE
+            for slot in range(base, base + BUCKET_SIZE):
+                if self._slots[slot] == fingerprint:
+                    self._slots[slot] = 0
+                    self._count -= 1
+                    if victim is not None:
+                        # A slot just freed up; try to settle the stashed fingerprint
+                        bucket, stashed = victim
+                        alternate = self._alternate(bucket, stashed)
+                        if self._place(bucket, stashed) or self._place(alternate, stashed):
+                            self._victim = None
+                    return True
+        return False
@@ -0,0 +1,211 @@
+"""Request latency histograms and service gauges, exposed in Prometheus text format."""
+
+import os
+import time
+from array import array
+from typing import Protocol
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from .allocator import CodeAllocator
+
+# Set URL_SHORTENER_METRICS=0 to serve requests without the instrumentation middleware
+METRICS_ENABLED = os.environ.get("URL_SHORTENER_METRICS", "1") != "0"
+
+# Log-linear buckets: values below 2**SUB_BITS microseconds are exact, larger ones fall in
+# one of 2**(SUB_BITS - 1) buckets per power of two, so a bucket is at most 1/16 = 6.25%
+# of its value wide. Latencies are capped at 2**MAX_BITS microseconds (about 19 hours).
+SUB_BITS = 5
+HALF = 1 << (SUB_BITS - 1)
+MAX_BITS = 36
+MAX_MICROS = (1 << MAX_BITS) - 1
+BUCKETS = (MAX_BITS - SUB_BITS + 1) * HALF + HALF
+# Cumulative `le` buckets in the exposition (seconds) and the quantiles reported alongside
+EXPOSED_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+    2.5, 5.0, 10.0,
+)  # fmt: skip
+EXPOSED_QUANTILES = (0.5, 0.99, 0.999)
+UNMATCHED_ROUTE = "unmatched"
+
+
+def bucket_index(micros: int) -> int:
+    if micros < 2 * HALF:
+        return micros
+    shift = micros.bit_length() - SUB_BITS
+    return shift * HALF + (micros >> shift)
+
+
+def bucket_upper(index: int) -> int:
+    """Largest value (microseconds) that lands in bucket `index`."""
+    if index < 2 * HALF:
+        return index
+    shift = index // HALF - 1
+    return ((index - shift * HALF + 1) << shift) - 1
+
+
+class LatencyHistogram:
+    """HDR-style histogram of latencies in microseconds.
+
+    ``record`` touches one slot of a preallocated counter array and two totals; nothing is
+    allocated per call. Quantiles are reported as the upper bound of their bucket, so they
+    overstate the true value by at most 6.25%.
+    """
+
+    def __init__(self) -> None:
+        self._counts = array("Q", bytes(8 * BUCKETS))
+        self.count = 0
+        self.total_micros = 0
+
+    def record(self, micros: int) -> None:
+        # bucket_index, inlined: this runs on every request
+        if micros < 2 * HALF:
+            index = micros
+        else:
+            if micros > MAX_MICROS:
+                micros = MAX_MICROS
+            shift = micros.bit_length() - SUB_BITS
+            index = shift * HALF + (micros >> shift)
+        self._counts[index] += 1
+        self.count += 1
+        self.total_micros += micros
+
+    def quantile(self, q: float) -> int:
+        """Latency (microseconds) at or below which a `q` share of the recorded values fall."""
+        if not self.count:
+            return 0
+        rank = max(1, round(q * self.count))
+        seen = 0
+        for index, count in enumerate(self._counts):
+            seen += count
+            if seen >= rank:
+                return bucket_upper(index)
+        return MAX_MICROS
+
+    def cumulative(self, bounds_micros: list[int]) -> list[int]:
+        """How many values are known to be at or below each bound (sorted ascending)."""
+        counts = self._counts
+        result = []
+        seen = 0
+        index = 0
+        for bound in bounds_micros:
+            # A bucket straddling the bound is left out, as its values may be above it
+            stop = bucket_index(bound + 1) if bound < MAX_MICROS else BUCKETS
+            seen += sum(counts[index:stop])
+            index = max(index, stop)
+            result.append(seen)
+        return result
+
+
+class MeteredService(Protocol):
+    """What the gauges read from URLService or ShardedURLService."""
+
+    allocator: CodeAllocator
+
+    def __len__(self) -> int: ...
+
+
+class RequestMetrics:
+    """Latency histograms per route template plus request and redirect gauges."""
+
+    def __init__(self) -> None:
+        self.in_flight = 0
+        self.redirect_hits = 0
+        self.redirect_misses = 0
+        self.routes: dict[str, LatencyHistogram] = {}
+
+    def histogram(self, route: str) -> LatencyHistogram:
+        histogram = self.routes.get(route)
+        if histogram is None:
+            histogram = self.routes[route] = LatencyHistogram()
+        return histogram
+
+    def render(self, service: MeteredService | None = None) -> str:
+        """Everything in Prometheus text exposition format (version 0.0.4)."""
+        lines = [
+            "# HELP url_shortener_request_duration_seconds Request latency by route template.",
+            "# TYPE url_shortener_request_duration_seconds histogram",
+        ]
+        bounds = [round(seconds * 1_000_000) for seconds in EXPOSED_BUCKETS]
+        for route, histogram in sorted(self.routes.items()):
+            label = f'route="{route}"'
+            for seconds, count in zip(EXPOSED_BUCKETS, histogram.cumulative(bounds)):
+                lines.append(
+                    f'url_shortener_request_duration_seconds_bucket{{{label},le="{seconds}"}} '
+                    f"{count}"
+                )
+            lines += [
+                f'url_shortener_request_duration_seconds_bucket{{{label},le="+Inf"}} '
+                f"{histogram.count}",
+                f"url_shortener_request_duration_seconds_sum{{{label}}} "
+                f"{histogram.total_micros / 1_000_000}",
+                f"url_shortener_request_duration_seconds_count{{{label}}} {histogram.count}",
+            ]
+        lines += [
+            "# HELP url_shortener_request_duration_quantile_seconds Latency quantiles by route "
+            "(HDR histogram, within 6.25%).",
+            "# TYPE url_shortener_request_duration_quantile_seconds gauge",
+        ]
+        for route, histogram in sorted(self.routes.items()):
+            for q in EXPOSED_QUANTILES:
+                lines.append(
+                    f'url_shortener_request_duration_quantile_seconds{{route="{route}",'
+                    f'quantile="{q}"}} {histogram.quantile(q) / 1_000_000}'
+                )
+        lines += [
+            "# HELP url_shortener_requests_in_flight Requests currently being served.",
+            "# TYPE url_shortener_requests_in_flight gauge",
+            f"url_shortener_requests_in_flight {self.in_flight}",
+            "# HELP url_shortener_redirects_total Redirect lookups by outcome.",
+            "# TYPE url_shortener_redirects_total counter",
+            f'url_shortener_redirects_total{{result="hit"}} {self.redirect_hits}',
+            f'url_shortener_redirects_total{{result="miss"}} {self.redirect_misses}',
+        ]
+        if service is not None:
+            allocator = service.allocator
+            lines += [
+                "# HELP url_shortener_links Links currently stored.",
+                "# TYPE url_shortener_links gauge",
+                f"url_shortener_links {len(service)}",
+                "# HELP url_shortener_code_length Length of the short codes being handed out.",
+                "# TYPE url_shortener_code_length gauge",
+                f"url_shortener_code_length {allocator.current_length}",
+                "# HELP url_shortener_code_space_utilization Share of the codes of the current "
+                "length already handed out.",
+                "# TYPE url_shortener_code_space_utilization gauge",
+                f"url_shortener_code_space_utilization {allocator.utilization}",
+            ]
+        return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """Outermost ASGI layer: times every HTTP request into its route's histogram.
+
+    The route template comes from ``scope["route"]``, which the router (or the redirect
+    fast path) fills in; requests that match no route share one histogram, so the label
+    set stays bounded however many paths are probed.
+    """
+
+    def __init__(self, app: ASGIApp, metrics: RequestMetrics) -> None:
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        metrics = self.metrics
+        metrics.in_flight += 1
+        started = time.perf_counter_ns()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            elapsed = (time.perf_counter_ns() - started) // 1000
+            metrics.in_flight -= 1
+            route = scope.get("route")
+            label = UNMATCHED_ROUTE if route is None else route.path
+            histogram = metrics.routes.get(label) or metrics.histogram(label)
+            histogram.record(elapsed)
+
+
+request_metrics = RequestMetrics()
@@ -0,0 +1,304 @@
+"""Log shipping from a LogStore primary to read-only replicas.
+
+The primary runs a ReplicationServer next to its URLService. Every replica connection is
+a thread that tails ``urls.log`` and streams the raw records, so replicas apply exactly
+the mutations the primary made, in order, and never see a write before it is on the
+primary's disk (the log is only flushed together with its fsync). A replica that is
+unknown, follows a different log, or is more than ``max_lag_bytes`` behind is first sent
+the primary's latest ``urls.idx`` snapshot and then the log written after it. Offsets are
+log offsets, which survive compaction: when the primary replaces ``urls.log`` the thread
+finishes the old file and carries on in the new one, and only a replica still behind
+the records the compaction dropped needs a snapshot.
+
+Replicas (``Replica``) apply the stream into their own in-memory URLService and serve
+redirects from it; see ``src.replica`` for the ASGI app.
+
+Wire format: every message is ``MESSAGE`` (kind, log offset, primary's log end, payload
+length) followed by the payload. The replica answers the primary's ``WELCOME`` with the
+offset it has applied, or -1 to ask for a snapshot.
+"""
+
+import asyncio
+import os
+import socket
+import socketserver
+import struct
+import threading
+import time
+from contextlib import closing, suppress
+from typing import BinaryIO
+
+from .sharding import Address, _recv_exactly, parse_address
+from .storage import OP_PUT, LogStore, _Index, decode_records, encode_record, read_log_header
+from .url_service import URLService
+
+MESSAGE = struct.Struct("<BQQI")
+HELLO = struct.Struct("<q")
+WELCOME = 1
+RECORDS = 2
+SNAPSHOT_BEGIN = 3
+SNAPSHOT_END = 4
+HEARTBEAT = 5
+# Log bytes (or snapshot records) per message
+CHUNK_SIZE = 256 << 10
+
+
+class _LogFile:
+    """One open generation of ``urls.log``, read by log offset."""
+
+    def __init__(self, path: str | os.PathLike) -> None:
+        self.path = path
+        self._file: BinaryIO = open(path, "rb")
+        # The id identifies the log across compactions, so a replica notices when it is
+        # pointed at another primary
+        self.start, self.base, self.log_id = read_log_header(self._file)
+
+    def reopen(self) -> None:
+        self._file.close()
+        self._file = open(self.path, "rb")
+        self.start, self.base, self.log_id = read_log_header(self._file)
+
+    @property
+    def end(self) -> int:
+        return self.base + os.fstat(self._file.fileno()).st_size - self.start
+
+    def read(self, offset: int, size: int) -> bytes:
+        self._file.seek(self.start + offset - self.base)
+        return self._file.read(size)
+
+    def replaced(self) -> bool:
+        """Whether a compaction has swapped a new file in at the path."""
+        try:
+            return os.stat(self.path).st_ino != os.fstat(self._file.fileno()).st_ino
+        except FileNotFoundError:
+            return False
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def _complete(data: bytes) -> int:
+    """Length of the prefix of `data` made of whole records."""
+    good = 0
+    for good, *_ in decode_records(data):
+        pass
+    return good
+
+
+class ReplicationHandler(socketserver.BaseRequestHandler):
+    """Streams the log to one replica until it hangs up or the server stops."""
+
+    server: "ReplicationServer"
+
+    def send(self, kind: int, offset: int, end: int, payload: bytes = b"") -> None:
+        self.request.sendall(MESSAGE.pack(kind, offset, end, len(payload)) + payload)
+
+    def handle(self) -> None:
+        store = self.server.store
+        with suppress(ConnectionError), closing(_LogFile(store.log_path)) as log:
+            end = log.end
+            self.send(WELCOME, 0, end, log.log_id)
+            (offset,) = HELLO.unpack(_recv_exactly(self.request, HELLO.size))
+            if offset < log.base or offset > end:
+                offset = self.snapshot(-1, end)
+            last_sent = last_sync = time.monotonic()
+            while not self.server.stopping:
+                end = log.end
+                if end - offset > self.server.max_lag_bytes:
+                    offset = self.snapshot(offset, end)
+                data = log.read(offset, min(end - offset, CHUNK_SIZE))
+                good = _complete(data)
+                now = time.monotonic()
+                if good:
+                    offset += good
+                    self.send(RECORDS, offset, end, data[:good])
+                    last_sent = now
+                    continue
+                if log.replaced():
+                    # The new file holds every record after the index, these included
+                    log.reopen()
+                    if offset < log.base:
+                        offset = self.snapshot(-1, log.end)
+                    continue
+                if now - last_sent >= self.server.heartbeat_interval:
+                    self.send(HEARTBEAT, offset, end)
+                    last_sent = now
+                # Writes only reach the log file when the store syncs, and an idle store
+                # would otherwise keep its last few records buffered
+                if now - last_sync >= store.sync_interval:
+                    store.sync()
+                    last_sync = now
+                time.sleep(self.server.poll_interval)
+
+    def snapshot(self, offset: int, end: int) -> int:
+        """Send the current index if it is newer than `offset`; returns the offset to tail from."""
+        index = _Index(self.server.store.index_path)
+        try:
+            if 0 <= offset and index.log_offset <= offset:
+                return offset
+            self.send(SNAPSHOT_BEGIN, index.log_offset, end)
+            batch = bytearray()
+            for short_code, original_url in index.items():
+                expires_at = index.deadlines.get(short_code)
+                batch += encode_record(OP_PUT, short_code, original_url, expires_at)
+                if len(batch) >= CHUNK_SIZE:
+                    self.send(RECORDS, index.log_offset, end, bytes(batch))
+                    batch.clear()
+            if batch:
+                self.send(RECORDS, index.log_offset, end, bytes(batch))
+            self.send(SNAPSHOT_END, index.log_offset, end)
+            self.server.snapshots_sent += 1
+            return index.log_offset
+        finally:
+            index.close()
+
+
+class ReplicationServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    """Threaded log-shipping server for one LogStore; one thread per replica."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(
+        self,
+        address: Address,
+        store: LogStore,
+        max_lag_bytes: int = 64 << 20,
+        poll_interval: float = 0.005,
+        heartbeat_interval: float = 0.5,
+    ) -> None:
+        if isinstance(address, str):
+            self.address_family = socket.AF_UNIX
+            with suppress(FileNotFoundError):
+                os.unlink(address)  # stale socket from a previous run
+        super().__init__(address, ReplicationHandler)
+        self.store = store
+        self.max_lag_bytes = max_lag_bytes
+        self.poll_interval = poll_interval
+        self.heartbeat_interval = heartbeat_interval
+        self.snapshots_sent = 0
+        self.stopping = False
+
+    def start(self) -> "ReplicationServer":
+        """Serve from a daemon thread."""
+        threading.Thread(target=self.serve_forever, name="replication", daemon=True).start()
+        return self
+
+    def close(self) -> None:
+        self.stopping = True
+        self.shutdown()
+        self.server_close()
+
+
+def replication_from_env(service: URLService) -> ReplicationServer | None:
+    """Start shipping the log if ``URL_SHORTENER_REPLICATION_LISTEN`` is set.
+
+    Takes a Unix socket path or ``host:port``; the primary must use the log store.
+    """
+    address = os.environ.get("URL_SHORTENER_REPLICATION_LISTEN")
+    if not address:
+        return None
+    store = getattr(service, "snapshots", None)
+    if store is None:
+        raise RuntimeError("Log shipping needs the log store (URL_SHORTENER_DATA_DIR)")
+    return ReplicationServer(parse_address(address), store).start()
+
+
+class Replica:
+    """Follows a primary's log into a local, read-only URLService.
+
+    ``run()`` is a background task: it connects, applies the stream and reconnects after
+    errors or ``timeout`` seconds of silence. Lag is reported in log bytes and in seconds
+    since the replica last had everything the primary had written.
+    """
+
+    def __init__(
+        self,
+        primary: Address,
+        service: URLService | None = None,
+        timeout: float = 5.0,
+        retry_interval: float = 0.5,
+    ) -> None:
+        self.primary = primary
+        self.service = service if service is not None else URLService()
+        self.timeout = timeout
+        self.retry_interval = retry_interval
+        self.connected = False
+        self.applied_offset = -1
+        self.primary_offset = 0
+        self.snapshots = 0
+        self._log_id = b""
+        # Codes received during a snapshot; anything else is dropped when it completes
+        self._snapshot: set[str] | None = None
+        self._synced_at = time.monotonic()
+
+    @property
+    def lag_bytes(self) -> int:
+        return max(0, self.primary_offset - max(self.applied_offset, 0))
+
+    @property
+    def lag_seconds(self) -> float:
+        if self.connected and self._snapshot is None and not self.lag_bytes:
+            return 0.0
+        return time.monotonic() - self._synced_at
+
+    async def run(self) -> None:
+        while True:
+            with suppress(OSError, EOFError, TimeoutError, ValueError):
+                await self._follow()
+            self.connected = False
+            self._snapshot = None
+            await asyncio.sleep(self.retry_interval)
+
+    async def _follow(self) -> None:
+        if isinstance(self.primary, str):
+            reader, writer = await asyncio.open_unix_connection(self.primary)
+        else:
+            reader, writer = await asyncio.open_connection(*self.primary)
+        try:
+            kind, _, self.primary_offset, log_id = await self._read(reader)
+            if kind != WELCOME:
+                raise ValueError(f"Unexpected message {kind} from primary")
+            if log_id != self._log_id:
+                self.applied_offset = -1
+                self._log_id = log_id
+            writer.write(HELLO.pack(self.applied_offset))
+            await writer.drain()
+            self.connected = True
+            while True:
+                self.apply(*await self._read(reader))
+        finally:
+            writer.close()
+
+    async def _read(self, reader: asyncio.StreamReader) -> tuple[int, int, int, bytes]:
+        # IncompleteReadError (an EOFError) when the primary hangs up
+        header = await asyncio.wait_for(reader.readexactly(MESSAGE.size), self.timeout)
+        kind, offset, end, size = MESSAGE.unpack(header)
+        payload = await asyncio.wait_for(reader.readexactly(size), self.timeout)
+        return kind, offset, end, payload
+
+    def apply(self, kind: int, offset: int, end: int, payload: bytes) -> None:
+        """Apply one message from the primary."""
+        self.primary_offset = end
+        service = self.service
+        if kind == SNAPSHOT_BEGIN:
+            self._snapshot = set()
+        elif kind == RECORDS:
+            for _, op, short_code, original_url, expires_at in decode_records(payload):
+                if op == OP_PUT:
+                    service.put_short_url(short_code, original_url, expires_at=expires_at)
+                    if self._snapshot is not None:
+                        self._snapshot.add(short_code)
+                else:
+                    service.delete_short_url(short_code)
+            if self._snapshot is None:
+                self.applied_offset = offset
+        elif kind == SNAPSHOT_END and self._snapshot is not None:
+            stale = [code for code in service.list_all_urls() if code not in self._snapshot]
+            for short_code in stale:
+                service.delete_short_url(short_code)
+            self._snapshot = None
+            self.applied_offset = offset
+            self.snapshots += 1
+        if self._snapshot is None and self.applied_offset >= end:
+            self._synced_at = time.monotonic()
@@ -0,0 +1,536 @@
+"""Consistent-hash sharding of short codes across URLService processes.
+
+Each shard is a plain URLService behind a small socket server (Unix socket or TCP) that
+speaks length-prefixed JSON. ShardedURLService allocates codes itself and routes every
+code to its shard on a hash ring with virtual nodes, so adding or removing a shard only
+moves the codes in the ring ranges that change hands (about 1/N of them).
+
+Run a shard with ``python -m src.services.sharding /tmp/shard0.sock`` (or ``host:port``).
+"""
+
+import argparse
+import asyncio
+import bisect
+import heapq
+import json
+import multiprocessing
+import os
+import socket
+import socketserver
+import struct
+import threading
+import time
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager, suppress
+from typing import Any
+
+from .allocator import CodeAllocator
+from .sketches import hash64
+from .url_service import URLService
+
+FRAME = struct.Struct("<I")
+# Rows per round trip when a shard's links are listed or moved
+SCAN_PAGE_SIZE = 1000
+
+Address = str | tuple[str, int]
+
+
+def parse_address(value: str) -> Address:
+    """``/path/to.sock`` (Unix socket) or ``host:port`` (TCP)."""
+    if "/" in value:
+        return value
+    host, _, port = value.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+class HashRing:
+    """Consistent hash ring with `vnodes` points per node."""
+
+    def __init__(self, nodes: Iterable[str] = (), vnodes: int = 128) -> None:
+        self.vnodes = vnodes
+        self._nodes: set[str] = set()
+        self._points: list[int] = []
+        self._owners: list[str] = []
+        for node in nodes:
+            self.add(node)
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def __contains__(self, node: object) -> bool:
+        return node in self._nodes
+
+    @property
+    def nodes(self) -> list[str]:
+        return sorted(self._nodes)
+
+    def copy(self) -> "HashRing":
+        return HashRing(self._nodes, self.vnodes)
+
+    def add(self, node: str) -> None:
+        if node in self._nodes:
+            return
+        self._nodes.add(node)
+        self._rebuild()
+
+    def remove(self, node: str) -> None:
+        self._nodes.discard(node)
+        self._rebuild()
+
+    def _rebuild(self) -> None:
+        ring = sorted(
+            (hash64(f"{node}#{i}"), node) for node in self._nodes for i in range(self.vnodes)
+        )
+        self._points = [point for point, _ in ring]
+        self._owners = [node for _, node in ring]
+
+    def node_for(self, key: str) -> str:
+        """The node owning `key`: the first ring point clockwise from its hash."""
+        if not self._points:
+            raise LookupError("The hash ring has no nodes")
+        index = bisect.bisect(self._points, hash64(key))
+        return self._owners[index % len(self._owners)]
+
+
+def _send(sock: socket.socket, message: object) -> None:
+    payload = json.dumps(message, separators=(",", ":")).encode()
+    sock.sendall(FRAME.pack(len(payload)) + payload)
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> bytes:
+    chunks = []
+    while size:
+        chunk = sock.recv(size)
+        if not chunk:
+            raise ConnectionError("Shard connection closed")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def _recv(sock: socket.socket) -> object:
+    (size,) = FRAME.unpack(_recv_exactly(sock, FRAME.size))
+    return json.loads(_recv_exactly(sock, size))
+
+
+class ShardHandler(socketserver.BaseRequestHandler):
+    """Serves ``[op, *args]`` requests on one connection until the client hangs up."""
+
+    server: "ShardServer"
+
+    def handle(self) -> None:
+        while True:
+            try:
+                op, *args = _recv(self.request)
+            except ConnectionError:
+                return
+            try:
+                with self.server.lock:
+                    result = getattr(self, f"op_{op}")(self.server.service, *args)
+                reply = {"ok": result}
+            except Exception as exc:  # reported to the router rather than dropping the link
+                reply = {"error": f"{type(exc).__name__}: {exc}"}
+            _send(self.request, reply)
+
+    def op_get(self, service: URLService, short_code: str) -> str | None:
+        return service.get_original_url(short_code)
+
+    def op_expires_at(self, service: URLService, short_code: str) -> float | None:
+        return service.expires_at(short_code)
+
+    def op_put_many(self, service: URLService, rows: list[list]) -> int:
+        for short_code, original_url, ttl in rows:
+            service.put_short_url(short_code, original_url, ttl)
+        return len(rows)
+
+    def op_add_many(self, service: URLService, rows: list[list]) -> list[str]:
+        """Store new links whose codes are free; returns the codes that were already taken."""
+        return [
+            short_code
+            for short_code, original_url, ttl in rows
+            if not service.add_short_url(short_code, original_url, ttl)
+        ]
+
+    def op_delete_many(self, service: URLService, short_codes: list[str]) -> int:
+        return sum(service.delete_short_url(short_code) for short_code in short_codes)
+
+    def op_page(self, service: URLService, after: str | None, limit: int) -> list:
+        return service.list_urls_page(after=after, limit=limit)
+
+    def op_export(self, service: URLService, after: str | None, limit: int) -> list:
+        """Like page, with each link's remaining ttl so moved links keep expiring."""
+        now = time.time()
+        return [
+            [short_code, original_url, None if deadline is None else deadline - now]
+            for short_code, original_url, deadline in service.list_urls_page(after, limit)
+        ]
+
+    def op_count(self, service: URLService) -> int:
+        return len(service)
+
+    def op_reap(self, service: URLService) -> list[str]:
+        return service.reap_expired_codes()
+
+    def op_ping(self, service: URLService) -> bool:
+        return True
+
+
+class ShardServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    """Threaded server owning one URLService; requests run one at a time under `lock`."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address: Address, service: URLService | None = None) -> None:
+        if isinstance(address, str):
+            self.address_family = socket.AF_UNIX
+            with suppress(FileNotFoundError):
+                os.unlink(address)  # stale socket from a previous run
+        super().__init__(address, ShardHandler)
+        self.service = service if service is not None else URLService()
+        self.lock = threading.Lock()
+
+
+def serve_shard(address: Address) -> None:
+    """Run a shard until the process is terminated."""
+    with ShardServer(address) as server:
+        server.serve_forever()
+
+
+def spawn_shard(address: Address, timeout: float = 10.0) -> multiprocessing.Process:
+    """Start a shard in a child process and wait until it accepts connections."""
+    process = multiprocessing.get_context("spawn").Process(
+        target=serve_shard, args=(address,), daemon=True
+    )
+    process.start()
+    client = ShardClient(address)
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            client.call("ping")
+            client.close()
+            return process
+        except OSError:
+            if time.monotonic() > deadline or not process.is_alive():
+                process.terminate()
+                raise RuntimeError(f"Shard at {address!r} did not start") from None
+            time.sleep(0.05)
+
+
+class ShardError(RuntimeError):
+    """A shard rejected a request."""
+
+
+class ShardClient:
+    """Blocking client for one shard, with a small pool of reusable connections."""
+
+    def __init__(self, address: Address) -> None:
+        self.address = address
+        self._idle: list[socket.socket] = []
+        self._lock = threading.Lock()
+
+    def _connect(self) -> socket.socket:
+        if isinstance(self.address, str):
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.connect(self.address)
+        else:
+            sock = socket.create_connection(self.address)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return sock
+
+    @contextmanager
+    def _connection(self) -> Iterator[socket.socket]:
+        with self._lock:
+            sock = self._idle.pop() if self._idle else None
+        if sock is None:
+            sock = self._connect()
+        try:
+            yield sock
+        except BaseException:
+            sock.close()
+            raise
+        with self._lock:
+            self._idle.append(sock)
+
+    def call(self, op: str, *args: object) -> object:
+        with self._connection() as sock:
+            _send(sock, [op, *args])
+            reply = _recv(sock)
+        if "error" in reply:
+            raise ShardError(f"{self.address!r}: {reply['error']}")
+        return reply["ok"]
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for sock in idle:
+            sock.close()
+
+
+def _code(row: tuple) -> str:
+    return row[0]
+
+
+class ShardedURLService:
+    """URLService-compatible front end over shards placed on a consistent hash ring.
+
+    Codes are allocated here and sent with their URL to the owning shard, so shards never
+    allocate. Every call is a blocking round trip, so async callers go through
+    ``offload``. Listing merges each shard's code-ordered pages. ``add_shard`` and
+    ``remove_shard`` copy the affected links to their new owner while writes go on, then
+    pause this router's writes for a second pass that copies what changed meanwhile,
+    switch the ring and resume; only then are the moved links dropped from the old owner.
+    Other routers on the same shards must be switched while they are idle.
+    """
+
+    # The negative cache and hot-link cache live inside each shard's own URLService
+    negative_cache = None
+    cache = None
+    snapshots = None
+    filter_rejections = 0
+    filter_false_positives = 0
+    filter_false_positive_rate = 0.0
+
+    def __init__(
+        self,
+        shards: dict[str, Address],
+        allocator: CodeAllocator | None = None,
+        vnodes: int = 128,
+    ) -> None:
+        self._allocator = allocator if allocator is not None else CodeAllocator()
+        self._clients = {name: ShardClient(address) for name, address in shards.items()}
+        self._ring = HashRing(shards, vnodes)
+        self._rebalance_lock = threading.Lock()
+        # Writes in flight; a rebalance waits for them to finish before switching the ring
+        self._writes = threading.Condition()
+        self._writers = 0
+        self._writes_paused = False
+        # Called with the code of every deleted or reaped link, as on URLService
+        self.on_delete: Callable[[str], None] | None = None
+
+    @property
+    def shards(self) -> list[str]:
+        return self._ring.nodes
+
+    def shard_for(self, short_code: str) -> str:
+        return self._ring.node_for(short_code)
+
+    def _client(self, short_code: str) -> ShardClient:
+        return self._clients[self._ring.node_for(short_code)]
+
+    def generate_short_code(self, length: int | None = None) -> str:
+        return self._allocator.allocate(length)
+
+    @contextmanager
+    def _writing(self) -> Iterator[None]:
+        """Route and send a write, waiting while a rebalance switches the ring."""
+        with self._writes:
+            while self._writes_paused:
+                self._writes.wait()
+            self._writers += 1
+        try:
+            yield
+        finally:
+            with self._writes:
+                self._writers -= 1
+                self._writes.notify_all()
+
+    @contextmanager
+    def _pause_writes(self) -> Iterator[None]:
+        with self._writes:
+            self._writes_paused = True
+            while self._writers:
+                self._writes.wait()
+        try:
+            yield
+        finally:
+            with self._writes:
+                self._writes_paused = False
+                self._writes.notify_all()
+
+    def _add(self, rows: list[list]) -> None:
+        """Store new ``[code, url, ttl]`` rows, one round trip per shard and attempt.
+
+        Another router (or this one before a restart, without a shared allocator state)
+        may have handed out the same code, so shards refuse taken codes and those rows are
+        given fresh codes, in place, and sent again.
+        """
+        while rows:
+            with self._writing():
+                by_shard: dict[str, list[list]] = {}
+                for row in rows:
+                    by_shard.setdefault(self._ring.node_for(row[0]), []).append(row)
+                taken: set[str] = set()
+                for name, shard_rows in by_shard.items():
+                    taken.update(self._clients[name].call("add_many", shard_rows))
+            rows = [row for row in rows if row[0] in taken]
+            for row, short_code in zip(rows, self._allocator.allocate_many(len(rows))):
+                row[0] = short_code
+
+    def create_short_url(self, original_url: str, ttl: float | None = None) -> str:
+        row = [self.generate_short_code(), original_url, ttl]
+        self._add([row])
+        return row[0]
+
+    def create_many(self, original_urls: list[str]) -> list[str]:
+        """Create a batch with one round trip per shard."""
+        short_codes = self._allocator.allocate_many(len(original_urls))
+        rows = [
+            [short_code, original_url, None]
+            for short_code, original_url in zip(short_codes, original_urls)
+        ]
+        self._add(rows)
+        return [row[0] for row in rows]
+
+    async def wait_durable(self) -> None:
+        """Shards apply writes before replying, so there is nothing to wait for."""
+
+    async def offload[T](self, function: Callable[..., T], *args: Any) -> T:
+        """Call `function` from async code in a worker thread, as shard calls block on sockets."""
+        return await asyncio.to_thread(function, *args)
+
+    def get_original_url(self, short_code: str) -> str | None:
+        return self._client(short_code).call("get", short_code)
+
+    def expires_at(self, short_code: str) -> float | None:
+        return self._client(short_code).call("expires_at", short_code)
+
+    def delete_short_url(self, short_code: str) -> bool:
+        with self._writing():
+            deleted = bool(self._client(short_code).call("delete_many", [short_code]))
+        if deleted and self.on_delete is not None:
+            self.on_delete(short_code)
+        return deleted
+
+    def __len__(self) -> int:
+        return sum(client.call("count") for client in list(self._clients.values()))
+
+    @property
+    def allocator(self) -> CodeAllocator:
+        return self._allocator
+
+    def reap_expired(self) -> int:
+        reaped = [code for client in list(self._clients.values()) for code in client.call("reap")]
+        if self.on_delete is not None:
+            for short_code in reaped:
+                self.on_delete(short_code)
+        return len(reaped)
+
+    async def run_reaper(self, interval: float = 1.0) -> None:
+        """Background task: ask every shard to reap expired links until cancelled."""
+        while True:
+            await asyncio.to_thread(self.reap_expired)
+            await asyncio.sleep(interval)
+
+    def list_urls_page(
+        self, after: str | None = None, limit: int = 100
+    ) -> list[tuple[str, str, float | None]]:
+        """Merge the first `limit` codes after `after` from every shard."""
+        pages = [client.call("page", after, limit) for client in self._clients.values()]
+        merged = heapq.merge(*([tuple(row) for row in page] for page in pages), key=_code)
+        return [row for row, _ in zip(merged, range(limit))]
+
+    def iter_urls(self, after: str | None = None) -> Iterator[tuple[str, str]]:
+        while True:
+            page = self.list_urls_page(after, SCAN_PAGE_SIZE)
+            for short_code, original_url, _ in page:
+                yield short_code, original_url
+            if len(page) < SCAN_PAGE_SIZE:
+                return
+            after = page[-1][0]
+
+    def list_all_urls(self) -> dict[str, str]:
+        return dict(self.iter_urls())
+
+    def _export(self, client: ShardClient) -> Iterator[list]:
+        after = None
+        while True:
+            rows = client.call("export", after, SCAN_PAGE_SIZE)
+            yield from rows
+            if len(rows) < SCAN_PAGE_SIZE:
+                return
+            after = rows[-1][0]
+
+    def _moves(self, ring: HashRing, sources: Iterable[str]) -> dict[str, tuple[str, str, list]]:
+        """Links on `sources` that `ring` places elsewhere: code -> (source, target, row)."""
+        moves = {}
+        for source in sources:
+            for row in self._export(self._clients[source]):
+                target = ring.node_for(row[0])
+                if target != source:
+                    moves[row[0]] = (source, target, row)
+        return moves
+
+    @staticmethod
+    def _send_batches(clients: dict[str, ShardClient], op: str, batches: dict[str, list]) -> None:
+        """Send each shard its items in frames of at most SCAN_PAGE_SIZE."""
+        for name, items in batches.items():
+            for start in range(0, len(items), SCAN_PAGE_SIZE):
+                clients[name].call(op, items[start : start + SCAN_PAGE_SIZE])
+
+    def _rebalance(
+        self, ring: HashRing, sources: list[str], clients: dict[str, ShardClient]
+    ) -> dict[str, tuple[str, str, list]]:
+        """Copy the links `ring` moves off `sources`, then switch to `ring` and `clients`.
+
+        The bulk copy runs alongside writes. Writes are then paused while the sources are
+        scanned again, so links created or deleted during the copy reach their new owner
+        before the ring changes. Returns the links that moved.
+        """
+        senders = {**self._clients, **clients}
+        copied = self._moves(ring, sources)
+        puts: dict[str, list[list]] = {}
+        for _, target, row in copied.values():
+            puts.setdefault(target, []).append(row)
+        self._send_batches(senders, "put_many", puts)
+        with self._pause_writes():
+            moves = self._moves(ring, sources)
+            puts, deletes = {}, {}
+            for short_code in moves.keys() - copied.keys():
+                _, target, row = moves[short_code]
+                puts.setdefault(target, []).append(row)
+            for short_code in copied.keys() - moves.keys():
+                deletes.setdefault(copied[short_code][1], []).append(short_code)
+            self._send_batches(senders, "put_many", puts)
+            self._send_batches(senders, "delete_many", deletes)
+            self._clients = clients
+            self._ring = ring
+        return moves
+
+    def add_shard(self, name: str, address: Address) -> int:
+        """Join a shard and move the links it now owns; returns how many moved."""
+        with self._rebalance_lock:
+            ring = self._ring.copy()
+            ring.add(name)
+            sources = list(self._clients)
+            moves = self._rebalance(ring, sources, {**self._clients, name: ShardClient(address)})
+            deletes: dict[str, list[str]] = {}
+            for short_code, (source, _, _) in moves.items():
+                deletes.setdefault(source, []).append(short_code)
+            self._send_batches(self._clients, "delete_many", deletes)
+            return len(moves)
+
+    def remove_shard(self, name: str) -> int:
+        """Hand a shard's links to the remaining shards and drop it; returns how many moved."""
+        with self._rebalance_lock:
+            client = self._clients[name]
+            ring = self._ring.copy()
+            ring.remove(name)
+            clients = {owner: shard for owner, shard in self._clients.items() if owner != name}
+            moves = self._rebalance(ring, [name], clients)
+            client.close()
+            return len(moves)
+
+    def close(self) -> None:
+        for client in self._clients.values():
+            client.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run one URL shard.")
+    parser.add_argument("address", help="Unix socket path or host:port")
+    serve_shard(parse_address(parser.parse_args().address))
+
+
+if __name__ == "__main__":
+    main()
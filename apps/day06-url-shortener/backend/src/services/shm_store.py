@@ -0,0 +1,314 @@
+"""URL table in POSIX shared memory, so every uvicorn worker serves the same links."""
+
+import fcntl
+import secrets
+import struct
+import sys
+import tempfile
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from pathlib import Path
+
+from .allocator import tier_size
+from .sketches import hash64
+from .storage import StoreFullError
+
+MAGIC = int.from_bytes(b"URLSHM03", "little")
+# Header words (8 bytes each)
+H_MAGIC, H_SLOTS, H_HEAP_SIZE, H_HEAP_USED, H_LIVE, H_USED_SLOTS, H_SEQ = range(7)
+H_KEY = 7  # two words: the allocator's permutation key
+H_COUNTERS = 9  # one counter per code length 1..MAX_COUNTER_LENGTH
+MAX_COUNTER_LENGTH = 16
+H_CHANGES = 25  # writes ever made; the last JOURNAL_ENTRIES are in the journal
+HEADER_WORDS = 32
+HEADER_BYTES = 8 * HEADER_WORDS
+# Code length, url length, deadline (0 if the link never expires); followed by both strings
+RECORD = struct.Struct("<HId")
+EMPTY = 0
+TOMBSTONE = 1
+OFFSET_MASK = (1 << 48) - 1
+TAG_MASK = (1 << 15) - 1
+EXPIRING = 1 << 63  # set on slots whose record has a deadline
+# Ring of the latest writes: the offset of the record put or deleted, DELETED for a delete
+JOURNAL_ENTRIES = 4096
+DELETED = 1 << 63
+MAX_LOAD = 0.7
+
+
+def _open_segment(name: str, size: int = 0) -> SharedMemory:
+    create = size > 0
+    if sys.version_info >= (3, 13):
+        return SharedMemory(name, create=create, size=size, track=False)
+    shm = SharedMemory(name, create=create, size=size)
+    # Before 3.13 every process that opens the segment registers it, and the resource
+    # tracker unlinks it when that process exits, taking the table from the other workers
+    resource_tracker.unregister(shm._name, "shared_memory")
+    return shm
+
+
+class SharedMemoryStore:
+    """Open-addressing hash table plus an append-only record heap in one shared segment.
+
+    The first process to open ``name`` creates the segment; later ones (other workers)
+    attach to it. Layout: a header, ``slots`` 8-byte slot words, a journal of the latest
+    writes (so per-worker views can catch up with ``changes_since`` rather than rescan the
+    table) and the heap. A slot word
+    holds an expiring flag, a 15-bit hash tag and the 48-bit offset of an immutable
+    ``(code, url, deadline)`` record. Every worker reads the deadline with the record, so
+    a link expires everywhere at once, whichever worker scheduled it.
+
+    Writes are single-writer: a process-wide lock plus ``flock`` on a lock file next to
+    the segment. A writer appends the record first (invisible until published), then
+    bumps the header sequence number to odd, stores the slot word and bumps it back to
+    even. Reads take no lock: they probe the table and retry if the sequence number was
+    odd or moved meanwhile (a seqlock), so they never see a half-written slot.
+
+    The table does not grow: ``put`` raises StoreFullError once ``slots`` would pass 70%
+    load (tombstones included) or the heap is used up, and bytes of deleted or replaced
+    links are not reclaimed. The segment outlives the processes using it until
+    ``unlink`` is called.
+
+    The store also hands out allocator counters and the permutation key, so codes
+    allocated by different workers never collide.
+    """
+
+    shared = True
+
+    def __init__(self, name: str, slots: int = 1 << 20, heap_bytes: int = 256 << 20) -> None:
+        if slots & (slots - 1):
+            raise ValueError("slots must be a power of two")
+        self.name = name
+        self._thread_lock = threading.Lock()
+        self._lock_file = open(Path(tempfile.gettempdir()) / f"{name}.lock", "a+b")
+        with self._write_lock():
+            try:
+                self._shm = _open_segment(name)
+                created = False
+            except FileNotFoundError:
+                self._shm = _open_segment(
+                    name, HEADER_BYTES + 8 * (slots + JOURNAL_ENTRIES) + heap_bytes
+                )
+                created = True
+            buf = self._shm.buf
+            self._header = buf[:HEADER_BYTES].cast("Q")
+            if created:
+                self._header[H_SLOTS] = slots
+                self._header[H_HEAP_SIZE] = heap_bytes
+                self._header[H_HEAP_USED] = 0
+                buf[8 * H_KEY : 8 * H_KEY + 16] = secrets.token_bytes(16)
+                self._header[H_MAGIC] = MAGIC
+            elif self._header[H_MAGIC] != MAGIC:
+                self._header.release()
+                self._shm.close()
+                raise ValueError(f"Shared memory segment {name!r} is not a URL table")
+        self._mask = self._header[H_SLOTS] - 1
+        journal_start = HEADER_BYTES + 8 * self._header[H_SLOTS]
+        self._heap_start = journal_start + 8 * JOURNAL_ENTRIES
+        self._slots = buf[HEADER_BYTES:journal_start].cast("Q")
+        self._journal = buf[journal_start : self._heap_start].cast("Q")
+        self._buf = buf
+
+    @contextmanager
+    def _write_lock(self) -> Iterator[None]:
+        with self._thread_lock:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    @property
+    def key(self) -> bytes:
+        return bytes(self._buf[8 * H_KEY : 8 * H_KEY + 16])
+
+    @property
+    def changes(self) -> int:
+        """Number of writes ever made, for ``changes_since``."""
+        return self._header[H_CHANGES]
+
+    def changes_since(self, seen: int) -> tuple[int, list[tuple[str, bool]]] | None:
+        """Writes after the first `seen`: (changes, [(code, deleted), ...]) in order.
+
+        None if more than the journal holds have happened since; rescan the table then.
+        """
+        header = self._header
+        while True:
+            seq = header[H_SEQ]
+            if seq & 1:
+                continue
+            changes = header[H_CHANGES]
+            if changes - seen > JOURNAL_ENTRIES:
+                return None
+            entries = [self._journal[i % JOURNAL_ENTRIES] for i in range(seen, changes)]
+            if header[H_SEQ] == seq:
+                break
+        # Records are never overwritten, so they can be read outside the seqlock
+        return changes, [
+            (self._record(entry & OFFSET_MASK)[0], bool(entry & DELETED)) for entry in entries
+        ]
+
+    def _journal_locked(self, entry: int) -> None:
+        changes = self._header[H_CHANGES]
+        self._journal[changes % JOURNAL_ENTRIES] = entry
+        self._header[H_CHANGES] = changes + 1
+
+    def _record(self, offset: int) -> tuple[str, str, float]:
+        code_length, url_length, expires_at = RECORD.unpack_from(self._buf, offset)
+        start = offset + RECORD.size
+        code = str(self._buf[start : start + code_length], "utf-8")
+        start += code_length
+        return code, str(self._buf[start : start + url_length], "utf-8"), expires_at
+
+    def _probe(self, short_code: str, h: int) -> tuple[int, int]:
+        """(slot holding `short_code` or -1, first reusable slot on the probe path)."""
+        tag = h >> 49
+        slots = self._slots
+        slot = h & self._mask
+        free = -1
+        for _ in range(self._mask + 1):
+            word = slots[slot]
+            if word == EMPTY:
+                return -1, slot if free < 0 else free
+            if word == TOMBSTONE:
+                if free < 0:
+                    free = slot
+            elif (word >> 48) & TAG_MASK == tag:
+                if self._record(word & OFFSET_MASK)[0] == short_code:
+                    return slot, free
+            slot = (slot + 1) & self._mask
+        return -1, free
+
+    def _find(self, short_code: str) -> tuple[str, str, float] | None:
+        h = hash64(short_code)
+        header = self._header
+        while True:
+            seq = header[H_SEQ]
+            if seq & 1:
+                continue
+            try:
+                slot, _ = self._probe(short_code, h)
+                result = None if slot < 0 else self._record(self._slots[slot] & OFFSET_MASK)
+            except (struct.error, UnicodeDecodeError):
+                result = None  # raced a writer; the sequence check below retries
+            if header[H_SEQ] == seq:
+                return result
+
+    def get(self, short_code: str) -> str | None:
+        """The link's URL, or None if there is none or it has expired."""
+        record = self._find(short_code)
+        if record is None or record[2] and record[2] <= time.time():
+            return None
+        return record[1]
+
+    def expires_at(self, short_code: str) -> float | None:
+        record = self._find(short_code)
+        return None if record is None or not record[2] else record[2]
+
+    def put(self, short_code: str, original_url: str, expires_at: float | None = None) -> None:
+        code_bytes = short_code.encode()
+        url_bytes = original_url.encode()
+        h = hash64(short_code)
+        with self._write_lock():
+            header = self._header
+            slot, free = self._probe(short_code, h)
+            if slot < 0 and (
+                free < 0
+                or self._slots[free] == EMPTY
+                and header[H_USED_SLOTS] + 1 > MAX_LOAD * (self._mask + 1)
+            ):
+                raise StoreFullError(f"Shared URL table {self.name!r} is full")
+            size = RECORD.size + len(code_bytes) + len(url_bytes)
+            used = header[H_HEAP_USED]
+            if used + size > header[H_HEAP_SIZE]:
+                raise StoreFullError(f"Shared URL table {self.name!r} is out of heap space")
+            offset = self._heap_start + used
+            RECORD.pack_into(self._buf, offset, len(code_bytes), len(url_bytes), expires_at or 0.0)
+            start = offset + RECORD.size
+            self._buf[start : start + size - RECORD.size] = code_bytes + url_bytes
+            header[H_HEAP_USED] = used + ((size + 7) & ~7)
+
+            header[H_SEQ] += 1
+            if slot < 0:
+                slot = free
+                if self._slots[slot] == EMPTY:
+                    header[H_USED_SLOTS] += 1
+                header[H_LIVE] += 1
+            self._slots[slot] = (EXPIRING if expires_at else 0) | (h >> 49) << 48 | offset
+            self._journal_locked(offset)
+            header[H_SEQ] += 1
+
+    def delete(self, short_code: str) -> bool:
+        h = hash64(short_code)
+        with self._write_lock():
+            slot, _ = self._probe(short_code, h)
+            if slot < 0:
+                return False
+            header = self._header
+            header[H_SEQ] += 1
+            self._journal_locked(DELETED | self._slots[slot] & OFFSET_MASK)
+            self._slots[slot] = TOMBSTONE
+            header[H_LIVE] -= 1
+            header[H_SEQ] += 1
+            return True
+
+    def reserve(self, length: int, count: int) -> range:
+        """CounterSource for the allocator, shared by every process on the segment."""
+        if not 0 < length <= MAX_COUNTER_LENGTH:
+            raise ValueError(f"Code length must be 1-{MAX_COUNTER_LENGTH}")
+        with self._write_lock():
+            index = H_COUNTERS + length - 1
+            start = self._header[index]
+            end = min(start + count, tier_size(length))
+            self._header[index] = max(start, end)
+        return range(start, end)
+
+    def __contains__(self, short_code: object) -> bool:
+        return isinstance(short_code, str) and self.get(short_code) is not None
+
+    def __len__(self) -> int:
+        return self._header[H_LIVE]
+
+    def _words(self) -> list[int]:
+        # Copy the slot words under a stable sequence number; records never change
+        while True:
+            seq = self._header[H_SEQ]
+            if seq & 1:
+                continue
+            words = self._slots.tolist()
+            if self._header[H_SEQ] == seq:
+                return words
+
+    def items(self) -> Iterator[tuple[str, str]]:
+        """Every live link; expired ones are skipped."""
+        now = time.time()
+        for word in self._words():
+            if word > TOMBSTONE:
+                code, url, expires_at = self._record(word & OFFSET_MASK)
+                if not expires_at or expires_at > now:
+                    yield code, url
+
+    def deadlines(self) -> Iterator[tuple[str, float]]:
+        """(code, deadline) of every stored link that expires, expired ones included."""
+        for word in self._words():
+            if word & EXPIRING:
+                code, _, expires_at = self._record(word & OFFSET_MASK)
+                yield code, expires_at
+
+    def close(self) -> None:
+        self._header.release()
+        self._slots.release()
+        self._journal.release()
+        self._buf = None
+        self._shm.close()
+        self._lock_file.close()
+
+    def unlink(self) -> None:
+        """Remove the segment (and its data) for good once every process has closed it."""
+        segment = SharedMemory(self.name)
+        segment.close()
+        segment.unlink()
+        Path(self._lock_file.name).unlink(missing_ok=True)
@@ -0,0 +1,217 @@
+"""Fixed-memory streaming sketches for link analytics.
+
+Error bounds, with N the number of events seen:
+
+- CountMinSketch(width, depth): never underestimates; with probability at least
+  1 - e**-depth an estimate exceeds the true count by at most (e / width) * N.
+- SpaceSaving(k): tracks k candidates; each reported count overestimates the true count
+  by at most its ``error`` (<= N / k), and every item with true count > N / k is present.
+- HyperLogLog(precision): 2**precision one-byte registers with a relative standard error
+  of about 1.04 / sqrt(2**precision) (3.25% at precision 10).
+"""
+
+import hashlib
+import heapq
+import math
+from array import array
+from collections import OrderedDict
+
+MASK64 = (1 << 64) - 1
+
+
+def hash64(value: str, seed: int = 0) -> int:
+    digest = hashlib.blake2b(value.encode(), digest_size=8, salt=seed.to_bytes(16, "little"))
+    return int.from_bytes(digest.digest(), "little")
+
+
+class CountMinSketch:
+    """Approximate per-item counts in width * depth counters."""
+
+    def __init__(self, width: int = 2048, depth: int = 4) -> None:
+        self.width = width
+        self.depth = depth
+        self.total = 0
+        self._rows = [array("Q", bytes(8 * width)) for _ in range(depth)]
+
+    @property
+    def epsilon(self) -> float:
+        return math.e / self.width
+
+    @property
+    def delta(self) -> float:
+        return math.exp(-self.depth)
+
+    def _columns(self, item: str) -> list[int]:
+        # Two independent halves of one hash give `depth` columns (Kirsch-Mitzenmacher)
+        h = hash64(item)
+        h1, h2 = h & 0xFFFFFFFF, h >> 32
+        return [(h1 + i * h2) % self.width for i in range(self.depth)]
+
+    def add(self, item: str, count: int = 1) -> int:
+        """Count `item` and return its new estimate."""
+        self.total += count
+        estimate = MASK64
+        for row, column in zip(self._rows, self._columns(item)):
+            row[column] += count
+            estimate = min(estimate, row[column])
+        return estimate
+
+    def remove(self, item: str, count: int) -> None:
+        """Take back `count` earlier adds of `item`; exact as long as they really happened."""
+        self.total -= min(count, self.total)
+        for row, column in zip(self._rows, self._columns(item)):
+            row[column] -= min(count, row[column])
+
+    def estimate(self, item: str) -> int:
+        return min(row[column] for row, column in zip(self._rows, self._columns(item)))
+
+    def halve(self) -> None:
+        """Divide every counter by two (ageing, so old popularity fades)."""
+        for row in self._rows:
+            for i, value in enumerate(row):
+                if value:
+                    row[i] = value >> 1
+        self.total >>= 1
+
+    @property
+    def memory_bytes(self) -> int:
+        return 8 * self.width * self.depth
+
+
+class SpaceSaving:
+    """Top-k heavy hitters in O(k) memory (Metwally et al.)."""
+
+    def __init__(self, k: int = 100) -> None:
+        self.k = k
+        self.total = 0
+        self._counts: dict[str, int] = {}
+        self._errors: dict[str, int] = {}
+        # Min-heap of (count, item); stale entries are skipped lazily
+        self._heap: list[tuple[int, str]] = []
+
+    def add(self, item: str, count: int = 1) -> None:
+        self.total += count
+        if item in self._counts:
+            self._counts[item] += count
+        elif len(self._counts) < self.k:
+            self._counts[item] = count
+            self._errors[item] = 0
+        else:
+            floor, victim = self._pop_min()
+            del self._counts[victim], self._errors[victim]
+            self._counts[item] = floor + count
+            self._errors[item] = floor
+        heapq.heappush(self._heap, (self._counts[item], item))
+        if len(self._heap) > 4 * self.k:
+            self._heap = [(c, i) for i, c in self._counts.items()]
+            heapq.heapify(self._heap)
+
+    def discard(self, item: str, count: int = 0) -> None:
+        """Stop tracking `item` and take its `count` true occurrences out of ``total``."""
+        self.total -= min(count, self.total)
+        if self._counts.pop(item, None) is not None:
+            # Its heap entries go stale and are skipped by _pop_min
+            del self._errors[item]
+
+    def _pop_min(self) -> tuple[int, str]:
+        while True:
+            count, item = heapq.heappop(self._heap)
+            if self._counts.get(item) == count:
+                return count, item
+
+    def top(self, n: int) -> list[tuple[str, int, int]]:
+        """The n heaviest items as (item, estimated count, max overestimate)."""
+        best = heapq.nlargest(n, self._counts.items(), key=lambda pair: pair[1])
+        return [(item, count, self._errors[item]) for item, count in best]
+
+
+class HyperLogLog:
+    """Approximate distinct count in 2**precision bytes."""
+
+    def __init__(self, precision: int = 10) -> None:
+        if not 4 <= precision <= 16:
+            raise ValueError("precision must be between 4 and 16")
+        self.precision = precision
+        self.m = 1 << precision
+        self._registers = bytearray(self.m)
+        self._rest_bits = 64 - precision
+        self._alpha = 0.7213 / (1 + 1.079 / self.m)
+
+    @property
+    def relative_error(self) -> float:
+        return 1.04 / math.sqrt(self.m)
+
+    def add_hash(self, h: int) -> None:
+        index = h >> self._rest_bits
+        rest = h & ((1 << self._rest_bits) - 1)
+        rank = self._rest_bits - rest.bit_length() + 1
+        if rank > self._registers[index]:
+            self._registers[index] = rank
+
+    def add(self, item: str) -> None:
+        self.add_hash(hash64(item))
+
+    def count(self) -> int:
+        m = self.m
+        estimate = self._alpha * m * m / sum(2.0**-r for r in self._registers)
+        if estimate <= 2.5 * m:
+            zeros = self._registers.count(0)
+            if zeros:
+                estimate = m * math.log(m / zeros)
+        return round(estimate)
+
+
+class TrafficSketches:
+    """Heavy hitters and per-link unique clients for the redirect stream.
+
+    Memory is fixed by configuration: the Count-Min sketch, ``top_k`` Space-Saving slots
+    and at most ``max_tracked_links`` HyperLogLogs of ``2**hll_precision`` bytes. When
+    more links than that receive clicks, the least recently clicked link's HLL is dropped.
+    ``forget`` removes a deleted link from all three, so top-N and totals stop reporting it.
+    """
+
+    def __init__(
+        self,
+        top_k: int = 100,
+        cms_width: int = 2048,
+        cms_depth: int = 4,
+        hll_precision: int = 10,
+        max_tracked_links: int = 10_000,
+    ) -> None:
+        self.frequencies = CountMinSketch(cms_width, cms_depth)
+        self.heavy_hitters = SpaceSaving(top_k)
+        self.hll_precision = hll_precision
+        self.max_tracked_links = max_tracked_links
+        self._uniques: OrderedDict[str, HyperLogLog] = OrderedDict()
+
+    def add(self, short_code: str, client: str) -> None:
+        self.frequencies.add(short_code)
+        self.heavy_hitters.add(short_code)
+        hll = self._uniques.get(short_code)
+        if hll is None:
+            if len(self._uniques) >= self.max_tracked_links:
+                self._uniques.popitem(last=False)
+            hll = self._uniques[short_code] = HyperLogLog(self.hll_precision)
+        else:
+            self._uniques.move_to_end(short_code)
+        hll.add(client)
+
+    def forget(self, short_code: str, clicks: int) -> None:
+        """Remove a link and the `clicks` it was counted with."""
+        self.frequencies.remove(short_code, clicks)
+        self.heavy_hitters.discard(short_code, clicks)
+        self._uniques.pop(short_code, None)
+
+    def unique_clients(self, short_code: str) -> int | None:
+        """Approximate distinct clients, or None if the link is not tracked."""
+        hll = self._uniques.get(short_code)
+        return None if hll is None else hll.count()
+
+    @property
+    def memory_bytes(self) -> int:
+        """Upper bound on sketch memory, ignoring Python object headers."""
+        return (
+            self.frequencies.memory_bytes
+            + self.heavy_hitters.k * 64
+            + self.max_tracked_links * (1 << self.hll_precision)
+        )
@@ -0,0 +1,89 @@
+"""Ordered set of short codes for keyset pagination."""
+
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterable, Iterator
+
+
+class SortedCodeIndex:
+    """Sorted set of strings stored as a list of bounded sorted chunks.
+
+    Inserts and deletes only shift one chunk (at most ``2 * load`` items), and seeking
+    to a cursor is two binary searches, so it stays cheap with millions of codes.
+    """
+
+    def __init__(self, codes: Iterable[str] = (), load: int = 1000) -> None:
+        self._load = load
+        ordered = sorted(codes)
+        self._chunks = [ordered[i : i + load] for i in range(0, len(ordered), load)]
+        self._maxes = [chunk[-1] for chunk in self._chunks]
+        self._len = len(ordered)
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __contains__(self, code: str) -> bool:
+        pos = bisect_left(self._maxes, code)
+        if pos == len(self._maxes):
+            return False
+        chunk = self._chunks[pos]
+        i = bisect_left(chunk, code)
+        return chunk[i] == code
+
+    def add(self, code: str) -> None:
+        if not self._chunks:
+            self._chunks.append([code])
+            self._maxes.append(code)
+            self._len = 1
+            return
+        pos = bisect_left(self._maxes, code)
+        if pos == len(self._maxes):
+            pos -= 1
+            self._chunks[pos].append(code)
+            self._maxes[pos] = code
+        else:
+            chunk = self._chunks[pos]
+            i = bisect_left(chunk, code)
+            if chunk[i] == code:
+                return
+            chunk.insert(i, code)
+        self._len += 1
+        if len(self._chunks[pos]) > 2 * self._load:
+            chunk = self._chunks[pos]
+            self._chunks[pos : pos + 1] = [chunk[: self._load], chunk[self._load :]]
+            self._maxes[pos : pos + 1] = [chunk[self._load - 1], chunk[-1]]
+
+    def discard(self, code: str) -> None:
+        pos = bisect_left(self._maxes, code)
+        if pos == len(self._maxes):
+            return
+        chunk = self._chunks[pos]
+        i = bisect_left(chunk, code)
+        if chunk[i] != code:
+            return
+        del chunk[i]
+        self._len -= 1
+        if chunk:
+            self._maxes[pos] = chunk[-1]
+        else:
+            del self._chunks[pos]
+            del self._maxes[pos]
+
+    def page(self, after: str | None, limit: int) -> list[str]:
+        """Return up to `limit` codes strictly greater than `after`, in order."""
+        pos = 0 if after is None else bisect_right(self._maxes, after)
+        result: list[str] = []
+        while pos < len(self._chunks) and len(result) < limit:
+            chunk = self._chunks[pos]
+            start = 0 if after is None or result else bisect_right(chunk, after)
+            result.extend(chunk[start : start + limit - len(result)])
+            pos += 1
+        return result
+
+    def iter_from(self, after: str | None = None, page_size: int = 1000) -> Iterator[str]:
+        """Iterate codes after `after`, re-seeking per page so concurrent writes are safe."""
+        while True:
+            page = self.page(after, page_size)
+            yield from page
+            if len(page) < page_size:
+                return
+            after = page[-1]
@@ -0,0 +1,280 @@
+"""SQLite store with group commit on a background writer thread."""
+
+import queue
+import secrets
+import sqlite3
+import threading
+import time
+from collections.abc import Iterator
+from concurrent.futures import Future
+from contextlib import contextmanager, suppress
+from pathlib import Path
+
+from .allocator import tier_size
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS urls (
+    code TEXT PRIMARY KEY, url TEXT NOT NULL, expires_at REAL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS counters (length INTEGER PRIMARY KEY, next INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value BLOB NOT NULL);
+"""
+_STOP = None
+
+
+def _connect(path: Path, read_only: bool = False) -> sqlite3.Connection:
+    if read_only:
+        conn = sqlite3.connect(
+            f"file:{path}?mode=ro", uri=True, check_same_thread=False, isolation_level=None
+        )
+    else:
+        conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        # FULL fsyncs the WAL on every commit, so a committed batch survives power loss
+        conn.execute("PRAGMA synchronous=FULL")
+    conn.execute("PRAGMA busy_timeout=5000")
+    return conn
+
+
+class SQLiteStore:
+    """WAL-mode SQLite store that batches writes into group commits.
+
+    ``put`` and ``delete`` only queue the change (and make it visible to this process's
+    reads straight away); a single writer thread commits queued changes in one
+    transaction once ``batch_size`` are waiting or ``flush_interval`` seconds after the
+    first one, whichever comes first. ``durable()`` returns a future that resolves once
+    everything queued so far is committed, so callers that must not acknowledge a write
+    before it is on disk can wait for it while sharing the fsync with the whole batch.
+    ``batch_size=1`` gives one transaction per write. Reads use a pool of read-only
+    connections. The store also persists the allocator key and counters, and the deadline
+    of every expiring link in ``expires_at``.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        batch_size: int = 256,
+        flush_interval: float = 0.002,
+        readers: int = 4,
+    ) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.commits = 0
+
+        setup = _connect(self.path)
+        setup.executescript(SCHEMA)
+        if "expires_at" not in {row[1] for row in setup.execute("PRAGMA table_info(urls)")}:
+            setup.execute("ALTER TABLE urls ADD COLUMN expires_at REAL")  # pre-expiry database
+        setup.execute(
+            "CREATE INDEX IF NOT EXISTS urls_expiring ON urls (expires_at) "
+            "WHERE expires_at IS NOT NULL"
+        )
+        setup.execute(
+            "INSERT OR IGNORE INTO meta VALUES ('code_key', ?)", (secrets.token_bytes(16),)
+        )
+        self.key: bytes = setup.execute(
+            "SELECT value FROM meta WHERE name = 'code_key'"
+        ).fetchone()[0]
+        self._counter_conn = setup
+        self._counter_lock = threading.Lock()
+
+        self._readers: queue.SimpleQueue[sqlite3.Connection] = queue.SimpleQueue()
+        for _ in range(readers):
+            self._readers.put(_connect(self.path, read_only=True))
+
+        self._lock = threading.Lock()
+        # Queued but uncommitted changes: code -> (sequence number, url or None for a delete,
+        # deadline)
+        self._pending: dict[str, tuple[int, str | None, float | None]] = {}
+        self._seq = 0
+        self._committed = 0
+        self._waiters: list[tuple[int, Future]] = []
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._writer = threading.Thread(target=self._run_writer, name="sqlite-writer", daemon=True)
+        self._writer.start()
+
+    @contextmanager
+    def _reader(self) -> Iterator[sqlite3.Connection]:
+        conn = self._readers.get()
+        try:
+            yield conn
+        finally:
+            self._readers.put(conn)
+
+    def get(self, short_code: str) -> str | None:
+        pending = self._pending.get(short_code)
+        if pending is not None:
+            return pending[1]
+        with self._reader() as conn:
+            row = conn.execute("SELECT url FROM urls WHERE code = ?", (short_code,)).fetchone()
+        return None if row is None else row[0]
+
+    def _enqueue(
+        self, short_code: str, original_url: str | None, expires_at: float | None = None
+    ) -> None:
+        with self._lock:
+            self._seq += 1
+            self._pending[short_code] = (self._seq, original_url, expires_at)
+            self._queue.put((self._seq, short_code, original_url, expires_at))
+
+    def put(self, short_code: str, original_url: str, expires_at: float | None = None) -> None:
+        self._enqueue(short_code, original_url, expires_at)
+
+    def delete(self, short_code: str) -> bool:
+        if self.get(short_code) is None:
+            return False
+        self._enqueue(short_code, None)
+        return True
+
+    def expires_at(self, short_code: str) -> float | None:
+        pending = self._pending.get(short_code)
+        if pending is not None:
+            return pending[2]
+        with self._reader() as conn:
+            row = conn.execute(
+                "SELECT expires_at FROM urls WHERE code = ?", (short_code,)
+            ).fetchone()
+        return None if row is None else row[0]
+
+    def deadlines(self) -> Iterator[tuple[str, float]]:
+        """(code, deadline) of every stored link that expires, queued changes included."""
+        with self._lock:
+            pending = dict(self._pending)
+        with self._reader() as conn:
+            rows = conn.execute(
+                "SELECT code, expires_at FROM urls WHERE expires_at IS NOT NULL"
+            ).fetchall()
+        for short_code, expires_at in rows:
+            if short_code not in pending:
+                yield short_code, expires_at
+        for short_code, (_, original_url, expires_at) in pending.items():
+            if original_url is not None and expires_at is not None:
+                yield short_code, expires_at
+
+    def durable(self) -> Future:
+        """Future resolved once every change queued so far has been committed."""
+        future: Future = Future()
+        with self._lock:
+            if self._committed >= self._seq:
+                future.set_result(None)
+            else:
+                self._waiters.append((self._seq, future))
+        return future
+
+    def flush(self) -> None:
+        """Block until every queued change is committed."""
+        self.durable().result()
+
+    def _run_writer(self) -> None:
+        conn = _connect(self.path)
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            stop = False
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                try:
+                    item = (
+                        self._queue.get(timeout=timeout)
+                        if timeout > 0
+                        else self._queue.get_nowait()
+                    )
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+            self._commit(conn, batch)
+            if stop:
+                break
+        conn.close()
+
+    def _commit(
+        self, conn: sqlite3.Connection, batch: list[tuple[int, str, str | None, float | None]]
+    ) -> None:
+        error: Exception | None = None
+        try:
+            conn.execute("BEGIN")
+            for _, short_code, original_url, expires_at in batch:
+                if original_url is None:
+                    conn.execute("DELETE FROM urls WHERE code = ?", (short_code,))
+                else:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO urls VALUES (?, ?, ?)",
+                        (short_code, original_url, expires_at),
+                    )
+            conn.execute("COMMIT")
+            self.commits += 1
+        except sqlite3.Error as exc:
+            with suppress(sqlite3.Error):
+                conn.execute("ROLLBACK")
+            error = exc
+        last = batch[-1][0]
+        with self._lock:
+            for seq, short_code, *_ in batch:
+                if self._pending.get(short_code, (None,))[0] == seq:
+                    del self._pending[short_code]
+            self._committed = last
+            ready = [future for seq, future in self._waiters if seq <= last]
+            self._waiters = [(seq, future) for seq, future in self._waiters if seq > last]
+        for future in ready:
+            if error is None:
+                future.set_result(None)
+            else:
+                future.set_exception(error)
+
+    def reserve(self, length: int, count: int) -> range:
+        """CounterSource for the allocator, persisted in the same database."""
+        with self._counter_lock:
+            conn = self._counter_conn
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT next FROM counters WHERE length = ?", (length,)).fetchone()
+            start = row[0] if row else 0
+            end = min(start + count, tier_size(length))
+            conn.execute("INSERT OR REPLACE INTO counters VALUES (?, ?)", (length, max(start, end)))
+            conn.execute("COMMIT")
+        return range(start, end)
+
+    def __contains__(self, short_code: object) -> bool:
+        return isinstance(short_code, str) and self.get(short_code) is not None
+
+    def __len__(self) -> int:
+        """Committed rows counted with the queued changes applied, without waiting for them."""
+        with self._lock:
+            pending = dict(self._pending)
+        with self._reader() as conn:
+            # One read transaction, so the count and the lookups see the same commit
+            conn.execute("BEGIN")
+            try:
+                count = conn.execute("SELECT COUNT(*) FROM urls").fetchone()[0]
+                for short_code, (_, original_url, _) in pending.items():
+                    stored = conn.execute("SELECT 1 FROM urls WHERE code = ?", (short_code,))
+                    count += (original_url is not None) - (stored.fetchone() is not None)
+            finally:
+                conn.execute("COMMIT")
+        return count
+
+    def items(self) -> Iterator[tuple[str, str]]:
+        """Committed rows with the queued changes laid over them, without waiting for them."""
+        with self._lock:
+            pending = dict(self._pending)
+        with self._reader() as conn:
+            for short_code, original_url in conn.execute("SELECT code, url FROM urls"):
+                if short_code not in pending:
+                    yield short_code, original_url
+        for short_code, (_, original_url, _) in pending.items():
+            if original_url is not None:
+                yield short_code, original_url
+
+    def close(self) -> None:
+        self._queue.put(_STOP)
+        self._writer.join()
+        while not self._readers.empty():
+            self._readers.get().close()
+        self._counter_conn.close()
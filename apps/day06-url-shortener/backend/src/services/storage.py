@@ -0,0 +1,652 @@
+"""Storage backends for short code -> original URL mappings."""
+
+import hashlib
+import mmap
+import os
+import shutil
+import struct
+import threading
+import time
+import traceback
+import zlib
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future
+from pathlib import Path
+from typing import BinaryIO, Protocol
+
+
+class StoreFullError(RuntimeError):
+    """The store has no room left for another link."""
+
+
+class URLStore(Protocol):
+    """Interface every storage backend used by URLService implements."""
+
+    def get(self, short_code: str) -> str | None: ...
+
+    def put(self, short_code: str, original_url: str) -> None: ...
+
+    def delete(self, short_code: str) -> bool: ...
+
+    def __contains__(self, short_code: object) -> bool: ...
+
+    def __len__(self) -> int: ...
+
+    def items(self) -> Iterator[tuple[str, str]]: ...
+
+    def close(self) -> None: ...
+
+
+class MemoryStore:
+    """Plain dict-backed store. Fast, but everything is lost on restart."""
+
+    def __init__(self) -> None:
+        self._urls: dict[str, str] = {}
+
+    def get(self, short_code: str) -> str | None:
+        return self._urls.get(short_code)
+
+    def put(self, short_code: str, original_url: str) -> None:
+        self._urls[short_code] = original_url
+
+    def delete(self, short_code: str) -> bool:
+        return self._urls.pop(short_code, None) is not None
+
+    def put_new(self, rows: dict[str, str]) -> dict[str, str]:
+        """Add every row whose code is free; return the stored URL of each one that is not."""
+        urls = self._urls
+        taken = {short_code: urls[short_code] for short_code in urls.keys() & rows.keys()}
+        if taken:
+            urls.update((code, url) for code, url in rows.items() if code not in taken)
+        else:
+            urls.update(rows)
+        return taken
+
+    def __contains__(self, short_code: object) -> bool:
+        return short_code in self._urls
+
+    def __len__(self) -> int:
+        return len(self._urls)
+
+    def items(self) -> Iterator[tuple[str, str]]:
+        # A copy, so a scan on another thread (the negative cache build) never sees the
+        # dict change size under it
+        return iter(list(self._urls.items()))
+
+    def close(self) -> None:
+        pass
+
+
+# Log record: crc32 of everything after the crc, op, code length, url length, then payload.
+# An expiring put's url field starts with its deadline (epoch seconds, a double).
+RECORD_HEADER = struct.Struct("<IBHI")
+DEADLINE = struct.Struct("<d")
+OP_PUT = 1
+OP_DELETE = 2
+OP_PUT_EXPIRING = 3
+
+# Log file header: magic, offset of the first record, and an id kept across rotations.
+# Offsets ("log offsets") count record bytes since the log was created, so they stay
+# valid when a compaction drops the records before a checkpoint.
+LOG_MAGIC = b"URLLOG01"
+LOG_HEADER = struct.Struct("<8sQ8s")
+
+# Index file: magic, log offset it covers, entry count and where the deadlines start; then
+# (hash, record offset) pairs sorted by hash; then the (code, url) records themselves; then
+# a (code length, deadline) header and the code of every expiring link. Version 1 files
+# have no deadlines and a shorter header.
+INDEX_MAGIC = b"URLIDX02"
+INDEX_MAGIC_V1 = b"URLIDX01"
+INDEX_HEADER = struct.Struct("<8sQQQ")
+INDEX_HEADER_V1 = struct.Struct("<8sQQ")
+INDEX_ENTRY = struct.Struct("<QQ")
+INDEX_RECORD = struct.Struct("<HI")
+INDEX_DEADLINE = struct.Struct("<Hd")
+# Rows written, total rows and seconds taken, shared between a snapshot child and its parent
+PROGRESS = struct.Struct("<QQd")
+
+
+def encode_record(
+    op: int, short_code: str, original_url: str = "", expires_at: float | None = None
+) -> bytes:
+    """Serialize one log record; a put with `expires_at` is written as OP_PUT_EXPIRING."""
+    code = short_code.encode()
+    url = original_url.encode()
+    if op == OP_PUT and expires_at is not None:
+        op = OP_PUT_EXPIRING
+        url = DEADLINE.pack(expires_at) + url
+    body = RECORD_HEADER.pack(0, op, len(code), len(url))[4:] + code + url
+    return struct.pack("<I", zlib.crc32(body)) + body
+
+
+def decode_records(
+    buf: bytes | memoryview, start: int = 0
+) -> Iterator[tuple[int, int, str, str, float | None]]:
+    """Yield (end_offset, op, code, url, expires_at) for every intact record in buf.
+
+    Expiring puts come out as OP_PUT with their deadline. Stops at the first incomplete
+    or corrupt record; the caller can compare the last end_offset with len(buf) to detect
+    a torn tail.
+    """
+    pos = start
+    size = len(buf)
+    while pos + RECORD_HEADER.size <= size:
+        crc, op, code_len, url_len = RECORD_HEADER.unpack_from(buf, pos)
+        end = pos + RECORD_HEADER.size + code_len + url_len
+        if (
+            end > size
+            or zlib.crc32(buf[pos + 4 : end]) != crc
+            or op not in (OP_PUT, OP_DELETE, OP_PUT_EXPIRING)
+            or op == OP_PUT_EXPIRING
+            and url_len < DEADLINE.size
+        ):
+            return
+        payload = pos + RECORD_HEADER.size
+        code = bytes(buf[payload : payload + code_len]).decode()
+        payload += code_len
+        expires_at = None
+        if op == OP_PUT_EXPIRING:
+            op = OP_PUT
+            (expires_at,) = DEADLINE.unpack_from(buf, payload)
+            payload += DEADLINE.size
+        url = bytes(buf[payload:end]).decode()
+        yield end, op, code, url, expires_at
+        pos = end
+
+
+def read_log_header(f: BinaryIO) -> tuple[int, int, bytes]:
+    """(header size, log offset of the first record, log id) of an open log file.
+
+    Logs written before compaction existed have no header: they start at offset 0 and
+    the file's identity stands in for the id.
+    """
+    f.seek(0)
+    header = f.read(LOG_HEADER.size)
+    if len(header) == LOG_HEADER.size and header.startswith(LOG_MAGIC):
+        _, base, log_id = LOG_HEADER.unpack(header)
+        return LOG_HEADER.size, base, log_id
+    stat = os.fstat(f.fileno())
+    return 0, 0, f"{stat.st_dev}:{stat.st_ino}".encode()
+
+
+def code_hash(short_code: str) -> int:
+    """Stable 64-bit hash used to order the index file."""
+    return int.from_bytes(hashlib.blake2b(short_code.encode(), digest_size=8).digest(), "little")
+
+
+def write_index(
+    path: Path,
+    items: Iterator[tuple[str, str]],
+    log_offset: int,
+    progress: mmap.mmap | None = None,
+    deadlines: Iterable[tuple[str, float]] = (),
+) -> int:
+    """Atomically write a compact, hash-sorted index file and return its entry count.
+
+    `deadlines` holds the expiry of every link in `items` that has one.
+    """
+    rows = sorted((code_hash(code), code.encode(), url.encode()) for code, url in items)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp, "wb") as f:
+        offset = INDEX_HEADER.size + INDEX_ENTRY.size * len(rows)
+        end = offset + sum(INDEX_RECORD.size + len(code) + len(url) for _, code, url in rows)
+        f.write(INDEX_HEADER.pack(INDEX_MAGIC, log_offset, len(rows), end))
+        for h, code, url in rows:
+            f.write(INDEX_ENTRY.pack(h, offset))
+            offset += INDEX_RECORD.size + len(code) + len(url)
+        for i, (_, code, url) in enumerate(rows):
+            f.write(INDEX_RECORD.pack(len(code), len(url)) + code + url)
+            if progress is not None and not i % 4096:
+                PROGRESS.pack_into(progress, 0, i, len(rows), 0.0)
+        for short_code, expires_at in deadlines:
+            code = short_code.encode()
+            f.write(INDEX_DEADLINE.pack(len(code), expires_at) + code)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    _fsync_dir(path.parent)
+    return len(rows)
+
+
+def _fsync_dir(directory: Path) -> None:
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class _Index:
+    """Read-only view over a memory-mapped index file."""
+
+    def __init__(self, path: Path) -> None:
+        self.log_offset = 0
+        self.count = 0
+        # Expiring links are few, so their deadlines are read into memory up front
+        self.deadlines: dict[str, float] = {}
+        self._entries = INDEX_HEADER.size
+        self._mm: mmap.mmap | None = None
+        if not path.exists():
+            return
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic = self._mm[:8]
+        if magic == INDEX_MAGIC_V1:
+            _, self.log_offset, self.count = INDEX_HEADER_V1.unpack_from(self._mm, 0)
+            self._entries = INDEX_HEADER_V1.size
+        elif magic == INDEX_MAGIC:
+            _, self.log_offset, self.count, pos = INDEX_HEADER.unpack_from(self._mm, 0)
+            while pos < len(self._mm):
+                code_len, expires_at = INDEX_DEADLINE.unpack_from(self._mm, pos)
+                pos += INDEX_DEADLINE.size + code_len
+                self.deadlines[self._mm[pos - code_len : pos].decode()] = expires_at
+        else:
+            raise ValueError(f"{path} is not a URL index file")
+
+    def _entry(self, i: int) -> tuple[int, int]:
+        return INDEX_ENTRY.unpack_from(self._mm, self._entries + i * INDEX_ENTRY.size)
+
+    def _record(self, offset: int) -> tuple[str, str]:
+        code_len, url_len = INDEX_RECORD.unpack_from(self._mm, offset)
+        start = offset + INDEX_RECORD.size
+        code = self._mm[start : start + code_len].decode()
+        return code, self._mm[start + code_len : start + code_len + url_len].decode()
+
+    def get(self, short_code: str) -> str | None:
+        if not self.count:
+            return None
+        target = code_hash(short_code)
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._entry(mid)[0] < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        while lo < self.count:
+            h, offset = self._entry(lo)
+            if h != target:
+                return None
+            code, url = self._record(offset)
+            if code == short_code:
+                return url
+            lo += 1
+        return None
+
+    def items(self) -> Iterator[tuple[str, str]]:
+        for i in range(self.count):
+            _, offset = self._entry(i)
+            yield self._record(offset)
+
+    def close(self) -> None:
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+
+
+class LogStore:
+    """Durable store: an append-only log plus a periodically rewritten, memory-mapped index.
+
+    Writes are appended to ``urls.log`` and fsynced in batches (every ``sync_every`` records
+    or ``sync_interval`` seconds, whichever comes first); a background thread syncs
+    records that no later write comes to flush. ``durable()`` returns a future resolved
+    once everything written so far is on disk, and asks that thread to sync right away,
+    so waiters arriving during one fsync share the next. Every ``checkpoint_every`` records
+    the live dataset is written to ``urls.idx``, so startup only maps the index and replays
+    the log written after it. A torn or corrupt final record is truncated on recovery.
+    Deadlines of expiring links are part of their put records and of the index, and are
+    kept in memory (``deadlines()``) so a restarted service can schedule them again.
+    Once an index is in place the log is compacted: the records after it are copied to a
+    new ``urls.log`` that replaces the old one, so the log never outgrows one checkpoint
+    interval (plus the writes made while the snapshot ran).
+
+    Automatic checkpoints run as ``bgsave``: the process forks and the child writes the
+    index from its copy-on-write view of the dataset while the parent keeps serving.
+    Writes made meanwhile stay in the parent's tail and in the log after the snapshot's
+    offset, and the new index is swapped in once the child exits successfully. After a
+    failed one the next waits for another ``checkpoint_every`` records in the tail rather
+    than forking again on every write.
+    """
+
+    def __init__(
+        self,
+        directory: str | Path,
+        sync_every: int = 64,
+        sync_interval: float = 0.05,
+        checkpoint_every: int = 100_000,
+    ) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.log_path = self.directory / "urls.log"
+        self.index_path = self.directory / "urls.idx"
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self.checkpoint_every = checkpoint_every
+        self.truncated_bytes = 0
+        self.bgsaves = 0
+        self.compactions = 0
+        self.last_bgsave_ok: bool | None = None
+        self.last_bgsave_duration: float | None = None
+
+        self._lock = threading.Lock()
+        self._index = _Index(self.index_path)
+        # Mutations newer than the index: code -> url, or None for a delete.
+        self._tail: dict[str, str | None] = {}
+        self._count = self._index.count
+        # Deadline of every live expiring link, index and tail alike
+        self._deadlines = dict(self._index.deadlines)
+        # Running snapshot: child pid, start time, shared progress counters, and the
+        # mutations made since the fork (the new index will not contain them)
+        self._bgsave_pid: int | None = None
+        self._bgsave_started = 0.0
+        self._bgsave_progress = mmap.mmap(-1, PROGRESS.size)
+        self._since_fork: dict[str, str | None] = {}
+        # Tail size that starts the next bgsave; pushed back after a failure
+        self._checkpoint_at = checkpoint_every
+        self._replay()
+
+        self._log = open(self.log_path, "ab")
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._waiters: list[Future] = []
+        self._wake = threading.Condition(self._lock)
+        self._syncer = threading.Thread(target=self._run_syncer, name="logstore-sync", daemon=True)
+        self._syncer.start()
+
+    def _replay(self) -> None:
+        if not self.log_path.exists() or not self.log_path.stat().st_size:
+            with open(self.log_path, "wb") as f:
+                f.write(LOG_HEADER.pack(LOG_MAGIC, 0, os.urandom(8)))
+                f.flush()
+                os.fsync(f.fileno())
+        with open(self.log_path, "r+b") as f:
+            self._log_start, self._log_base, self.log_id = read_log_header(f)
+            if self._index.log_offset < self._log_base:
+                raise ValueError(f"{self.index_path} is older than {self.log_path}")
+            start = self._log_start + self._index.log_offset - self._log_base
+            f.seek(start)
+            buf = f.read()
+            good = 0
+            for good, op, code, url, expires_at in decode_records(buf):
+                self._apply(op, code, url, expires_at)
+            if good < len(buf):
+                self.truncated_bytes = len(buf) - good
+                f.truncate(start + good)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _apply(
+        self, op: int, short_code: str, original_url: str, expires_at: float | None = None
+    ) -> None:
+        existed = short_code in self
+        value = original_url if op == OP_PUT else None
+        self._tail[short_code] = value
+        if self._bgsave_pid is not None:
+            self._since_fork[short_code] = value
+        self._count += (not existed) if op == OP_PUT else -existed
+        if expires_at is not None:
+            self._deadlines[short_code] = expires_at
+        elif self._deadlines:
+            self._deadlines.pop(short_code, None)
+
+    def _append(
+        self, op: int, short_code: str, original_url: str = "", expires_at: float | None = None
+    ) -> None:
+        with self._lock:
+            self._log.write(encode_record(op, short_code, original_url, expires_at))
+            self._apply(op, short_code, original_url, expires_at)
+            self._unsynced += 1
+            if (
+                self._unsynced >= self.sync_every
+                or time.monotonic() - self._last_sync >= self.sync_interval
+            ):
+                self._sync_locked()
+            elif self._unsynced == 1:
+                self._wake.notify()
+        if self._bgsave_pid is not None:
+            self.poll_bgsave()
+        elif len(self._tail) >= self._checkpoint_at:
+            self.bgsave()
+
+    def _sync_locked(self) -> None:
+        waiters, self._waiters = self._waiters, []
+        try:
+            self._log.flush()
+            os.fsync(self._log.fileno())
+        except OSError as exc:
+            for future in waiters:
+                future.set_exception(exc)
+            raise
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        for future in waiters:
+            future.set_result(None)
+
+    def _run_syncer(self) -> None:
+        """Sync records left unsynced for `sync_interval`, or at once when someone waits."""
+        with self._lock:
+            while not self._log.closed:
+                if not self._unsynced:
+                    self._wake.wait()
+                    continue
+                delay = self._last_sync + self.sync_interval - time.monotonic()
+                if delay > 0 and not self._waiters:
+                    self._wake.wait(delay)
+                    continue
+                try:
+                    self._sync_locked()
+                except OSError:
+                    traceback.print_exc()  # the waiters got the error; the next write retries
+                    self._wake.wait(self.sync_interval)
+
+    def durable(self) -> Future:
+        """Future resolved once every record written so far has been fsynced."""
+        future: Future = Future()
+        with self._lock:
+            if self._unsynced:
+                self._waiters.append(future)
+                self._wake.notify()
+            else:
+                future.set_result(None)
+        return future
+
+    def sync(self) -> None:
+        """Force every buffered record to disk."""
+        with self._lock:
+            if self._unsynced:
+                self._sync_locked()
+
+    @property
+    def log_offset(self) -> int:
+        """Log offset just past the last record written."""
+        return self._log_base + self._log.tell() - self._log_start
+
+    def _compact_locked(self) -> None:
+        """Replace the log with the records written after the current index."""
+        self._sync_locked()
+        log_offset = self._index.log_offset
+        if log_offset == self._log_base and self._log_start:
+            return
+        if not self._log_start:
+            self.log_id = os.urandom(8)  # a header-less log gets an id with its first header
+        tmp = self.log_path.with_suffix(self.log_path.suffix + ".tmp")
+        # Appends go to the new file object, which keeps its inode through the rename
+        new = open(tmp, "wb")
+        try:
+            with open(self.log_path, "rb") as old:
+                old.seek(self._log_start + log_offset - self._log_base)
+                new.write(LOG_HEADER.pack(LOG_MAGIC, log_offset, self.log_id))
+                shutil.copyfileobj(old, new)
+            new.flush()
+            os.fsync(new.fileno())
+            os.replace(tmp, self.log_path)
+        except BaseException:
+            new.close()
+            tmp.unlink(missing_ok=True)
+            raise
+        self._log.close()
+        self._log = new
+        self._log_start, self._log_base = LOG_HEADER.size, log_offset
+        self.compactions += 1
+        _fsync_dir(self.directory)
+
+    def checkpoint(self) -> None:
+        """Rewrite the index with the full live dataset, drop the tail and compact the log."""
+        self.poll_bgsave(wait=True)
+        with self._lock:
+            self._sync_locked()
+            write_index(
+                self.index_path, self.items(), self.log_offset, deadlines=self._deadlines.items()
+            )
+            self._index.close()
+            self._index = _Index(self.index_path)
+            self._tail.clear()
+            self._compact_locked()
+
+    def bgsave(self) -> bool:
+        """Start writing the index from a forked child; False if one is already running."""
+        with self._lock:
+            if self._bgsave_pid is not None:
+                return False
+            self._sync_locked()
+            log_offset = self.log_offset
+            PROGRESS.pack_into(self._bgsave_progress, 0, 0, self._count, 0.0)
+            self._bgsave_started = time.monotonic()
+            pid = os.fork()
+            if pid == 0:
+                # Child: only touch the copy-on-write snapshot, never the parent's locks
+                status = 1
+                try:
+                    progress = self._bgsave_progress
+                    rows = write_index(
+                        self.index_path, self.items(), log_offset, progress, self._deadlines.items()
+                    )
+                    elapsed = time.monotonic() - self._bgsave_started
+                    PROGRESS.pack_into(progress, 0, rows, rows, elapsed)
+                    status = 0
+                except BaseException:
+                    traceback.print_exc()
+                finally:
+                    os._exit(status)
+            self._bgsave_pid = pid
+            self._since_fork = {}
+            self.bgsaves += 1
+            return True
+
+    def poll_bgsave(self, wait: bool = False) -> bool:
+        """Reap a finished snapshot and swap its index in; True while one is still running."""
+        with self._lock:
+            if self._bgsave_pid is None:
+                return False
+            pid, status = os.waitpid(self._bgsave_pid, 0 if wait else os.WNOHANG)
+            if pid == 0:
+                return True
+            self.last_bgsave_ok = os.waitstatus_to_exitcode(status) == 0
+            # The child records how long the write took; reaping may happen much later
+            self.last_bgsave_duration = PROGRESS.unpack_from(self._bgsave_progress, 0)[2]
+            if self.last_bgsave_ok:
+                self._index.close()
+                self._index = _Index(self.index_path)
+                self._tail = self._since_fork
+                self._checkpoint_at = self.checkpoint_every
+                try:
+                    self._compact_locked()
+                except OSError:
+                    traceback.print_exc()  # the old log stays valid; the next checkpoint retries
+            else:
+                self._checkpoint_at = len(self._tail) + self.checkpoint_every
+            self._bgsave_pid = None
+            self._since_fork = {}
+            return False
+
+    @property
+    def bgsave_progress(self) -> tuple[int, int] | None:
+        """(rows written, total rows) of the running snapshot, or None if idle."""
+        if self._bgsave_pid is None:
+            return None
+        return PROGRESS.unpack_from(self._bgsave_progress, 0)[:2]
+
+    @property
+    def bgsave_elapsed(self) -> float | None:
+        if self._bgsave_pid is None:
+            return None
+        return time.monotonic() - self._bgsave_started
+
+    def get(self, short_code: str) -> str | None:
+        if short_code in self._tail:
+            return self._tail[short_code]
+        return self._index.get(short_code)
+
+    def put(self, short_code: str, original_url: str, expires_at: float | None = None) -> None:
+        self._append(OP_PUT, short_code, original_url, expires_at)
+
+    def delete(self, short_code: str) -> bool:
+        if short_code not in self:
+            return False
+        self._append(OP_DELETE, short_code)
+        return True
+
+    def expires_at(self, short_code: str) -> float | None:
+        return self._deadlines.get(short_code)
+
+    def deadlines(self) -> Iterator[tuple[str, float]]:
+        """(code, deadline) of every stored link that expires."""
+        return iter(list(self._deadlines.items()))
+
+    def __contains__(self, short_code: object) -> bool:
+        return isinstance(short_code, str) and self.get(short_code) is not None
+
+    def __len__(self) -> int:
+        return self._count
+
+    def items(self) -> Iterator[tuple[str, str]]:
+        tail = dict(self._tail)
+        for code, url in self._index.items():
+            if code not in tail:
+                yield code, url
+        for code, url in tail.items():
+            if url is not None:
+                yield code, url
+
+    def close(self) -> None:
+        self.poll_bgsave(wait=True)
+        with self._lock:
+            if self._log.closed:
+                return
+            self._sync_locked()
+            self._log.close()
+            self._wake.notify()
+        self._syncer.join()
+        self._index.close()
+
+
+def store_from_env() -> URLStore:
+    """Pick the storage backend from the environment.
+
+    ``URL_SHORTENER_DATA_DIR`` enables the durable log store and ``URL_SHORTENER_SQLITE=<path>``
+    a SQLite database; otherwise links live in memory:
+    with ``URL_SHORTENER_SHM=<name>`` in a shared-memory table every worker attaches to,
+    with ``URL_SHORTENER_STORE=arena`` in the compact ArenaStore, else in a dict.
+    """
+    data_dir = os.environ.get("URL_SHORTENER_DATA_DIR")
+    if data_dir:
+        return LogStore(data_dir)
+    sqlite_path = os.environ.get("URL_SHORTENER_SQLITE")
+    if sqlite_path:
+        from .sqlite_store import SQLiteStore
+
+        return SQLiteStore(sqlite_path)
+    shm_name = os.environ.get("URL_SHORTENER_SHM")
+    if shm_name:
+        from .shm_store import SharedMemoryStore
+
+        return SharedMemoryStore(
+            shm_name,
+            slots=int(os.environ.get("URL_SHORTENER_SHM_SLOTS", 1 << 20)),
+            heap_bytes=int(os.environ.get("URL_SHORTENER_SHM_HEAP_MB", 256)) << 20,
+        )
+    if os.environ.get("URL_SHORTENER_STORE") == "arena":
+        from .arena_store import ArenaStore
+
+        return ArenaStore()
+    return MemoryStore()
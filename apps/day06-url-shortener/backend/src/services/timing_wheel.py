@@ -0,0 +1,99 @@
+"""Hierarchical timing wheel for link expiry."""
+
+import math
+import time
+
+
+class TimingWheel:
+    """Schedules keys for expiry in O(1) and expires them in O(levels) each.
+
+    Level 0 has ``slots`` buckets of one ``tick`` each; every level above covers ``slots``
+    times the span of the one below. A deadline goes into the coarsest level it fits and
+    cascades one level down each time the lower wheel wraps, so advancing the clock only
+    touches buckets that are due rather than scanning every scheduled key. Deadlines past
+    the top level wait in an overflow bucket that is re-filed on each top-level wrap.
+
+    Rescheduling or cancelling a key is lazy: the bucket entry stays behind and is
+    ignored when it comes due because it no longer matches ``deadline(key)``.
+    """
+
+    def __init__(
+        self, tick: float = 1.0, slots: int = 64, levels: int = 4, now: float | None = None
+    ) -> None:
+        self.tick = tick
+        self.slots = slots
+        self.levels = levels
+        self._current = self._to_tick(time.time() if now is None else now)
+        self._wheels: list[list[list[tuple[str, float]]]] = [
+            [[] for _ in range(slots)] for _ in range(levels)
+        ]
+        self._overflow: list[tuple[str, float]] = []
+        self._deadlines: dict[str, float] = {}
+
+    def _to_tick(self, timestamp: float) -> int:
+        return math.ceil(timestamp / self.tick)
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._deadlines
+
+    def deadline(self, key: str) -> float | None:
+        """Exact deadline of `key`; the wheel itself only resolves it to the next tick."""
+        return self._deadlines.get(key)
+
+    def schedule(self, key: str, deadline: float) -> None:
+        """Expire `key` at `deadline` (epoch seconds), replacing any earlier schedule."""
+        self._deadlines[key] = deadline
+        # The current tick's bucket has already been emptied, so the earliest slot is next
+        self._file(key, deadline, self._current + 1)
+
+    def cancel(self, key: str) -> None:
+        self._deadlines.pop(key, None)
+
+    def _file(self, key: str, deadline: float, earliest: int) -> None:
+        deadline_tick = max(self._to_tick(deadline), earliest)
+        delta = deadline_tick - self._current
+        span = 1
+        for level in range(self.levels):
+            if delta < span * self.slots:
+                self._wheels[level][(deadline_tick // span) % self.slots].append((key, deadline))
+                return
+            span *= self.slots
+        self._overflow.append((key, deadline))
+
+    def advance(self, now: float | None = None) -> list[str]:
+        """Move the clock to `now` and return every key whose deadline has passed."""
+        target = self._to_tick(time.time() if now is None else now)
+        expired: list[str] = []
+        if not self._deadlines:
+            self._current = max(self._current, target)
+            return expired
+        while self._current < target:
+            self._current += 1
+            self._cascade()
+            bucket = self._wheels[0][self._current % self.slots]
+            if bucket:
+                self._wheels[0][self._current % self.slots] = []
+                for key, deadline in bucket:
+                    if self._deadlines.get(key) == deadline:
+                        del self._deadlines[key]
+                        expired.append(key)
+        return expired
+
+    def _cascade(self) -> None:
+        span = 1
+        for level in range(1, self.levels + 1):
+            span *= self.slots
+            if self._current % span:
+                return
+            if level == self.levels:
+                bucket, self._overflow = self._overflow, []
+            else:
+                index = (self._current // span) % self.slots
+                bucket = self._wheels[level][index]
+                self._wheels[level][index] = []
+            for key, deadline in bucket:
+                if self._deadlines.get(key) == deadline:
+                    self._file(key, deadline, self._current)
@@ -1,36 +1,466 @@
-import random
-import string
+import asyncio
+import os
+import threading
+import time
+from collections.abc import Callable, Collection, Iterator
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any
+
+from .allocator import CodeAllocator, allocator_from_env
+from .cache import TinyLFUCache
+from .dedup import ReverseIndex
+from .filters import CuckooFilter
+from .sorted_index import SortedCodeIndex
+from .sqlite_store import SQLiteStore
+from .storage import LogStore, MemoryStore, URLStore, store_from_env
+from .timing_wheel import TimingWheel
+
+if TYPE_CHECKING:
+    from .sharding import ShardedURLService
+
+# Stores with at least this many links build the negative cache on a background thread
+BACKGROUND_FILTER_BUILD = 50_000
 
 
 class URLService:
     """Service for managing URL shortening operations."""
 
-    def __init__(self) -> None:
-        # In-memory storage: {short_code: original_url}
-        self._urls: dict[str, str] = {}
+    def __init__(
+        self,
+        store: URLStore | None = None,
+        allocator: CodeAllocator | None = None,
+        dedup: bool = False,
+        cache_size: int = 0,
+    ) -> None:
+        # Pluggable storage: {short_code: original_url}
+        self._store: URLStore = store if store is not None else MemoryStore()
+        self._allocator = allocator if allocator is not None else CodeAllocator()
+        # Ordered view of the codes for keyset pagination, built on first use
+        self._order: SortedCodeIndex | None = None
+        # A store shared between worker processes changes under our feet, so per-process
+        # views of it catch up with its journal (ordering) or are skipped (negative cache)
+        self._shared = getattr(self._store, "shared", False)
+        self._order_changes = 0
+        # Opt-in: shortening a URL that is already stored returns its existing code
+        self._dedup: ReverseIndex | None = None
+        if dedup:
+            self._dedup = ReverseIndex(self._store.get)
+            for short_code, original_url in self._store.items():
+                self._dedup.add(original_url, short_code)
+        # Expiring links: deadline per code, reaped through the timing wheel. Stores that
+        # keep deadlines with their records (log, SQLite, shared memory) survive restarts
+        # and share them between workers; their links are scheduled again here.
+        self._expiry = TimingWheel()
+        self._keeps_deadlines = hasattr(self._store, "deadlines")
+        if self._keeps_deadlines:
+            for short_code, deadline in self._store.deadlines():
+                self._expiry.schedule(short_code, deadline)
+        # Negative cache: codes the filter rules out are answered without a store lookup.
+        # None means "maybe present": while it is (re)built, lookups go to the store.
+        self._known: CuckooFilter | None = None
+        self._filter_lock = threading.Lock()
+        # Codes added while a background build runs, or None if none is running
+        self._filter_pending: list[str] | None = None
+        self._filter_builds = 0
+        self._rebuild_filter()
+        self.filter_rejections = 0
+        self.filter_false_positives = 0
+        # Hot links cached in front of stores where a lookup costs I/O
+        self.cache: TinyLFUCache | None = None
+        if cache_size and not self._shared:
+            self.cache = TinyLFUCache(cache_size)
+        # Called with the code of every deleted or reaped link (e.g. to drop its clicks)
+        self.on_delete: Callable[[str], None] | None = None
 
-    def generate_short_code(self, length: int = 6) -> str:
-        """Generate a random short code."""
-        characters = string.ascii_letters + string.digits
-        while True:
-            code = "".join(random.choices(characters, k=length))
-            if code not in self._urls:
-                return code
+    def _build_filter(self, capacity: int) -> CuckooFilter:
+        known = CuckooFilter(max(capacity * 2, 1024))
+        known.add_many(short_code for short_code, _ in self._store.items())
+        return known
+
+    def _rebuild_filter(self) -> None:
+        """Replace the negative cache with one sized for the store.
+
+        Small stores are scanned in place. Larger ones are scanned on a thread, so neither
+        startup nor the request that fills the filter waits for it; codes added meanwhile
+        are queued and added before the new filter is swapped in. Codes deleted meanwhile
+        may stay in it, which only costs a store lookup when they are asked for.
+        """
+        if self._shared:
+            return
+        count = len(self._store)
+        with self._filter_lock:
+            self._filter_builds += 1
+            if count < BACKGROUND_FILTER_BUILD:
+                self._filter_pending = None
+                self._known = self._build_filter(count)
+                return
+            self._known = None
+            self._filter_pending = []
+            build = self._filter_builds
+        threading.Thread(
+            target=self._build_filter_thread, args=(count, build), name="filter-build", daemon=True
+        ).start()
+
+    def _build_filter_thread(self, capacity: int, build: int) -> None:
+        for attempt in range(3):
+            try:
+                known = self._build_filter(capacity)
+                break
+            except ValueError:
+                # A checkpoint closed the log store's index under the scan
+                if attempt == 2:
+                    raise
+        with self._filter_lock:
+            if build != self._filter_builds:
+                return  # superseded by a later build or a bulk load
+            pending, self._filter_pending = self._filter_pending, None
+            if known.add_many(pending):
+                self._known = known
+                return
+        self._rebuild_filter()  # outgrown while it was being built
+
+    def _remember(self, short_codes: Collection[str]) -> None:
+        known = self._known
+        if known is None:
+            if self._filter_pending is None:
+                return
+            with self._filter_lock:
+                if self._filter_pending is not None:
+                    self._filter_pending.extend(short_codes)
+                    return
+                known = self._known
+                if known is None:
+                    return
+        if len(known) + len(short_codes) > known.capacity or not known.add_many(short_codes):
+            # Resize once for the whole batch rather than code by code
+            self._rebuild_filter()
+
+    def generate_short_code(self, length: int | None = None) -> str:
+        """Allocate a fresh short code, skipping any that an import has already taken."""
+        short_code = self._allocator.allocate(length)
+        while self._is_taken(short_code):
+            short_code = self._allocator.allocate(length)
+        return short_code
+
+    def _is_taken(self, short_code: str) -> bool:
+        # Allocated codes never repeat, so only imported codes can be in the way; the
+        # negative cache rules almost every fresh code out without a store lookup
+        known = self._known
+        if known is not None and not known.might_contain(short_code):
+            return False
+        return short_code in self._store
+
+    def create_short_url(self, original_url: str, ttl: float | None = None) -> str:
+        """Create a shortened URL and return the short code.
 
-    def create_short_url(self, original_url: str) -> str:
-        """Create a shortened URL and return the short code."""
+        With `ttl` (seconds) the link stops resolving once it has expired. Expiring links
+        are never deduplicated, in either direction.
+        """
+        if ttl is None and self._dedup is not None:
+            existing = self._dedup.get(original_url)
+            if existing is not None:
+                return existing
         short_code = self.generate_short_code()
-        self._urls[short_code] = original_url
+        self.put_short_url(short_code, original_url, ttl)
         return short_code
 
+    def put_short_url(
+        self,
+        short_code: str,
+        original_url: str,
+        ttl: float | None = None,
+        expires_at: float | None = None,
+    ) -> None:
+        """Store a link under a code chosen by the caller (e.g. a sharding router).
+
+        It expires after `ttl` seconds or at `expires_at` (epoch seconds), if either is given.
+        """
+        if ttl is not None:
+            expires_at = time.time() + ttl
+        self._put(short_code, original_url, dedup=expires_at is None, expires_at=expires_at)
+        if expires_at is not None:
+            self._expiry.schedule(short_code, expires_at)
+        elif self._expiry:
+            self._expiry.cancel(short_code)
+
+    def add_short_url(self, short_code: str, original_url: str, ttl: float | None = None) -> bool:
+        """Like put_short_url, but leaves a code that is already taken alone; False if it was."""
+        if self._is_taken(short_code):
+            return False
+        self.put_short_url(short_code, original_url, ttl)
+        return True
+
+    def create_many(self, original_urls: list[str]) -> list[str]:
+        """Create shortened URLs for a batch, allocating all codes in one go."""
+        if self._dedup is not None:
+            return [self.create_short_url(original_url) for original_url in original_urls]
+        short_codes = self._allocator.allocate_many(len(original_urls))
+        for i, (short_code, original_url) in enumerate(zip(short_codes, original_urls)):
+            if self._is_taken(short_code):
+                short_code = short_codes[i] = self.generate_short_code()
+            self._put(short_code, original_url)
+        return short_codes
+
+    @contextmanager
+    def bulk_load(self) -> Iterator[None]:
+        """Skip negative cache upkeep during a large import and rebuild it once afterwards.
+
+        Lookups go straight to the store in the meantime.
+        """
+        with self._filter_lock:
+            self._filter_builds += 1  # drops the result of a build still running
+            self._filter_pending = None
+            self._known = None
+        try:
+            yield
+        finally:
+            self._rebuild_filter()
+
+    def import_links(self, rows: dict[str, str]) -> dict[str, str]:
+        """Store links under the codes they already have (e.g. from another shortener).
+
+        Codes that are already taken keep their link; they are returned with the URL they
+        point at, so the caller can tell a repeated import from a conflict.
+        """
+        put_new = getattr(self._store, "put_new", None)
+        if put_new is not None:
+            taken = put_new(rows)
+        else:
+            taken = {}
+            for short_code, original_url in rows.items():
+                existing = self._store.get(short_code)
+                if existing is None:
+                    self._store.put(short_code, original_url)
+                else:
+                    taken[short_code] = existing
+        added = rows.keys() - taken.keys() if taken else rows.keys()
+        self._remember(added)
+        if self._dedup is not None:
+            for short_code in added:
+                self._dedup.add(rows[short_code], short_code)
+        if added:
+            # Cheaper to re-sort once on the next listing than to insert code by code
+            self._order = None
+        return taken
+
+    async def wait_durable(self) -> None:
+        """Wait until every write so far is on disk, for stores that commit in the background."""
+        durable = getattr(self._store, "durable", None)
+        if durable is not None:
+            await asyncio.wrap_future(durable())
+
+    async def offload[T](self, function: Callable[..., T], *args: Any) -> T:
+        """Call `function` from async code; local stores answer in place, without a thread hop."""
+        return function(*args)
+
+    def _put(
+        self,
+        short_code: str,
+        original_url: str,
+        dedup: bool = True,
+        expires_at: float | None = None,
+    ) -> None:
+        is_new = short_code not in self._store
+        if self._keeps_deadlines:
+            self._store.put(short_code, original_url, expires_at)
+        else:
+            self._store.put(short_code, original_url)
+        if is_new:
+            self._remember((short_code,))
+        elif self.cache is not None:
+            self.cache.invalidate(short_code)
+        if self._order is not None:
+            self._order.add(short_code)
+        if dedup and self._dedup is not None:
+            self._dedup.add(original_url, short_code)
+
     def get_original_url(self, short_code: str) -> str | None:
-        """Get the original URL from a short code."""
-        return self._urls.get(short_code)
+        """Get the original URL from a short code (None once the link has expired)."""
+        known = self._known
+        if known is not None and not known.might_contain(short_code):
+            self.filter_rejections += 1
+            return None
+        if self._expiry and self._is_expired(short_code):
+            return None
+        if self.cache is not None:
+            original_url = self.cache.get(short_code)
+            if original_url is not None:
+                return original_url
+        original_url = self._store.get(short_code)
+        if original_url is None:
+            if known is not None:
+                self.filter_false_positives += 1
+        elif self.cache is not None:
+            self.cache.put(short_code, original_url)
+        return original_url
+
+    @property
+    def filter_false_positive_rate(self) -> float:
+        """Share of lookups for missing codes that the filter failed to rule out."""
+        misses = self.filter_rejections + self.filter_false_positives
+        return self.filter_false_positives / misses if misses else 0.0
+
+    @property
+    def negative_cache(self) -> CuckooFilter | None:
+        return self._known
+
+    def _is_expired(self, short_code: str) -> bool:
+        deadline = self._expiry.deadline(short_code)
+        return deadline is not None and deadline <= time.time()
+
+    def expires_at(self, short_code: str) -> float | None:
+        """Expiry time (epoch seconds) of a link, or None if it never expires."""
+        if self._shared:
+            # Other workers' links are only in the store, not in this process's wheel
+            return self._store.expires_at(short_code)
+        return self._expiry.deadline(short_code)
+
+    def delete_short_url(self, short_code: str) -> bool:
+        """Remove a link and every index entry that points at it."""
+        # A shared store hides expired links from get, but they still have to be deleted
+        original_url = self._store.get(short_code)
+        if not self._store.delete(short_code):
+            return False
+        if self.cache is not None:
+            self.cache.invalidate(short_code)
+        known = self._known
+        if known is not None:
+            known.remove(short_code)
+        self._expiry.cancel(short_code)
+        if self._order is not None:
+            self._order.discard(short_code)
+        if self._dedup is not None and original_url is not None:
+            self._dedup.discard(original_url, short_code)
+        if self.on_delete is not None:
+            self.on_delete(short_code)
+        return True
+
+    def reap_expired(self, now: float | None = None) -> int:
+        """Delete every link whose TTL has passed; returns how many were removed."""
+        return len(self.reap_expired_codes(now))
+
+    def reap_expired_codes(self, now: float | None = None) -> list[str]:
+        """Like reap_expired, but returns the codes removed."""
+        expired = self._expiry.advance(now)
+        for short_code in expired:
+            self.delete_short_url(short_code)
+        return expired
+
+    async def run_reaper(self, interval: float = 1.0) -> None:
+        """Background task: reap expired links every `interval` seconds until cancelled."""
+        while True:
+            self.reap_expired()
+            await asyncio.sleep(interval)
 
     def list_all_urls(self) -> dict[str, str]:
         """List all stored URLs."""
-        return self._urls.copy()
+        if not self._expiry:
+            return dict(self._store.items())
+        return {code: url for code, url in self._store.items() if not self._is_expired(code)}
+
+    def _ordered(self) -> SortedCodeIndex:
+        if self._shared and self._order is not None:
+            # Apply other workers' writes, or rescan if more happened than the journal holds
+            changes = self._store.changes_since(self._order_changes)
+            if changes is None:
+                self._order = None
+            else:
+                self._order_changes, delta = changes
+                for short_code, deleted in delta:
+                    if deleted:
+                        self._order.discard(short_code)
+                    else:
+                        self._order.add(short_code)
+        if self._order is None:
+            if self._shared:
+                # Counted before the scan: writes that race it are replayed next time
+                self._order_changes = self._store.changes
+            self._order = SortedCodeIndex(code for code, _ in self._store.items())
+        return self._order
+
+    def list_urls_page(
+        self, after: str | None = None, limit: int = 100
+    ) -> list[tuple[str, str, float | None]]:
+        """Return up to `limit` (code, url, expires_at) rows ordered by code, after `after`.
+
+        Expired links the reaper has not deleted yet are skipped without shortening the
+        page: the index is read on past them until `limit` live links are found.
+        """
+        ordered = self._ordered()
+        page: list[tuple[str, str, float | None]] = []
+        while True:
+            codes = ordered.page(after, limit)
+            for code in codes:
+                original_url = self.get_original_url(code)
+                if original_url is not None:
+                    page.append((code, original_url, self.expires_at(code)))
+                    if len(page) == limit:
+                        return page
+            if len(codes) < limit:
+                return page
+            after = codes[-1]
+
+    def iter_urls(self, after: str | None = None) -> Iterator[tuple[str, str]]:
+        """Lazily iterate (code, url) pairs ordered by code, without copying the store."""
+        for code in self._ordered().iter_from(after):
+            original_url = self.get_original_url(code)
+            if original_url is not None:
+                yield code, original_url
+
+    def __len__(self) -> int:
+        """Stored links, including expired ones the reaper has not deleted yet."""
+        return len(self._store)
+
+    @property
+    def allocator(self) -> CodeAllocator:
+        return self._allocator
+
+    @property
+    def code_rule(self) -> tuple[str, str] | None:
+        """(regex, description) of the codes the store can hold, if it narrows them."""
+        pattern = getattr(self._store, "code_pattern", None)
+        return None if pattern is None else (pattern, self._store.code_rule)
+
+    @property
+    def snapshots(self) -> LogStore | None:
+        """The store, if it can take background snapshots."""
+        return self._store if isinstance(self._store, LogStore) else None
+
+    def close(self) -> None:
+        """Flush and release the storage backend."""
+        self._store.close()
+
+
+def service_from_env() -> "URLService | ShardedURLService":
+    """Build the service for the app from the environment.
+
+    ``URL_SHORTENER_SHARDS`` (comma-separated Unix socket paths or ``host:port``) routes
+    links to running shards instead of a local store.
+    """
+    shards = os.environ.get("URL_SHORTENER_SHARDS")
+    if shards:
+        from .sharding import ShardedURLService, parse_address
+
+        addresses = [parse_address(address) for address in shards.split(",")]
+        return ShardedURLService(
+            {f"shard{i}": address for i, address in enumerate(addresses)},
+            allocator=allocator_from_env(),
+        )
+    store = store_from_env()
+    # Cache hot links by default only where a store lookup leaves the process heap
+    persistent = isinstance(store, LogStore | SQLiteStore)
+    return URLService(
+        store=store,
+        allocator=allocator_from_env(store),
+        dedup=os.environ.get("URL_SHORTENER_DEDUP") == "1",
+        cache_size=int(os.environ.get("URL_SHORTENER_CACHE_SIZE", 10_000 if persistent else 0)),
+    )
 
 
-# Global instance
-url_service = URLService()
+def __getattr__(name: str) -> "URLService | ShardedURLService":
+    # The app's global instance is built on first use, so processes that only import this
+    # module (read replicas, shard servers) open no storage of their own
+    if name == "url_service":
+        service = globals()["url_service"] = service_from_env()
+        return service
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,95 @@
+import multiprocessing
+
+import pytest
+
+from src.services.allocator import (
+    ALPHABET,
+    CodeAllocator,
+    FeistelPermutation,
+    FileCounterSource,
+    LocalCounterSource,
+    decode_base62,
+    encode_base62,
+)
+
+
+def test_base62_roundtrip():
+    """Test that encoding pads to the requested length and decodes back."""
+    assert encode_base62(0, 3) == "000"
+    assert decode_base62(encode_base62(123456, 6)) == 123456
+
+
+@pytest.mark.parametrize("length", [1, 2])
+def test_feistel_is_a_bijection(length):
+    """Test that the permutation maps every counter in a tier to a distinct code."""
+    perm = FeistelPermutation(b"k" * 16, length)
+    outputs = {perm(i) for i in range(perm.size)}
+    assert outputs == set(range(perm.size))
+
+
+def test_same_key_gives_same_codes():
+    """Test that the sequence is reproducible for a given key."""
+    a = CodeAllocator(key=b"secret")
+    b = CodeAllocator(key=b"secret")
+    assert a.allocate_many(20) == b.allocate_many(20)
+
+
+def test_codes_are_not_sequential():
+    """Test that consecutive counters do not produce adjacent codes."""
+    allocator = CodeAllocator(key=b"secret")
+    values = [decode_base62(code) for code in allocator.allocate_many(10)]
+    assert values != sorted(values)
+
+
+def test_grows_length_when_tier_is_exhausted():
+    """Test that the allocator moves to the next length once a tier is used up."""
+    allocator = CodeAllocator(min_length=1)
+    first_tier = allocator.allocate_many(len(ALPHABET))
+    assert set(first_tier) == set(ALPHABET)
+    assert len(allocator.allocate()) == 2
+    assert allocator.current_length == 2
+
+
+def test_explicit_length_shares_tier_counter():
+    """Test that explicit-length codes never collide with later default codes of that length."""
+    source = LocalCounterSource()
+    allocator = CodeAllocator(min_length=1, source=source)
+    explicit = {allocator.allocate(length=2) for _ in range(10)}
+    allocator.allocate_many(len(ALPHABET))
+    later = set(allocator.allocate_many(100))
+    assert not explicit & later
+
+
+def test_workers_leasing_blocks_never_overlap(tmp_path):
+    """Test that allocators sharing a file-backed source hand out disjoint codes."""
+    source = FileCounterSource(tmp_path / "counters.json")
+    workers = [CodeAllocator(key=b"k", source=source, block_size=7) for _ in range(3)]
+    codes = [w.allocate() for _ in range(50) for w in workers]
+    assert len(set(codes)) == len(codes)
+
+
+def _allocate_in_process(path, queue):
+    allocator = CodeAllocator(key=b"k", source=FileCounterSource(path), block_size=10)
+    queue.put(allocator.allocate_many(100))
+
+
+def test_file_source_is_safe_across_processes(tmp_path):
+    """Test that separate processes sharing the counter file never collide."""
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    path = tmp_path / "counters.json"
+    procs = [ctx.Process(target=_allocate_in_process, args=(path, queue)) for _ in range(3)]
+    for proc in procs:
+        proc.start()
+    codes = [code for _ in procs for code in queue.get(timeout=30)]
+    for proc in procs:
+        proc.join()
+    assert len(set(codes)) == 300
+
+
+def test_file_source_survives_restart(tmp_path):
+    """Test that counters persist so a restarted allocator continues where it left off."""
+    path = tmp_path / "counters.json"
+    first = CodeAllocator(key=b"k", source=FileCounterSource(path)).allocate_many(5)
+    second = CodeAllocator(key=b"k", source=FileCounterSource(path)).allocate_many(5)
+    assert not set(first) & set(second)
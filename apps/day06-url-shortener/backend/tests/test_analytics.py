@@ -0,0 +1,82 @@
+from src.services.analytics import ClickAnalytics
+from src.services.sketches import TrafficSketches
+
+
+def test_record_then_drain_counts_clicks():
+    """Test that buffered clicks reach the per-link totals after a drain."""
+    analytics = ClickAnalytics(capacity=16)
+    for code in ["a", "b", "a", "a"]:
+        analytics.record(code)
+    assert analytics.total_clicks("a") == 0
+    assert analytics.drain() == 4
+    assert analytics.total_clicks("a") == 3
+    assert analytics.total_clicks("b") == 1
+    assert analytics.pending == 0
+
+
+def test_full_ring_drops_instead_of_blocking():
+    """Test that overflowing the ring buffer counts dropped events."""
+    analytics = ClickAnalytics(capacity=4)
+    for _ in range(6):
+        analytics.record("a")
+    assert analytics.dropped == 2
+    analytics.drain()
+    assert analytics.total_clicks("a") == 4
+
+
+def test_clicks_per_minute_window():
+    """Test per-minute buckets and expiry of minutes outside the window."""
+    analytics = ClickAnalytics(capacity=16, window_minutes=3)
+    analytics.record("a")
+    analytics.drain()
+    now = analytics.last_click("a")
+    assert analytics.clicks_per_minute("a", now=now) == [(int(now // 60) * 60, 1)]
+    assert analytics.clicks_per_minute("a", now=now + 3 * 60) == []
+
+
+def test_top_links():
+    """Test ranking of the most clicked links."""
+    analytics = ClickAnalytics(capacity=64)
+    for code, clicks in {"a": 3, "b": 7, "c": 1}.items():
+        for _ in range(clicks):
+            analytics.record(code)
+    analytics.drain()
+    assert analytics.top(2) == [("b", 7), ("a", 3)]
+
+
+def test_evict_forgets_a_link_and_keeps_the_others():
+    """Test that evicting a link drops its aggregates, buffered clicks included."""
+    analytics = ClickAnalytics(capacity=64)
+    for code, clicks in {"a": 3, "b": 7, "c": 1}.items():
+        for _ in range(clicks):
+            analytics.record(code)
+    analytics.drain()
+    analytics.record("a")
+    analytics.evict("a")
+    analytics.evict("missing")
+    analytics.drain()
+
+    assert analytics.total_clicks("a") == 0
+    assert analytics.clicks_per_minute("a") == []
+    assert analytics.top(3) == [("b", 7), ("c", 1)]
+    assert len(analytics._link_codes) == len(analytics._totals) == 2
+    now = analytics.last_click("c")
+    assert analytics.clicks_per_minute("c", now=now) == [(int(now // 60) * 60, 1)]
+
+
+def test_evict_removes_a_link_from_the_sketches():
+    """Test that evicting a link drops it from top-N, totals and unique clients."""
+    analytics = ClickAnalytics(capacity=64, sketches=TrafficSketches(top_k=4))
+    for code, clicks in {"a": 5, "b": 2}.items():
+        for i in range(clicks):
+            analytics.record(code, f"client-{i}")
+    analytics.drain()
+    analytics.evict("a")
+    analytics.drain()
+
+    sketches = analytics.sketches
+    assert [code for code, _, _ in sketches.heavy_hitters.top(4)] == ["b"]
+    assert sketches.heavy_hitters.total == sketches.frequencies.total == 2
+    assert sketches.frequencies.estimate("a") == 0
+    assert sketches.unique_clients("a") is None
+    assert sketches.unique_clients("b") == 2
@@ -1,3 +1,11 @@
+import json
+
+from src.main import fast_path
+from src.routes.streaming import MAX_LINE_BYTES
+from src.routes.urls import STORE_FULL
+from src.services.storage import StoreFullError
+
+
 def test_root_endpoint(client):
     """Test the root health check endpoint."""
     response = client.get("/")
@@ -18,6 +26,33 @@ def test_create_short_url(client):
     assert data["short_url"].startswith("/")
 
 
+def test_create_short_url_with_expiry(client):
+    """Test creating expiring links with ttl or expires_at."""
+    response = client.post("/api/shorten", json={"url": "https://example.com", "ttl": 3600})
+    assert response.status_code == 201
+    assert response.json()["expires_at"] is not None
+
+    response = client.post(
+        "/api/shorten", json={"url": "https://example.com", "expires_at": "2000-01-01T00:00:00Z"}
+    )
+    assert response.status_code == 422
+
+    response = client.post("/api/shorten", json={"url": "https://example.com"})
+    assert response.json()["expires_at"] is None
+
+    for ttl in ("Infinity", "NaN", "1e308"):
+        response = client.post(
+            "/api/shorten",
+            content=f'{{"url": "https://example.com", "ttl": {ttl}}}',
+            headers={"content-type": "application/json"},
+        )
+        assert response.status_code == 422
+    response = client.post(
+        "/api/shorten", json={"url": "https://example.com", "expires_at": "9999-01-01T00:00:00Z"}
+    )
+    assert response.status_code == 422
+
+
 def test_create_short_url_invalid_url(client):
     """Test creating a short URL with invalid URL."""
     response = client.post("/api/shorten", json={"url": "not-a-valid-url"})
@@ -61,3 +96,266 @@ def test_redirect_not_found(client):
     """Test redirecting with non-existent short code."""
     response = client.get("/nonexistent")
     assert response.status_code == 404
+
+
+def test_redirect_cors_headers(client):
+    """Test that fast-path redirects and 404s carry CORS headers like routed responses."""
+    origin = {"origin": "http://localhost:5173"}
+    short_code = client.post("/api/shorten", json={"url": "https://example.com"}).json()[
+        "short_code"
+    ]
+    for path in (f"/{short_code}", "/nonexistent", "/"):
+        response = client.get(path, headers=origin, follow_redirects=False)
+        assert response.headers["access-control-allow-origin"] == "http://localhost:5173"
+
+
+def _ndjson(response):
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_batch_shorten_ndjson(client):
+    """Test shortening a streamed NDJSON batch."""
+    body = "\n".join(f'{{"url": "https://example.com/batch/{i}"}}' for i in range(5))
+    response = client.post(
+        "/api/shorten/batch", content=body, headers={"content-type": "application/x-ndjson"}
+    )
+    assert response.status_code == 200
+    rows = _ndjson(response)
+    assert [row["line"] for row in rows] == [1, 2, 3, 4, 5]
+    assert len({row["short_code"] for row in rows}) == 5
+
+    redirect = client.get(rows[2]["short_url"], follow_redirects=False)
+    assert redirect.headers["location"] == "https://example.com/batch/2"
+
+
+def test_batch_shorten_csv(client):
+    """Test shortening a CSV batch with a header row."""
+    body = "url\nhttps://example.com/a\nhttps://example.com/b\n"
+    response = client.post("/api/shorten/batch", content=body, headers={"content-type": "text/csv"})
+    rows = _ndjson(response)
+    assert [row["original_url"] for row in rows] == [
+        "https://example.com/a",
+        "https://example.com/b",
+    ]
+
+
+def test_batch_shorten_reports_invalid_rows(client):
+    """Test that bad rows get an error line without failing the rest of the batch."""
+    body = '{"url": "https://example.com/ok"}\n{"url": "not-a-url"}\nnot json\n'
+    response = client.post("/api/shorten/batch", content=body)
+    rows = _ndjson(response)
+    assert "short_code" in rows[0]
+    assert rows[1]["line"] == 2 and "error" in rows[1]
+    assert rows[2]["line"] == 3 and rows[2]["error"].startswith("Invalid JSON")
+
+
+def test_batch_shorten_reports_undecodable_and_overlong_lines(client):
+    """Test that invalid UTF-8 and overlong lines are row errors, not a failed stream."""
+    overlong = b'{"url": "https://example.com/' + b"x" * (MAX_LINE_BYTES + 1) + b'"}'
+    body = (
+        b'{"url": "https://example.com/\xff"}\n'
+        + overlong
+        + b'\n{"url": "https://example.com/after"}\n'
+    )
+    # Sent in small pieces, so the long line has to be dropped while it is still arriving
+    pieces = (body[i : i + 4096] for i in range(0, len(body), 4096))
+    response = client.post("/api/shorten/batch", content=pieces)
+    rows = _ndjson(response)
+    assert rows[0] == {"line": 1, "error": "Invalid UTF-8"}
+    assert rows[1] == {"line": 2, "error": f"Line longer than {MAX_LINE_BYTES} bytes"}
+    assert rows[2]["line"] == 3 and "short_code" in rows[2]
+
+
+def test_import_and_export(client):
+    """Test importing links under their own codes and exporting them again."""
+    body = "code,url\nimp-a,https://example.com/imported/a\nimp-b,https://example.com/imported/b\n"
+    response = client.post("/api/import", content=body, headers={"content-type": "text/csv"})
+    assert response.status_code == 200
+    assert _ndjson(response)[-1] == {"imported": 2, "unchanged": 0, "conflicts": 0, "errors": 0}
+
+    redirect = client.get("/imp-a", follow_redirects=False)
+    assert redirect.headers["location"] == "https://example.com/imported/a"
+
+    again = client.post("/api/import", content='{"code":"imp-a","url":"https://other.org"}\n')
+    conflict, summary = _ndjson(again)
+    assert conflict == {"line": 1, "code": "imp-a", "conflict": "https://example.com/imported/a"}
+    assert summary["conflicts"] == 1
+
+    exported = _ndjson(client.get("/api/export", params={"format": "ndjson"}))
+    assert {"code": "imp-b", "url": "https://example.com/imported/b"} in exported
+
+
+def test_list_urls_cursor_pagination(client):
+    """Test walking /api/urls page by page with next_cursor."""
+    for i in range(5):
+        client.post("/api/shorten", json={"url": f"https://example.com/page/{i}"})
+
+    seen = []
+    after = None
+    while True:
+        params = {"limit": 2, **({"after": after} if after else {})}
+        data = client.get("/api/urls", params=params).json()
+        seen.extend(item["short_code"] for item in data["urls"])
+        after = data["next_cursor"]
+        if after is None:
+            break
+    assert seen == sorted(seen)
+    assert len(seen) == len(set(seen)) >= 5
+
+
+def test_list_urls_stream_ndjson(client):
+    """Test the streaming NDJSON listing mode."""
+    client.post("/api/shorten", json={"url": "https://example.com/stream"})
+    response = client.get("/api/urls", params={"stream": "ndjson"})
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = _ndjson(response)
+    assert "https://example.com/stream" in [row["original_url"] for row in rows]
+    assert [row["short_code"] for row in rows] == sorted(row["short_code"] for row in rows)
+
+
+def test_fast_path_redirect_skips_fastapi(client, monkeypatch):
+    """Test that known short codes are answered by the ASGI fast lane."""
+    create_response = client.post("/api/shorten", json={"url": "https://example.com/fast"})
+    short_code = create_response.json()["short_code"]
+
+    async def fail(scope, receive, send):
+        raise AssertionError("request reached FastAPI")
+
+    monkeypatch.setattr(fast_path, "app", fail)
+    response = client.get(f"/{short_code}", follow_redirects=False)
+    assert response.status_code == 307
+    assert response.headers["location"] == "https://example.com/fast"
+    assert client.head(f"/{short_code}", follow_redirects=False).status_code == 307
+
+
+def test_fast_path_falls_through_for_app_routes(client):
+    """Test that FastAPI still serves its own paths and misses get the same 404 body."""
+    assert client.get("/docs").status_code == 200
+    assert client.get("/api/urls").status_code == 200
+    assert client.get("/nothere1").json() == {"detail": "Short URL not found"}
+
+
+def test_url_stats_counts_redirects(client):
+    """Test that redirects show up in the per-link stats and top list."""
+    short_code = client.post("/api/shorten", json={"url": "https://example.com/stats"}).json()[
+        "short_code"
+    ]
+    for _ in range(3):
+        client.get(f"/{short_code}", follow_redirects=False)
+
+    stats = client.get(f"/api/urls/{short_code}/stats").json()
+    assert stats["total_clicks"] == 3
+    assert sum(bucket["clicks"] for bucket in stats["clicks_per_minute"]) == 3
+    assert stats["last_click_at"] is not None
+
+    top = client.get("/api/stats/top", params={"n": 50}).json()["links"]
+    assert {"short_code": short_code, "clicks": 3} in top
+
+
+def test_url_stats_not_found(client):
+    """Test stats for an unknown short code."""
+    assert client.get("/api/urls/nothere1/stats").status_code == 404
+
+
+def test_heavy_hitters_and_unique_clients(client):
+    """Test the sketch-backed stats endpoints."""
+    short_code = client.post("/api/shorten", json={"url": "https://example.com/hot"}).json()[
+        "short_code"
+    ]
+    for _ in range(5):
+        client.get(f"/{short_code}", follow_redirects=False)
+
+    hitters = client.get("/api/stats/heavy-hitters", params={"n": 100}).json()
+    assert short_code in [link["short_code"] for link in hitters["links"]]
+    assert hitters["total_clicks"] >= 5
+
+    uniques = client.get(f"/api/stats/uniques/{short_code}").json()
+    assert uniques["unique_clients"] == 1
+
+
+def test_fast_path_rejects_scanner_paths(client, monkeypatch):
+    """Test that unknown paths get a preserialized 404 without reaching FastAPI."""
+
+    async def fail(scope, receive, send):
+        raise AssertionError("request reached FastAPI")
+
+    monkeypatch.setattr(fast_path, "app", fail)
+    response = client.get("/wp-login.php")
+    assert response.status_code == 404
+    assert response.json() == {"detail": "Short URL not found"}
+    assert client.head("/abc123").content == b""
+
+
+def test_fast_path_skips_lookups_for_non_codes(client, monkeypatch):
+    """Test that paths outside the code alphabet miss without a store lookup."""
+
+    def fail(short_code):
+        raise AssertionError(f"looked up {short_code!r}")
+
+    monkeypatch.setattr(fast_path.service, "get_original_url", fail)
+    assert client.get("/wp-login.php").status_code == 404
+    assert client.get("/%C3%A9t%C3%A9").status_code == 404
+
+
+def test_fast_path_quotes_location(client):
+    """Test that ASCII URLs with spaces or control characters are escaped in Location."""
+    fast_path.service.import_links({"quoted1": "https://example.com/a b\tc"})
+    response = client.get("/quoted1", follow_redirects=False)
+    assert response.headers["location"] == "https://example.com/a%20b%09c"
+
+
+def test_full_store_is_reported(client, monkeypatch):
+    """Test that a full store gives 507 on shorten and per-row errors on batch and import."""
+
+    def full(*args):
+        raise StoreFullError("Shared URL table 'test' is full")
+
+    monkeypatch.setattr(fast_path.service, "create_short_url", full)
+    monkeypatch.setattr(fast_path.service, "create_many", full)
+    monkeypatch.setattr(fast_path.service, "import_links", full)
+
+    response = client.post("/api/shorten", json={"url": "https://example.com"})
+    assert response.status_code == 507
+    assert response.json()["detail"] == STORE_FULL
+
+    response = client.post("/api/shorten/batch", content=b'{"url": "https://example.com"}\n')
+    assert [json.loads(line) for line in response.iter_lines()] == [
+        {"line": 1, "error": STORE_FULL}
+    ]
+
+    response = client.post("/api/import", content=b"code,url\nfull01,https://example.com\n")
+    assert json.loads(next(response.iter_lines())) == {"error": STORE_FULL}
+
+
+def test_negative_cache_stats(client):
+    """Test the negative cache metrics endpoint."""
+    client.get("/definitely-missing")
+    response = client.get("/api/stats/negative-cache")
+    assert response.status_code == 200
+
+    data = response.json()
+    assert data["rejected_lookups"] + data["false_positives"] >= 1
+    assert 0 <= data["false_positive_rate"] <= 1
+
+
+def test_snapshot_endpoints_need_log_store(client):
+    """Test that snapshot endpoints 404 when the store cannot take snapshots."""
+    assert client.get("/api/stats/snapshot").status_code == 404
+    assert client.post("/api/snapshot").status_code == 404
+
+
+def test_metrics_endpoint(client):
+    """Test the Prometheus metrics endpoint."""
+    short_code = client.post("/api/shorten", json={"url": "https://example.com"}).json()[
+        "short_code"
+    ]
+    client.get(f"/{short_code}", follow_redirects=False)
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+
+    text = response.text
+    assert 'url_shortener_request_duration_seconds_bucket{route="/api/shorten",le="+Inf"}' in text
+    assert 'url_shortener_request_duration_quantile_seconds{route="/{short_code}",' in text
+    assert "url_shortener_requests_in_flight 1\n" in text  # the /metrics request itself
+    assert "url_shortener_code_space_utilization " in text
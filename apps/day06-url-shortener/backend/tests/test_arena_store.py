@@ -0,0 +1,66 @@
+import random
+
+import pytest
+
+from src.services.arena_store import ArenaStore, pack_code, unpack_code
+from src.services.url_service import URLService
+
+
+def test_pack_code_roundtrip():
+    """Test that packing keeps codes of different lengths distinct."""
+    assert unpack_code(pack_code("0")) == "0"
+    assert unpack_code(pack_code("00")) == "00"
+    assert pack_code("0") != pack_code("00")
+    assert unpack_code(pack_code("zZ9aB3cD4e")) == "zZ9aB3cD4e"
+    with pytest.raises(ValueError):
+        pack_code("not-base62")
+
+
+def test_arena_store_matches_dict():
+    """Test the arena store against a dict under random puts, overwrites and deletes."""
+    store = ArenaStore(capacity=4)
+    expected: dict[str, str] = {}
+    rng = random.Random(7)
+    codes = [f"c{i}" for i in range(500)]
+    for _ in range(3000):
+        code = rng.choice(codes)
+        if rng.random() < 0.2:
+            assert store.delete(code) == (expected.pop(code, None) is not None)
+        else:
+            url = f"https://example.com/{rng.random()}"
+            store.put(code, url)
+            expected[code] = url
+
+    assert len(store) == len(expected)
+    assert dict(store.items()) == expected
+    for code in codes:
+        assert store.get(code) == expected.get(code)
+        assert (code in store) == (code in expected)
+
+
+def test_arena_store_returns_lazy_views():
+    """Test that get_bytes exposes the arena without copying."""
+    store = ArenaStore()
+    store.put("abc", "https://example.com/é")
+    view = store.get_bytes("abc")
+    assert isinstance(view, memoryview)
+    assert bytes(view).decode() == "https://example.com/é"
+    assert store.get("a-b") is None
+
+
+def test_url_service_with_arena_store():
+    """Test that URLService works unchanged on top of the arena store."""
+    service = URLService(store=ArenaStore())
+    code = service.create_short_url("https://example.com/arena")
+    assert service.get_original_url(code) == "https://example.com/arena"
+
+
+def test_views_stay_valid_while_store_grows():
+    """Test that a held memoryview does not block or corrupt later inserts."""
+    store = ArenaStore()
+    store.put("first", "https://example.com/first")
+    view = store.get_bytes("first")
+    for i in range(20000):
+        store.put(f"c{i}", f"https://example.com/{i:0100d}")
+    assert bytes(view) == b"https://example.com/first"
+    assert store.get("c19999").endswith("19999")
@@ -0,0 +1,121 @@
+import json
+
+from src.services import bulk
+from src.services.allocator import CodeAllocator
+from src.services.arena_store import ArenaStore
+from src.services.bulk import BulkImporter, export_chunks
+from src.services.url_service import URLService
+
+
+def run_import(service: URLService, data: bytes, fmt: str, block: int = 7) -> tuple[list, dict]:
+    importer = BulkImporter(service, fmt)
+    problems = []
+    for i in range(0, len(data), block):
+        problems.extend(importer.feed(data[i : i + block]))
+    problems.extend(importer.finish())
+    return problems, importer.summary()
+
+
+def test_export_import_roundtrip(monkeypatch):
+    """Test that an export loads back with the same codes, through many small chunks."""
+    monkeypatch.setattr(bulk, "CHUNK_BYTES", 64)
+    source = URLService()
+    rows = {f"old{i}": f"https://example.com/{i}" for i in range(500)}
+    source.import_links(rows)
+    source.import_links({"q1": 'https://example.com/?a=1,b="2"'})  # needs CSV quoting
+
+    for fmt in ("csv", "ndjson"):
+        data = b"".join(export_chunks(source.iter_urls(), fmt))
+        target = URLService()
+        with target.bulk_load():
+            problems, summary = run_import(target, data, fmt)
+            assert target.negative_cache is None
+        assert target.negative_cache is not None and len(target.negative_cache) == 501
+        assert problems == []
+        assert summary == {"imported": 501, "unchanged": 0, "conflicts": 0, "errors": 0}
+        assert target.list_all_urls() == source.list_all_urls()
+
+
+def test_import_reports_conflicts_and_errors():
+    """Test per-row problems with line numbers, and that repeated rows are not conflicts."""
+    service = URLService()
+    service.import_links({"taken": "https://example.com/first"})
+    data = (
+        b"short_code,original_url,title\n"
+        b"new1,https://example.com/1,One\n"
+        b"taken,https://example.com/other,\n"
+        b"taken,https://example.com/first,\n"
+        b"\n"
+        b"bad code,https://example.com/2,\n"
+        b"new2,ftp://example.com,\n"
+        b"new1,https://example.com/changed,\n"
+    )
+    problems, summary = run_import(service, data, "csv")
+
+    assert summary == {"imported": 1, "unchanged": 1, "conflicts": 2, "errors": 2}
+    assert [(p["line"], p["code"], "error" in p) for p in problems] == [
+        (3, "taken", False),
+        (6, "bad code", True),
+        (7, "new2", True),
+        (8, "new1", False),
+    ]
+    assert problems[0]["conflict"] == "https://example.com/first"
+    assert service.get_original_url("taken") == "https://example.com/first"
+
+
+def test_import_checks_codes_against_the_store():
+    """Test that codes the arena store cannot pack are per-row errors, on both parse paths."""
+    for fmt, data in (
+        ("csv", b"code,url\nok1,https://a.example\nmy-code,https://b.example\n"),
+        (
+            "ndjson",
+            b'{"code":"ok1","url":"https://a.example"}\n'
+            b'{"code":"abcdefghijk","url":"https://b.example"}\n',
+        ),
+    ):
+        service = URLService(store=ArenaStore())
+        problems, summary = run_import(service, data, fmt)
+
+        assert summary == {"imported": 1, "unchanged": 0, "conflicts": 0, "errors": 1}
+        assert problems[0]["line"] == 2 + (fmt == "csv")
+        assert problems[0]["error"] == "Short code must be 1-10 letters or digits"
+        assert service.get_original_url("ok1") == "https://a.example"
+
+
+def test_import_rejects_urls_the_batch_endpoint_rejects():
+    """Test that control characters and bad ports are row errors, even with dedup on."""
+    bad = [
+        "https://example.com/a\x00b",
+        "https://example.com/a\x01b",
+        "https://example.com:99999/",
+        "https://example.com:port/",
+    ]
+    for fmt in ("csv", "ndjson"):
+        if fmt == "csv":
+            lines = ["code,url", "ok1,https://example.com:8080/x"]
+            lines += [f"bad{i},{url}" for i, url in enumerate(bad)]
+        else:
+            rows = [{"code": "ok1", "url": "https://example.com:8080/x"}]
+            rows += [{"code": f"bad{i}", "url": url} for i, url in enumerate(bad)]
+            lines = [json.dumps(row) for row in rows]
+        service = URLService(dedup=True)
+        problems, summary = run_import(service, "\n".join(lines).encode() + b"\n", fmt)
+
+        assert summary == {"imported": 1, "unchanged": 0, "conflicts": 0, "errors": 4}
+        assert [problem["code"] for problem in problems] == ["bad0", "bad1", "bad2", "bad3"]
+        assert service.list_all_urls() == {"ok1": "https://example.com:8080/x"}
+
+
+def test_allocation_skips_imported_codes():
+    """Test that codes handed out after an import never overwrite imported links."""
+    key = b"k" * 16
+    upcoming = CodeAllocator(key=key).allocate_many(20)
+    service = URLService(allocator=CodeAllocator(key=key))
+    service.import_links({code: "https://example.com/imported" for code in upcoming[::2]})
+
+    created = [service.create_short_url(f"https://example.com/{i}") for i in range(5)]
+    created += service.create_many([f"https://example.com/batch/{i}" for i in range(5)])
+    assert sorted(created) == sorted(upcoming[1::2])
+    assert all(
+        service.get_original_url(code) == "https://example.com/imported" for code in upcoming[::2]
+    )
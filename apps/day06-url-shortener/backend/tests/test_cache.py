@@ -0,0 +1,74 @@
+import random
+
+from src.services.cache import LRUCache, TinyLFUCache
+from src.services.url_service import URLService
+
+
+def test_tiny_lfu_get_put_invalidate():
+    """Test basic caching, updates and invalidation."""
+    cache = TinyLFUCache(100)
+    assert cache.get("a") is None
+    cache.put("a", "https://example.com/a")
+    assert cache.get("a") == "https://example.com/a"
+    cache.put("a", "https://example.com/a2")
+    assert cache.get("a") == "https://example.com/a2"
+    cache.invalidate("a")
+    assert cache.get("a") is None
+    assert (cache.hits, cache.misses) == (2, 2)
+
+
+def test_tiny_lfu_stays_bounded():
+    """Test that the cache never holds more than its capacity."""
+    cache = TinyLFUCache(50)
+    for i in range(1000):
+        cache.get(f"k{i}")
+        cache.put(f"k{i}", "v")
+    assert len(cache) <= 50
+    assert cache.evictions > 0
+
+
+def test_tiny_lfu_resists_scans():
+    """Test that a one-off scan does not flush frequently used entries, unlike LRU."""
+    hot = [f"hot{i}" for i in range(50)]
+    tiny = TinyLFUCache(100)
+    lru = LRUCache(100)
+    for cache in (tiny, lru):
+        for _ in range(20):
+            for key in hot:
+                if cache.get(key) is None:
+                    cache.put(key, key)
+        for i in range(1000):
+            if cache.get(f"scan{i}") is None:
+                cache.put(f"scan{i}", "v")
+
+    assert sum(tiny.get(key) is not None for key in hot) >= 45
+    assert sum(lru.get(key) is not None for key in hot) == 0
+
+
+def test_tiny_lfu_beats_lru_on_skewed_trace():
+    """Test a higher hit ratio than LRU on a Zipf-like trace."""
+    rng = random.Random(0)
+    keys = [f"k{i}" for i in range(5000)]
+    weights = [1 / (i + 1) for i in range(5000)]
+    trace = rng.choices(keys, weights, k=50_000)
+    ratios = []
+    for cache in (TinyLFUCache(100), LRUCache(100)):
+        for key in trace:
+            if cache.get(key) is None:
+                cache.put(key, key)
+        ratios.append(cache.hit_ratio)
+    assert ratios[0] > ratios[1]
+
+
+def test_url_service_cache_invalidation():
+    """Test that cached links are dropped on update and delete."""
+    service = URLService(cache_size=100)
+    code = service.create_short_url("https://example.com/old")
+    assert service.get_original_url(code) == "https://example.com/old"
+    assert service.get_original_url(code) == "https://example.com/old"
+    assert service.cache.hits == 1
+
+    service.put_short_url(code, "https://example.com/new")
+    assert service.get_original_url(code) == "https://example.com/new"
+    service.delete_short_url(code)
+    assert service.get_original_url(code) is None
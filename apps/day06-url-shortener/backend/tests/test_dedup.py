@@ -0,0 +1,50 @@
+from src.services import dedup
+from src.services.dedup import ReverseIndex, normalize_url
+from src.services.url_service import URLService
+
+
+def test_normalize_url():
+    """Test that equivalent spellings of a URL normalize to the same string."""
+    assert normalize_url("HTTPS://Example.COM:443") == "https://example.com/"
+    assert normalize_url("http://example.com:8080/a?x=1#frag") == "http://example.com:8080/a?x=1"
+
+
+def test_dedup_returns_existing_code():
+    """Test that shortening the same URL twice returns one code when dedup is on."""
+    service = URLService(dedup=True)
+    first = service.create_short_url("https://example.com/page")
+    assert service.create_short_url("https://EXAMPLE.com/page#top") == first
+    assert (
+        service.create_many(["https://example.com/page", "https://example.com/other"])[0] == first
+    )
+    assert len(service.list_all_urls()) == 2
+
+
+def test_dedup_is_opt_in():
+    """Test that the default service still mints a new code every time."""
+    service = URLService()
+    assert service.create_short_url("https://example.com") != service.create_short_url(
+        "https://example.com"
+    )
+
+
+def test_fingerprint_collision_is_checked_against_stored_url(monkeypatch):
+    """Test that two different URLs sharing a fingerprint keep distinct codes."""
+    monkeypatch.setattr(dedup, "url_fingerprint", lambda url: 42)
+    service = URLService(dedup=True)
+    a = service.create_short_url("https://example.com/a")
+    b = service.create_short_url("https://example.com/b")
+    assert a != b
+    assert service.create_short_url("https://example.com/a") == a
+    assert service.create_short_url("https://example.com/b") == b
+
+
+def test_reverse_index_discard():
+    """Test that discarded entries are no longer returned."""
+    urls = {"abc": "https://example.com/"}
+    index = ReverseIndex(urls.get)
+    index.add("https://example.com/", "abc")
+    assert index.get("https://example.com") == "abc"
+    index.discard("https://example.com/", "abc")
+    assert index.get("https://example.com/") is None
+    assert len(index) == 0
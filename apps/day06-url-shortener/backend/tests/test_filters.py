@@ -0,0 +1,43 @@
+from src.services.filters import CuckooFilter
+
+
+def test_no_false_negatives():
+    """Test that every added key is reported as possibly present."""
+    known = CuckooFilter(10_000)
+    keys = [f"code{i}" for i in range(10_000)]
+    for key in keys:
+        assert known.add(key)
+
+    assert len(known) == 10_000
+    assert all(known.might_contain(key) for key in keys)
+
+
+def test_false_positive_rate_is_small():
+    """Test that absent keys are almost always ruled out."""
+    known = CuckooFilter(10_000)
+    for i in range(10_000):
+        known.add(f"code{i}")
+
+    false_positives = sum(known.might_contain(f"missing{i}") for i in range(100_000))
+    assert false_positives / 100_000 < 0.001
+    assert known.expected_false_positive_rate < 0.001
+
+
+def test_remove():
+    """Test that removed keys are forgotten and others are kept."""
+    known = CuckooFilter()
+    known.add("keep")
+    known.add("drop")
+
+    assert known.remove("drop")
+    assert not known.might_contain("drop")
+    assert known.might_contain("keep")
+    assert not known.remove("never-added")
+
+
+def test_full_filter_reports_failure():
+    """Test that add returns False once the filter cannot take more keys."""
+    known = CuckooFilter(8)
+    results = [known.add(f"code{i}") for i in range(200)]
+    assert False in results
+    assert all(known.might_contain(f"code{i}") for i, ok in enumerate(results) if ok)
@@ -0,0 +1,121 @@
+import asyncio
+import random
+
+from fastapi import FastAPI
+
+from src.fast_path import RedirectFastPath
+from src.services.allocator import CodeAllocator, tier_size
+from src.services.metrics import (
+    BUCKETS,
+    MAX_MICROS,
+    LatencyHistogram,
+    MetricsMiddleware,
+    RequestMetrics,
+    bucket_index,
+    bucket_upper,
+)
+from src.services.url_service import URLService
+
+
+def test_buckets_are_contiguous_and_tight():
+    """Test that every value lands in a bucket whose bounds are within 6.25% of it."""
+    assert bucket_index(MAX_MICROS) == BUCKETS - 1
+    assert bucket_upper(BUCKETS - 1) == MAX_MICROS
+    for index in range(1, BUCKETS):
+        assert bucket_index(bucket_upper(index - 1) + 1) == index
+    rng = random.Random(0)
+    for micros in [0, 1, 31, 32, 33, 1000, 10**6, MAX_MICROS] + [
+        rng.randrange(MAX_MICROS) for _ in range(10_000)
+    ]:
+        upper = bucket_upper(bucket_index(micros))
+        assert micros <= upper <= micros * 1.0625 + 1
+
+
+def test_histogram_quantiles_and_cumulative_counts():
+    """Test quantiles against exact percentiles and the Prometheus `le` counts."""
+    histogram = LatencyHistogram()
+    rng = random.Random(1)
+    values = sorted(int(rng.lognormvariate(7, 1.5)) for _ in range(20_000))
+    for micros in values:
+        histogram.record(micros)
+    for q in (0.5, 0.99, 0.999):
+        exact = values[round(q * len(values)) - 1]
+        assert exact <= histogram.quantile(q) <= exact * 1.0625 + 1
+    bounds = [100, 1000, 10_000, 100_000]
+    for bound, count in zip(bounds, histogram.cumulative(bounds)):
+        # Only the bucket straddling the bound is left out
+        straddling = [v for v in values if bucket_index(v) == bucket_index(bound + 1)]
+        assert sum(v <= bound for v in values) - len(straddling) <= count
+        assert count <= sum(v <= bound for v in values)
+    histogram.record(10**15)
+    assert histogram.quantile(1.0) == MAX_MICROS
+    assert histogram.count == len(values) + 1
+    assert LatencyHistogram().quantile(0.5) == 0
+
+
+def test_middleware_labels_route_templates():
+    """Test that requests are timed per route template, redirects included."""
+    api = FastAPI()
+
+    @api.get("/api/urls/{short_code}")
+    async def get_url(short_code: str) -> dict[str, str]:
+        return {"short_code": short_code}
+
+    @api.get("/{short_code}")
+    async def redirect(short_code: str) -> None: ...
+
+    service = URLService()
+    short_code = service.create_short_url("https://example.com/")
+    metrics = RequestMetrics()
+    app = MetricsMiddleware(RedirectFastPath(api, service, metrics=metrics), metrics)
+
+    async def call(path: str) -> int:
+        sent = []
+
+        async def receive() -> dict:
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message: dict) -> None:
+            sent.append(message)
+
+        scope = {
+            "type": "http",
+            "method": "GET",
+            "path": path,
+            "raw_path": path.encode(),
+            "root_path": "",
+            "query_string": b"",
+            "headers": [],
+        }
+        await app(scope, receive, send)
+        assert metrics.in_flight == 0
+        return sent[0]["status"]
+
+    async def requests() -> None:
+        assert await call(f"/{short_code}") == 307
+        assert await call("/missing") == 404
+        assert await call("/api/urls/a") == 200
+        assert await call("/api/urls/b") == 200
+        assert await call("/no/such/route") == 404
+
+    asyncio.run(requests())
+    assert (metrics.redirect_hits, metrics.redirect_misses) == (1, 1)
+    text = metrics.render(service)
+    assert 'url_shortener_request_duration_seconds_count{route="/{short_code}"} 2' in text
+    assert 'url_shortener_request_duration_seconds_count{route="/api/urls/{short_code}"} 2' in text
+    assert 'url_shortener_request_duration_seconds_count{route="unmatched"} 1' in text
+    assert 'url_shortener_redirects_total{result="hit"} 1' in text
+    assert "url_shortener_links 1\n" in text
+
+
+def test_allocator_utilization():
+    """Test that utilization follows the counter through the current tier."""
+    allocator = CodeAllocator(min_length=2)
+    assert allocator.utilization == 0.0
+    allocator.allocate_many(31)
+    assert allocator.utilization == 31 / tier_size(2)
+    allocator.allocate_many(tier_size(2) - 31)
+    assert allocator.utilization == 1.0
+    allocator.allocate()
+    assert allocator.current_length == 3
+    assert allocator.utilization == 1 / tier_size(3)
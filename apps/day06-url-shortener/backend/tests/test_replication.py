@@ -0,0 +1,206 @@
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+import pytest
+
+from src.services.replication import Replica, ReplicationServer
+from src.services.storage import LogStore
+from src.services.url_service import URLService
+
+BACKEND = Path(__file__).resolve().parents[1]
+
+
+@pytest.fixture
+def primary(tmp_path):
+    store = LogStore(tmp_path / "data", sync_interval=0.01)
+    service = URLService(store=store)
+    server = ReplicationServer(str(tmp_path / "repl.sock"), store, heartbeat_interval=0.05)
+    server.start()
+    yield service, server
+    server.close()
+    service.close()
+
+
+async def until(condition, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached"
+        await asyncio.sleep(0.01)
+
+
+async def following(replica: Replica, steps) -> None:
+    task = asyncio.create_task(replica.run())
+    try:
+        await steps()
+    finally:
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+
+def test_replica_applies_primary_writes(primary):
+    """Test that puts and deletes on the primary reach a replica and lag drops to zero."""
+    service, server = primary
+    codes = service.create_many([f"https://example.com/{i}" for i in range(100)])
+    replica = Replica(server.server_address, retry_interval=0.05)
+
+    async def steps() -> None:
+        await until(lambda: replica.service.get_original_url(codes[-1]) is not None)
+        service.delete_short_url(codes[0])
+        fresh = service.create_short_url("https://example.com/fresh")
+        await until(lambda: replica.service.get_original_url(fresh) is not None)
+        assert replica.service.get_original_url(codes[0]) is None
+        await until(lambda: replica.lag_bytes == 0)
+        assert replica.lag_seconds == 0.0
+        assert replica.connected
+
+    asyncio.run(following(replica, steps))
+    assert replica.service.list_all_urls() == service.list_all_urls()
+
+
+def test_replica_receives_deadlines(primary):
+    """Test that expiring links keep their deadline on a replica, by log and by snapshot."""
+    service, server = primary
+    snapshotted = service.create_short_url("https://example.com/snapshot", ttl=3600)
+    service.snapshots.checkpoint()
+    logged = service.create_short_url("https://example.com/log", ttl=60)
+    replica = Replica(server.server_address, retry_interval=0.05)
+
+    async def steps() -> None:
+        await until(lambda: replica.service.get_original_url(logged) is not None)
+
+    asyncio.run(following(replica, steps))
+    assert replica.snapshots == 1
+    for short_code in (snapshotted, logged):
+        assert replica.service.expires_at(short_code) == service.expires_at(short_code)
+
+
+def test_replica_catches_up_from_snapshot(primary):
+    """Test that a replica far behind reloads the index and drops links deleted meanwhile."""
+    service, server = primary
+    server.max_lag_bytes = 4096
+    codes = service.create_many([f"https://example.com/{i}" for i in range(10)])
+    replica = Replica(server.server_address, retry_interval=0.05)
+
+    async def synced() -> None:
+        await until(lambda: len(replica.service.list_all_urls()) == 10)
+
+    asyncio.run(following(replica, synced))
+    assert replica.snapshots == 1  # a new replica always starts from a snapshot
+
+    # While the replica is away the primary moves well past max_lag_bytes
+    service.delete_short_url(codes[0])
+    service.create_many([f"https://example.com/more/{i}" for i in range(1000)])
+    service.snapshots.checkpoint()
+    latest = service.create_short_url("https://example.com/latest")
+
+    async def caught_up() -> None:
+        await until(lambda: replica.service.get_original_url(latest) is not None)
+
+    asyncio.run(following(replica, caught_up))
+    assert replica.snapshots == 2
+    assert server.snapshots_sent == 2
+    assert replica.service.list_all_urls() == service.list_all_urls()
+
+
+def test_replica_follows_across_log_compaction(primary):
+    """Test that a connected replica keeps tailing the new log after a checkpoint."""
+    service, server = primary
+    first = service.create_short_url("https://example.com/first")
+    replica = Replica(server.server_address, retry_interval=0.05)
+
+    async def steps() -> None:
+        await until(lambda: replica.service.get_original_url(first) is not None)
+        service.snapshots.checkpoint()
+        assert service.snapshots.compactions == 1
+        codes = service.create_many([f"https://example.com/{i}" for i in range(50)])
+        service.delete_short_url(first)
+        await until(lambda: replica.service.get_original_url(codes[-1]) is not None)
+        await until(lambda: replica.lag_bytes == 0)
+
+    asyncio.run(following(replica, steps))
+    assert replica.snapshots == 1
+    assert replica.applied_offset == service.snapshots.log_offset
+    assert replica.service.list_all_urls() == service.list_all_urls()
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_app(app: str, port: int, env: dict[str, str]) -> subprocess.Popen:
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", app, "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND,
+        env={**os.environ, "URL_SHORTENER_ANALYTICS": "0", **env},
+    )
+    deadline = time.monotonic() + 15
+    while True:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/")
+            return process
+        except httpx.TransportError:
+            if time.monotonic() > deadline or process.poll() is not None:
+                process.kill()
+                raise RuntimeError(f"{app} did not start") from None
+            time.sleep(0.1)
+
+
+def test_replica_processes(tmp_path):
+    """Test a primary and a replica app as separate processes."""
+    primary_port, replica_port = free_port(), free_port()
+    primary_url = f"http://127.0.0.1:{primary_port}"
+    replica_url = f"http://127.0.0.1:{replica_port}"
+    socket_path = str(tmp_path / "repl.sock")
+    processes = [
+        start_app(
+            "src.main:app",
+            primary_port,
+            {
+                "URL_SHORTENER_DATA_DIR": str(tmp_path / "data"),
+                "URL_SHORTENER_REPLICATION_LISTEN": socket_path,
+            },
+        )
+    ]
+    try:
+        processes.append(
+            start_app(
+                "src.replica:app",
+                replica_port,
+                {
+                    "URL_SHORTENER_REPLICATE_FROM": socket_path,
+                    "URL_SHORTENER_PRIMARY_URL": primary_url,
+                },
+            )
+        )
+        created = httpx.post(
+            f"{primary_url}/api/shorten", json={"url": "https://example.com/replicated"}
+        )
+        short_code = created.json()["short_code"]
+
+        deadline = time.monotonic() + 5
+        while (response := httpx.get(f"{replica_url}/{short_code}")).status_code == 404:
+            assert time.monotonic() < deadline
+            time.sleep(0.02)
+        assert response.status_code == 307
+        assert response.headers["location"] == "https://example.com/replicated"
+
+        status = httpx.get(f"{replica_url}/api/replication").json()
+        assert status["connected"]
+        assert status["links"] == 1
+
+        write = httpx.post(f"{replica_url}/api/shorten", json={"url": "https://x.org"})
+        assert write.status_code == 307
+        assert write.headers["location"] == f"{primary_url}/api/shorten"
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait()
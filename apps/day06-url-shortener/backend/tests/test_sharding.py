@@ -0,0 +1,214 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi import FastAPI
+
+from src.fast_path import RedirectFastPath
+from src.services import sharding
+from src.services.allocator import CodeAllocator
+from src.services.sharding import HashRing, ShardClient, ShardedURLService, spawn_shard
+
+
+def test_hash_ring_spreads_keys_evenly():
+    """Test that virtual nodes give every node a similar share of keys."""
+    ring = HashRing([f"shard{i}" for i in range(4)])
+    counts: dict[str, int] = {}
+    for i in range(20_000):
+        node = ring.node_for(f"key{i}")
+        counts[node] = counts.get(node, 0) + 1
+
+    assert len(counts) == 4
+    assert all(0.15 < count / 20_000 < 0.35 for count in counts.values())
+
+
+def test_hash_ring_moves_only_affected_keys():
+    """Test that adding or removing a node only moves keys to or from that node."""
+    keys = [f"key{i}" for i in range(20_000)]
+    ring = HashRing([f"shard{i}" for i in range(4)])
+    before = {key: ring.node_for(key) for key in keys}
+
+    ring.add("shard4")
+    after = {key: ring.node_for(key) for key in keys}
+    moved = [key for key in keys if before[key] != after[key]]
+    assert all(after[key] == "shard4" for key in moved)
+    assert 0.1 < len(moved) / len(keys) < 0.3
+
+    ring.remove("shard4")
+    assert {key: ring.node_for(key) for key in keys} == before
+
+
+@pytest.fixture
+def shard_addresses(tmp_path):
+    processes = {}
+
+    def start(name: str) -> str:
+        address = str(tmp_path / f"{name}.sock")
+        processes[name] = spawn_shard(address)
+        return address
+
+    yield start
+    for process in processes.values():
+        process.terminate()
+        process.join()
+
+
+@pytest.fixture
+def sharded(shard_addresses):
+    service = ShardedURLService({f"shard{i}": shard_addresses(f"shard{i}") for i in range(4)})
+    yield service
+    service.close()
+
+
+def test_sharded_service_roundtrip(sharded):
+    """Test create, lookup, ordered listing and delete across 4 shards."""
+    urls = [f"https://example.com/{i}" for i in range(500)]
+    codes = sharded.create_many(urls)
+    single = sharded.create_short_url("https://example.com/single", ttl=60)
+
+    assert all(sharded.get_original_url(code) == url for code, url in zip(codes, urls))
+    assert sharded.expires_at(single) is not None
+    assert {sharded.shard_for(code) for code in codes} == set(sharded.shards)
+
+    page = sharded.list_urls_page(limit=100)
+    assert [code for code, *_ in page] == sorted(codes + [single])[:100]
+    assert len(list(sharded.iter_urls())) == 501
+
+    deleted: list[str] = []
+    sharded.on_delete = deleted.append
+    assert sharded.delete_short_url(codes[0])
+    assert sharded.get_original_url(codes[0]) is None
+    assert sharded.reap_expired() == 0
+    assert deleted == [codes[0]]
+
+
+def test_add_and_remove_shard_rebalances(sharded, shard_addresses, monkeypatch):
+    """Test that joining and leaving shards moves only their share of links, in pages."""
+    codes = sharded.create_many([f"https://example.com/{i}" for i in range(1000)])
+    monkeypatch.setattr(sharding, "SCAN_PAGE_SIZE", 50)
+    frames: list[int] = []
+    call = ShardClient.call
+
+    def record(client, op, *args):
+        if op in ("put_many", "delete_many"):
+            frames.append(len(args[0]))
+        return call(client, op, *args)
+
+    monkeypatch.setattr(ShardClient, "call", record)
+
+    moved = sharded.add_shard("shard4", shard_addresses("shard4"))
+    assert 100 < moved < 300
+    assert sum(sharded.shard_for(code) == "shard4" for code in codes) == moved
+    assert all(sharded.get_original_url(code) is not None for code in codes)
+
+    moved = sharded.remove_shard("shard1")
+    assert moved < 400
+    assert "shard1" not in sharded.shards
+    assert all(sharded.get_original_url(code) is not None for code in codes)
+    assert frames and max(frames) <= 50
+
+
+def test_writes_during_a_move_are_not_lost(sharded, shard_addresses, monkeypatch):
+    """Test that links created or deleted while a shard joins end up on the right shard."""
+    codes = sharded.create_many([f"https://example.com/{i}" for i in range(3000)])
+    export = sharded._export
+    exports: list[ShardClient] = []
+    raced: dict[str, list[str]] = {}
+
+    def export_while_writing(client):
+        yield from export(client)
+        exports.append(client)
+        # Once the unpaused copy has scanned every shard, write as another request would
+        if len(exports) == len(sharded.shards):
+            raced["created"] = sharded.create_many(
+                [f"https://example.com/late/{i}" for i in range(300)]
+            )
+            raced["deleted"] = codes[:300]
+            for code in raced["deleted"]:
+                sharded.delete_short_url(code)
+
+    monkeypatch.setattr(sharded, "_export", export_while_writing)
+    moved = sharded.add_shard("shard4", shard_addresses("shard4"))
+
+    assert moved == sum(
+        sharded.shard_for(code) == "shard4" for code in codes[300:] + raced["created"]
+    )
+    assert all(sharded.get_original_url(code) is not None for code in raced["created"])
+    assert all(sharded.get_original_url(code) is None for code in raced["deleted"])
+    assert len(sharded) == 3000
+
+
+def test_routers_with_colliding_allocators_keep_both_links(shard_addresses):
+    """Test that a code another router already stored is reallocated, not overwritten."""
+    shards = {f"shard{i}": shard_addresses(f"shard{i}") for i in range(2)}
+    # Same key and a counter from 0 in both: the situation after a router restart
+    first = ShardedURLService(shards, allocator=CodeAllocator(key=b"same"))
+    second = ShardedURLService(shards, allocator=CodeAllocator(key=b"same"))
+    try:
+        first_codes = first.create_many([f"https://example.com/first/{i}" for i in range(50)])
+        single = second.create_short_url("https://example.com/second")
+        second_codes = second.create_many([f"https://example.com/second/{i}" for i in range(50)])
+
+        assert single not in first_codes
+        assert not set(first_codes) & set(second_codes)
+        for i, code in enumerate(first_codes):
+            assert first.get_original_url(code) == f"https://example.com/first/{i}"
+        for i, code in enumerate(second_codes):
+            assert first.get_original_url(code) == f"https://example.com/second/{i}"
+    finally:
+        first.close()
+        second.close()
+
+
+def _lookup_throughput(service: ShardedURLService, codes: list[str], seconds: float) -> float:
+    def worker(offset: int) -> int:
+        done = 0
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            service.get_original_url(codes[(offset + done) % len(codes)])
+            done += 1
+        return done
+
+    with ThreadPoolExecutor(8) as pool:
+        return sum(pool.map(worker, range(0, 8000, 1000))) / seconds
+
+
+@pytest.mark.skipif((os.cpu_count() or 1) < 4, reason="needs a core per shard to scale")
+def test_throughput_scales_with_shards(shard_addresses):
+    """Test that 4 shards serve more lookups per second than 1."""
+    one = ShardedURLService({"solo": shard_addresses("solo")})
+    four = ShardedURLService({f"shard{i}": shard_addresses(f"shard{i}") for i in range(4)})
+    urls = [f"https://example.com/{i}" for i in range(2000)]
+
+    single_rate = _lookup_throughput(one, one.create_many(urls), 2.0)
+    sharded_rate = _lookup_throughput(four, four.create_many(urls), 2.0)
+    assert sharded_rate > 1.5 * single_rate
+    one.close()
+    four.close()
+
+
+def test_sharded_redirects_run_off_the_event_loop(sharded):
+    """Test that the fast path's shard lookups leave the event loop free."""
+    short_code = sharded.create_short_url("https://example.com/off-loop")
+    fast_path = RedirectFastPath(FastAPI(), sharded)
+    lookup_threads = []
+    get_original_url = sharded.get_original_url
+
+    def spy(code: str) -> str | None:
+        lookup_threads.append(threading.get_ident())
+        return get_original_url(code)
+
+    sharded.get_original_url = spy
+    statuses = []
+
+    async def send(message: dict) -> None:
+        if message["type"] == "http.response.start":
+            statuses.append(message["status"])
+
+    scope = {"type": "http", "method": "GET", "path": f"/{short_code}"}
+    asyncio.run(fast_path(scope, None, send))
+    assert statuses == [307]
+    assert lookup_threads and lookup_threads[0] != threading.get_ident()
@@ -0,0 +1,130 @@
+import multiprocessing
+import time
+import uuid
+
+import pytest
+
+from src.services.allocator import allocator_from_env
+from src.services.shm_store import JOURNAL_ENTRIES, SharedMemoryStore
+from src.services.storage import StoreFullError
+from src.services.url_service import URLService
+
+
+@pytest.fixture
+def shm_name():
+    name = f"urltest-{uuid.uuid4().hex[:12]}"
+    yield name
+    store = SharedMemoryStore(name, slots=1024, heap_bytes=1 << 20)
+    store.close()
+    store.unlink()
+
+
+def test_shared_store_roundtrip(shm_name):
+    """Test basic put/get/delete/items on the shared-memory store."""
+    store = SharedMemoryStore(shm_name, slots=1024, heap_bytes=1 << 20)
+    store.put("abc123", "https://example.com/1")
+    store.put("def456", "https://example.com/2")
+    store.put("abc123", "https://example.com/1b")
+
+    assert store.get("abc123") == "https://example.com/1b"
+    assert "def456" in store
+    assert len(store) == 2
+    assert store.delete("def456")
+    assert not store.delete("def456")
+    assert dict(store.items()) == {"abc123": "https://example.com/1b"}
+    store.close()
+
+
+def test_shared_store_is_seen_by_second_handle(shm_name):
+    """Test that a second attachment sees writes from the first one."""
+    writer = SharedMemoryStore(shm_name, slots=1024, heap_bytes=1 << 20)
+    reader = SharedMemoryStore(shm_name)
+    writer.put("abc123", "https://example.com/é")
+
+    assert reader.get("abc123") == "https://example.com/é"
+    assert reader.key == writer.key
+    writer.close()
+    reader.close()
+
+
+def test_shared_store_reports_full_table(shm_name):
+    """Test that put raises instead of growing past the table's load limit."""
+    store = SharedMemoryStore(shm_name, slots=16, heap_bytes=1 << 16)
+    with pytest.raises(StoreFullError):
+        for i in range(16):
+            store.put(f"code{i}", "https://example.com")
+    assert len(store) == 11
+    store.close()
+
+
+def test_shared_store_expires_links_in_every_worker(shm_name):
+    """Test that a deadline set through one worker holds in another and after a restart."""
+    first = URLService(store=SharedMemoryStore(shm_name, slots=1024, heap_bytes=1 << 20))
+    second = URLService(store=SharedMemoryStore(shm_name))
+    brief = first.create_short_url("https://example.com/brief", ttl=0.05)
+    week = first.create_short_url("https://example.com/week", ttl=7 * 86400)
+
+    assert second.expires_at(week) == first.expires_at(week)
+    assert second.get_original_url(brief) == "https://example.com/brief"
+    time.sleep(0.06)
+    assert second.get_original_url(brief) is None
+    assert brief not in second.list_all_urls()
+    assert [code for code, *_ in second.list_urls_page()] == [week]
+
+    # A worker started later schedules the stored deadlines and reaps them
+    third = URLService(store=SharedMemoryStore(shm_name))
+    assert third.reap_expired_codes(now=time.time() + 1) == [brief]
+    assert len(first) == 1
+    for service in (first, second, third):
+        service.close()
+
+
+def test_listing_catches_up_with_other_workers(shm_name):
+    """Test that a worker's ordered index applies other workers' writes without rescanning."""
+    first = URLService(store=SharedMemoryStore(shm_name, slots=1 << 14, heap_bytes=1 << 22))
+    second = URLService(store=SharedMemoryStore(shm_name))
+    codes = first.create_many([f"https://example.com/{i}" for i in range(100)])
+    assert len(second.list_urls_page(limit=1000)) == 100
+    order = second._order
+
+    first.delete_short_url(codes[0])
+    added = first.create_short_url("https://example.com/added")
+    listed = [code for code, *_ in second.list_urls_page(limit=1000)]
+    assert listed == sorted(set(codes[1:]) | {added})
+    assert second._order is order
+
+    # More writes than the journal keeps: the index is rebuilt from the table
+    first.create_many([f"https://example.com/more/{i}" for i in range(JOURNAL_ENTRIES + 1)])
+    assert len(second.list_urls_page(limit=10_000)) == 100 + JOURNAL_ENTRIES + 1
+    assert second._order is not order
+    first.close()
+    second.close()
+
+
+def _worker(name: str, count: int, results) -> None:
+    store = SharedMemoryStore(name)
+    service = URLService(store=store, allocator=allocator_from_env(store))
+    codes = [service.create_short_url(f"https://example.com/{name}/{i}") for i in range(count)]
+    results.put(codes)
+    store.close()
+
+
+def test_workers_share_one_table(shm_name):
+    """Test that links created in several processes are visible to all of them."""
+    parent = SharedMemoryStore(shm_name, slots=4096, heap_bytes=1 << 20)
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    workers = [context.Process(target=_worker, args=(shm_name, 200, results)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    codes = [code for _ in workers for code in results.get(timeout=60)]
+    for worker in workers:
+        worker.join(timeout=60)
+        assert worker.exitcode == 0
+
+    assert len(set(codes)) == 800
+    assert len(parent) == 800
+    service = URLService(store=parent, allocator=allocator_from_env(parent))
+    assert all(service.get_original_url(code) is not None for code in codes)
+    assert len(service.list_urls_page(limit=1000)) == 800
+    parent.close()
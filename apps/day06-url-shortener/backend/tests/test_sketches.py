@@ -0,0 +1,77 @@
+import math
+import random
+from collections import Counter
+
+from src.services.sketches import CountMinSketch, HyperLogLog, SpaceSaving, TrafficSketches
+
+
+def _zipf_stream(n_events: int, n_items: int, seed: int = 1) -> list[str]:
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(n_items)]
+    return [f"code{i}" for i in rng.choices(range(n_items), weights=weights, k=n_events)]
+
+
+def test_count_min_error_bound():
+    """Test that Count-Min never underestimates and stays within epsilon * N."""
+    stream = _zipf_stream(50_000, 5_000)
+    exact = Counter(stream)
+    sketch = CountMinSketch(width=1024, depth=5)
+    for item in stream:
+        sketch.add(item)
+
+    bound = sketch.epsilon * len(stream)
+    over_bound = 0
+    for item, count in exact.items():
+        estimate = sketch.estimate(item)
+        assert estimate >= count
+        over_bound += estimate - count > bound
+    # Allowed failure rate is delta per item; leave generous slack
+    assert over_bound <= max(1, 5 * sketch.delta * len(exact))
+
+
+def test_space_saving_finds_heavy_hitters():
+    """Test that every item above N/k is reported with a bounded overestimate."""
+    stream = _zipf_stream(50_000, 5_000)
+    exact = Counter(stream)
+    k = 50
+    summary = SpaceSaving(k)
+    for item in stream:
+        summary.add(item)
+
+    reported = {item: (count, error) for item, count, error in summary.top(k)}
+    for item, count in exact.items():
+        if count > len(stream) / k:
+            assert item in reported
+    for item, (count, error) in reported.items():
+        assert count - error <= exact[item] <= count
+        assert error <= len(stream) / k
+
+    true_top = [item for item, _ in exact.most_common(5)]
+    assert [item for item, _, _ in summary.top(5)] == true_top
+
+
+def test_hyperloglog_error_bound():
+    """Test HLL estimates stay within 3 standard errors of the exact distinct count."""
+    for distinct in (100, 5_000, 50_000):
+        hll = HyperLogLog(precision=12)
+        for i in range(distinct):
+            hll.add(f"client-{i}")
+            hll.add(f"client-{i // 2}")  # repeats must not count twice
+        assert abs(hll.count() - distinct) <= 3 * hll.relative_error * distinct + 1
+
+
+def test_hyperloglog_standard_error_matches_precision():
+    """Test the documented relative error formula."""
+    assert math.isclose(HyperLogLog(10).relative_error, 1.04 / 32)
+
+
+def test_traffic_sketches_bound_tracked_links():
+    """Test that per-link HLLs are capped and the coldest link is evicted."""
+    sketches = TrafficSketches(max_tracked_links=2, hll_precision=4)
+    sketches.add("a", "1.1.1.1")
+    sketches.add("b", "1.1.1.1")
+    sketches.add("a", "2.2.2.2")
+    sketches.add("c", "1.1.1.1")
+    assert sketches.unique_clients("b") is None
+    assert sketches.unique_clients("a") == 2
+    assert sketches.memory_bytes >= 2 * 16
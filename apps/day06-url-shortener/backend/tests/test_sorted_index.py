@@ -0,0 +1,37 @@
+import random
+
+from src.services.sorted_index import SortedCodeIndex
+
+
+def test_pages_follow_sorted_order():
+    """Test that paging with cursors walks every code exactly once, in order."""
+    codes = [f"{random.random():.12f}" for _ in range(5000)]
+    index = SortedCodeIndex(load=16)
+    for code in codes:
+        index.add(code)
+
+    seen = []
+    after = None
+    while page := index.page(after, 333):
+        seen.extend(page)
+        after = page[-1]
+    assert seen == sorted(set(codes))
+    assert len(index) == len(set(codes))
+
+
+def test_add_is_idempotent_and_discard_removes():
+    """Test set semantics for add and discard."""
+    index = SortedCodeIndex(["b", "a"], load=2)
+    index.add("a")
+    index.add("c")
+    assert len(index) == 3
+    index.discard("b")
+    index.discard("zzz")
+    assert "b" not in index
+    assert list(index.iter_from()) == ["a", "c"]
+
+
+def test_iter_from_cursor():
+    """Test iterating from a cursor that is not itself in the index."""
+    index = SortedCodeIndex(["a", "c", "e", "g"], load=2)
+    assert list(index.iter_from("d", page_size=1)) == ["e", "g"]
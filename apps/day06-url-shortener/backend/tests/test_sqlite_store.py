@@ -0,0 +1,120 @@
+import asyncio
+import sqlite3
+import time
+
+from src.services.allocator import allocator_from_env
+from src.services.sqlite_store import SQLiteStore
+from src.services.url_service import URLService
+
+
+def test_sqlite_store_survives_restart(tmp_path):
+    """Test that committed mappings are read back after reopening."""
+    store = SQLiteStore(tmp_path / "urls.db")
+    store.put("abc123", "https://example.com/1")
+    store.put("def456", "https://example.com/2")
+    assert store.get("abc123") == "https://example.com/1"  # visible before the commit
+    assert store.delete("def456")
+    assert not store.delete("nope00")
+    store.close()
+
+    reopened = SQLiteStore(tmp_path / "urls.db")
+    assert reopened.get("abc123") == "https://example.com/1"
+    assert reopened.get("def456") is None
+    assert len(reopened) == 1
+    assert dict(reopened.items()) == {"abc123": "https://example.com/1"}
+    reopened.close()
+
+
+def test_sqlite_store_groups_commits(tmp_path):
+    """Test that concurrent writes awaiting durability share transactions."""
+    store = SQLiteStore(tmp_path / "urls.db", flush_interval=0.01)
+    service = URLService(store=store, allocator=allocator_from_env(store))
+
+    async def shorten(i: int) -> str:
+        code = service.create_short_url(f"https://example.com/{i}")
+        await service.wait_durable()
+        return code
+
+    async def main() -> list[str]:
+        return await asyncio.gather(*(shorten(i) for i in range(200)))
+
+    codes = asyncio.run(main())
+    assert store.commits < 50
+    assert not store._pending
+    assert all(store.get(code) is not None for code in codes)
+    store.close()
+
+
+def test_sqlite_store_per_write_commits(tmp_path):
+    """Test that batch_size=1 commits every write on its own."""
+    store = SQLiteStore(tmp_path / "urls.db", batch_size=1)
+    for i in range(10):
+        store.put(f"code{i:02d}", "https://example.com")
+    store.flush()
+    assert store.commits == 10
+    store.close()
+
+
+def test_sqlite_store_persists_allocator_state(tmp_path):
+    """Test that codes allocated after a restart never repeat earlier ones."""
+    store = SQLiteStore(tmp_path / "urls.db")
+    service = URLService(store=store, allocator=allocator_from_env(store))
+    first = set(service.create_many([f"https://example.com/{i}" for i in range(10)]))
+    store.close()
+
+    store = SQLiteStore(tmp_path / "urls.db")
+    service = URLService(store=store, allocator=allocator_from_env(store))
+    second = set(service.create_many([f"https://example.com/{i}" for i in range(10)]))
+    assert not first & second
+    assert len(store) == 20
+    store.close()
+
+
+def test_sqlite_store_reads_queued_changes_without_flushing(tmp_path, monkeypatch):
+    """Test that len and items see queued writes without waiting for the writer thread."""
+    store = SQLiteStore(tmp_path / "urls.db", batch_size=1)
+    store.put("old1", "https://example.com/old1")
+    store.put("old2", "https://example.com/old2")
+    store.close()
+
+    def fail():
+        raise AssertionError("waited for the writer")
+
+    store = SQLiteStore(tmp_path / "urls.db", batch_size=10_000, flush_interval=60)
+    monkeypatch.setattr(store, "flush", fail)
+    store.put("new1", "https://example.com/new1")
+    store.put("old1", "https://example.com/changed")
+    store.delete("old2")
+
+    assert store.commits == 0
+    assert len(store) == 2
+    assert dict(store.items()) == {
+        "old1": "https://example.com/changed",
+        "new1": "https://example.com/new1",
+    }
+    store.close()
+
+
+def test_sqlite_store_keeps_deadlines(tmp_path):
+    """Test that deadlines are stored with the rows, including in a pre-expiry database."""
+    legacy = sqlite3.connect(tmp_path / "urls.db")
+    legacy.execute("CREATE TABLE urls (code TEXT PRIMARY KEY, url TEXT NOT NULL) WITHOUT ROWID")
+    legacy.execute("INSERT INTO urls VALUES ('old000', 'https://example.com/old')")
+    legacy.commit()
+    legacy.close()
+
+    service = URLService(store=SQLiteStore(tmp_path / "urls.db"))
+    brief = service.create_short_url("https://example.com/brief", ttl=0.05)
+    week = service.create_short_url("https://example.com/week", ttl=7 * 86400)
+    deadline = service.expires_at(week)
+    assert dict(service._store.deadlines()) == {brief: service.expires_at(brief), week: deadline}
+    service.close()
+
+    time.sleep(0.06)
+    restarted = URLService(store=SQLiteStore(tmp_path / "urls.db"))
+    assert restarted.expires_at(week) == deadline
+    assert restarted.expires_at("old000") is None
+    assert restarted.get_original_url("old000") == "https://example.com/old"
+    assert restarted.get_original_url(brief) is None
+    assert restarted.reap_expired_codes(now=time.time() + 1) == [brief]
+    restarted.close()
@@ -0,0 +1,254 @@
+import asyncio
+import os
+import time
+
+from src.services import storage
+from src.services.storage import (
+    LOG_HEADER,
+    RECORD_HEADER,
+    LogStore,
+    MemoryStore,
+    encode_record,
+)
+from src.services.url_service import URLService
+
+
+def test_memory_store_roundtrip():
+    """Test basic put/get/delete on the in-memory store."""
+    store = MemoryStore()
+    store.put("abc123", "https://example.com")
+    assert store.get("abc123") == "https://example.com"
+    assert "abc123" in store
+    assert len(store) == 1
+    assert store.delete("abc123")
+    assert store.get("abc123") is None
+    assert not store.delete("abc123")
+
+
+def test_log_store_survives_restart(tmp_path):
+    """Test that mappings written to the log are replayed after reopening."""
+    store = LogStore(tmp_path)
+    store.put("abc123", "https://example.com/1")
+    store.put("def456", "https://example.com/2")
+    store.delete("def456")
+    store.close()
+
+    reopened = LogStore(tmp_path)
+    assert reopened.get("abc123") == "https://example.com/1"
+    assert reopened.get("def456") is None
+    assert len(reopened) == 1
+    reopened.close()
+
+
+def test_log_store_checkpoint_then_tail_replay(tmp_path):
+    """Test that startup reads the index and only replays records written after it."""
+    store = LogStore(tmp_path, checkpoint_every=10)
+    for i in range(25):
+        store.put(f"code{i}", f"https://example.com/{i}")
+    store.delete("code3")
+    store.close()
+
+    assert (tmp_path / "urls.idx").exists()
+    reopened = LogStore(tmp_path)
+    assert len(reopened) == 24
+    assert reopened.get("code3") is None
+    assert reopened.get("code24") == "https://example.com/24"
+    assert dict(reopened.items())["code0"] == "https://example.com/0"
+    reopened.close()
+
+
+def test_log_store_truncates_torn_final_record(tmp_path):
+    """Test that a partially written last record is discarded on recovery."""
+    store = LogStore(tmp_path)
+    store.put("abc123", "https://example.com/1")
+    store.close()
+
+    torn = encode_record(1, "def456", "https://example.com/2")
+    with open(tmp_path / "urls.log", "ab") as f:
+        f.write(torn[: RECORD_HEADER.size + 3])
+    size_before = os.path.getsize(tmp_path / "urls.log")
+
+    reopened = LogStore(tmp_path)
+    assert reopened.truncated_bytes == RECORD_HEADER.size + 3
+    assert os.path.getsize(tmp_path / "urls.log") == size_before - reopened.truncated_bytes
+    assert reopened.get("abc123") == "https://example.com/1"
+    assert reopened.get("def456") is None
+
+    # New writes land cleanly after the truncated tail
+    reopened.put("ghi789", "https://example.com/3")
+    reopened.close()
+    assert LogStore(tmp_path).get("ghi789") == "https://example.com/3"
+
+
+def test_log_store_ignores_corrupt_final_record(tmp_path):
+    """Test that a final record failing its checksum is treated as torn."""
+    store = LogStore(tmp_path)
+    store.put("abc123", "https://example.com/1")
+    store.close()
+
+    corrupt = bytearray(encode_record(1, "def456", "https://example.com/2"))
+    corrupt[-1] ^= 0xFF
+    with open(tmp_path / "urls.log", "ab") as f:
+        f.write(corrupt)
+
+    reopened = LogStore(tmp_path)
+    assert reopened.truncated_bytes == len(corrupt)
+    assert reopened.get("def456") is None
+    assert len(reopened) == 1
+    reopened.close()
+
+
+def test_url_service_with_log_store(tmp_path):
+    """Test that URLService keeps its API when backed by the log store."""
+    service = URLService(store=LogStore(tmp_path))
+    short_code = service.create_short_url("https://example.com/persisted")
+    service.close()
+
+    restarted = URLService(store=LogStore(tmp_path))
+    assert restarted.get_original_url(short_code) == "https://example.com/persisted"
+    restarted.close()
+
+
+def test_log_store_syncs_a_lone_write(tmp_path):
+    """Test that a write with none after it still reaches the file within sync_interval."""
+    store = LogStore(tmp_path, sync_interval=0.01)
+    store.put("abc123", "https://example.com/alone")
+
+    deadline = time.monotonic() + 2
+    while store._unsynced and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert store._unsynced == 0
+    assert store.log_path.stat().st_size > 0
+    store.close()
+
+
+def test_log_store_durable_waits_for_fsync(tmp_path):
+    """Test that wait_durable resolves through durable() once earlier writes are synced."""
+    store = LogStore(tmp_path, sync_interval=60)
+    service = URLService(store=store)
+    service.create_short_url("https://example.com/wait")
+    assert store._unsynced == 1
+
+    asyncio.run(asyncio.wait_for(service.wait_durable(), timeout=2))
+    assert store._unsynced == 0
+    assert store.durable().done()
+    service.close()
+
+
+def test_log_store_bgsave_snapshot(tmp_path):
+    """Test a forked snapshot while writes continue, then tail-only replay on restart."""
+    store = LogStore(tmp_path, checkpoint_every=10**9)
+    for i in range(2000):
+        store.put(f"code{i}", f"https://example.com/{i}")
+
+    assert store.bgsave()
+    assert not store.bgsave()  # one at a time
+    assert store.bgsave_progress is not None
+    store.put("late01", "https://example.com/late")
+    store.delete("code0")
+    store.poll_bgsave(wait=True)
+
+    assert store.last_bgsave_ok
+    assert store.last_bgsave_duration is not None
+    assert store.bgsave_progress is None
+    assert set(store._tail) == {"late01", "code0"}
+    assert store.get("code0") is None
+    assert store.get("code1999") == "https://example.com/1999"
+    store.close()
+
+    reopened = LogStore(tmp_path)
+    assert set(reopened._tail) == {"late01", "code0"}
+    assert reopened.get("late01") == "https://example.com/late"
+    assert len(reopened) == 2000
+    reopened.close()
+
+
+def test_log_store_checkpoints_in_background(tmp_path):
+    """Test that reaching checkpoint_every starts a bgsave instead of blocking."""
+    store = LogStore(tmp_path, checkpoint_every=100)
+    for i in range(150):
+        store.put(f"code{i}", "https://example.com")
+    store.poll_bgsave(wait=True)
+
+    assert store.bgsaves >= 1
+    assert len(store._tail) < 100
+    assert len(store) == 150
+    store.close()
+
+
+def test_log_store_backs_off_after_failed_bgsave(tmp_path, monkeypatch):
+    """Test that a failed bgsave is retried after checkpoint_every more records, not per write."""
+
+    def fail(*args):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(storage, "write_index", fail)
+    store = LogStore(tmp_path, checkpoint_every=10)
+    for i in range(10):
+        store.put(f"code{i}", "https://example.com")
+    store.poll_bgsave(wait=True)
+    assert store.bgsaves == 1
+    assert store.last_bgsave_ok is False
+
+    for i in range(10, 19):
+        store.put(f"code{i}", "https://example.com")
+    assert store.bgsaves == 1
+
+    store.put("code19", "https://example.com")
+    store.poll_bgsave(wait=True)
+    assert store.bgsaves == 2
+    assert len(store) == 20
+    store.close()
+
+
+def test_log_store_compacts_the_log_after_a_checkpoint(tmp_path):
+    """Test that checkpoints drop the log records the index holds and offsets keep counting."""
+    store = LogStore(tmp_path, checkpoint_every=10**9)
+    for i in range(500):
+        store.put(f"code{i}", f"https://example.com/{i}")
+    size = store.log_path.stat().st_size
+    log_id, offset = store.log_id, store.log_offset
+
+    store.checkpoint()
+    assert store.compactions == 1
+    assert store.log_path.stat().st_size == LOG_HEADER.size
+    assert store.log_offset == offset
+    store.put("after", "https://example.com/after")
+    assert store.bgsave()
+    store.put("during", "https://example.com/during")
+    store.poll_bgsave(wait=True)
+    store.put("later", "https://example.com/later")
+    assert store.compactions == 2
+    assert store.log_path.stat().st_size < size // 100
+    store.close()
+
+    reopened = LogStore(tmp_path)
+    assert reopened.log_id == log_id
+    assert set(reopened._tail) == {"during", "later"}
+    assert len(reopened) == 503
+    assert reopened.get("code0") == "https://example.com/0"
+    reopened.close()
+
+
+def test_log_store_keeps_deadlines_across_restarts(tmp_path):
+    """Test that expiry survives log replay and checkpoints, and a restart still expires."""
+    service = URLService(store=LogStore(tmp_path, checkpoint_every=10**9))
+    brief = service.create_short_url("https://example.com/brief", ttl=0.05)
+    week = service.create_short_url("https://example.com/week", ttl=7 * 86400)
+    deadline = service.expires_at(week)
+    service.close()
+
+    store = LogStore(tmp_path)
+    assert store.expires_at(week) == deadline
+    store.checkpoint()
+    store.put(brief, "https://example.com/brief")  # a plain put clears the deadline
+    store.put(brief, "https://example.com/brief", time.time() + 0.05)
+    store.close()
+
+    time.sleep(0.06)
+    restarted = URLService(store=LogStore(tmp_path))
+    assert restarted.expires_at(week) == deadline
+    assert restarted.get_original_url(week) == "https://example.com/week"
+    assert restarted.get_original_url(brief) is None
+    assert restarted.reap_expired_codes(now=time.time() + 1) == [brief]
+    restarted.close()
@@ -0,0 +1,49 @@
+from src.services.timing_wheel import TimingWheel
+
+
+def test_advance_returns_due_keys():
+    """Test that keys expire once the clock passes their deadline."""
+    wheel = TimingWheel(now=0)
+    wheel.schedule("a", 5)
+    wheel.schedule("b", 10)
+
+    assert wheel.advance(4) == []
+    assert wheel.advance(5) == ["a"]
+    assert "a" not in wheel
+    assert wheel.advance(10) == ["b"]
+    assert len(wheel) == 0
+
+
+def test_cascade_across_levels():
+    """Test deadlines on coarser levels cascade down and expire on time."""
+    wheel = TimingWheel(slots=8, levels=3, now=0)
+    deadlines = {f"k{t}": t for t in (3, 9, 63, 64, 100, 500)}
+    for key, deadline in deadlines.items():
+        wheel.schedule(key, deadline)
+
+    for now in range(1, 501):
+        for key in wheel.advance(now):
+            assert deadlines[key] == now
+    assert len(wheel) == 0
+
+
+def test_overflow_beyond_top_level():
+    """Test deadlines past the wheel's span wait in overflow and still expire."""
+    wheel = TimingWheel(slots=4, levels=2, now=0)
+    wheel.schedule("far", 100)
+
+    assert wheel.advance(99) == []
+    assert wheel.advance(100) == ["far"]
+
+
+def test_reschedule_and_cancel():
+    """Test that stale bucket entries are ignored after reschedule or cancel."""
+    wheel = TimingWheel(now=0)
+    wheel.schedule("moved", 5)
+    wheel.schedule("moved", 20)
+    wheel.schedule("gone", 5)
+    wheel.cancel("gone")
+
+    assert wheel.advance(10) == []
+    assert wheel.deadline("moved") == 20
+    assert wheel.advance(20) == ["moved"]
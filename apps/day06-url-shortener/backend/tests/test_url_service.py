@@ -1,3 +1,8 @@
+import importlib
+import threading
+import time
+
+from src.services.storage import MemoryStore
 from src.services.url_service import URLService
 
 
@@ -58,3 +63,139 @@ def test_unique_short_codes():
         code = service.create_short_url(f"https://example.com/{i}")
         assert code not in codes
         codes.add(code)
+
+
+def test_create_many():
+    """Test creating a batch of shortened URLs."""
+    service = URLService()
+    urls = [f"https://example.com/{i}" for i in range(10)]
+    codes = service.create_many(urls)
+
+    assert len(set(codes)) == 10
+    for code, url in zip(codes, urls):
+        assert service.get_original_url(code) == url
+
+
+def test_list_urls_page_with_cursor():
+    """Test keyset pagination over the stored URLs."""
+    service = URLService()
+    codes = sorted(service.create_many([f"https://example.com/{i}" for i in range(25)]))
+
+    first = service.list_urls_page(limit=10)
+    assert [code for code, *_ in first] == codes[:10]
+
+    second = service.list_urls_page(after=first[-1][0], limit=10)
+    assert [code for code, *_ in second] == codes[10:20]
+
+    # Codes created after the index exists are picked up too
+    late = service.create_short_url("https://example.com/late")
+    assert late in [code for code, _ in service.iter_urls()]
+
+
+def test_list_urls_page_fills_past_unreaped_links():
+    """Test that expired links awaiting the reaper do not shorten a page."""
+    service = URLService()
+    live = sorted(service.create_many([f"https://example.com/{i}" for i in range(10)]))
+    for i in range(10):
+        service.create_short_url(f"https://example.com/old/{i}", ttl=0.01)
+    time.sleep(0.05)
+
+    listed, after = [], None
+    while page := service.list_urls_page(after=after, limit=5):
+        assert len(page) == 5 or len(listed) == 10
+        listed.extend(code for code, *_ in page)
+        after = page[-1][0]
+    assert listed == live
+
+
+def test_expired_link_is_missing_before_reaping():
+    """Test that an expired link stops resolving before the reaper runs."""
+    service = URLService()
+    code = service.create_short_url("https://example.com/campaign", ttl=0.05)
+    assert service.expires_at(code) is not None
+    assert service.get_original_url(code) == "https://example.com/campaign"
+
+    time.sleep(0.06)
+    assert service.get_original_url(code) is None
+    assert code not in service.list_all_urls()
+
+
+def test_reap_expired_deletes_links():
+    """Test that reaping removes expired links from the store."""
+    service = URLService()
+    code = service.create_short_url("https://example.com/once", ttl=5)
+    kept = service.create_short_url("https://example.com/kept")
+
+    deadline = service.expires_at(code)
+    assert service.reap_expired(now=deadline - 1) == 0
+    assert service.reap_expired(now=deadline + 1) == 1
+    assert code not in service._store
+    assert service.get_original_url(kept) == "https://example.com/kept"
+
+
+def test_on_delete_sees_deleted_and_reaped_links():
+    """Test that the delete hook is called for explicit deletes and for reaped links."""
+    service = URLService()
+    deleted: list[str] = []
+    service.on_delete = deleted.append
+    gone = service.create_short_url("https://example.com/gone")
+    brief = service.create_short_url("https://example.com/brief", ttl=5)
+
+    service.delete_short_url(gone)
+    service.delete_short_url(gone)
+    service.reap_expired(now=service.expires_at(brief) + 1)
+    assert deleted == [gone, brief]
+
+
+def test_negative_cache_tracks_links():
+    """Test that the negative cache follows creates and deletes."""
+    service = URLService()
+    codes = service.create_many([f"https://example.com/{i}" for i in range(3000)])
+    assert all(service.get_original_url(code) is not None for code in codes)
+
+    service.delete_short_url(codes[0])
+    assert service.get_original_url(codes[0]) is None
+    for i in range(1000):
+        service.get_original_url(f"zz{i}")
+    assert service.filter_rejections + service.filter_false_positives == 1001
+    assert service.filter_false_positive_rate < 0.01
+
+
+class SlowScanStore(MemoryStore):
+    """MemoryStore whose scans wait until `release` is set."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.release = threading.Event()
+
+    def items(self):
+        self.release.wait(5)
+        return super().items()
+
+
+def test_negative_cache_builds_in_background(monkeypatch):
+    """Test that a large store starts without its filter and answers lookups meanwhile."""
+    # src.services.url_service is shadowed by the app's instance on the package
+    module = importlib.import_module("src.services.url_service")
+    monkeypatch.setattr(module, "BACKGROUND_FILTER_BUILD", 100)
+    store = SlowScanStore()
+    for i in range(200):
+        store.put(f"old{i}", f"https://example.com/{i}")
+    service = URLService(store=store)
+
+    assert service.negative_cache is None
+    assert service.get_original_url("old0") == "https://example.com/0"
+    assert service.get_original_url("missing") is None
+    fresh = service.create_short_url("https://example.com/fresh")
+    store.release.set()
+
+    deadline = time.monotonic() + 5
+    while service.negative_cache is None:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    assert service.negative_cache.might_contain(fresh)
+    assert service.negative_cache.might_contain("old199")
+    assert service.get_original_url(fresh) == "https://example.com/fresh"
+    rejected = service.filter_rejections
+    service.get_original_url("missing")
+    assert service.filter_rejections + service.filter_false_positives > rejected
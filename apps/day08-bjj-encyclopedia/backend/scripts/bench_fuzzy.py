@@ -0,0 +1,71 @@
+"""Time fuzzy name search against the trigram index on a synthetic catalog.
+
+Builds a TrigramIndex over --count synthetic technique names (100k by default) and times
+typo'd queries through TrigramIndex.search, which is what technique_service.fuzzy_search
+runs before loading the matching rows. Run from backend/:
+
+    python scripts/bench_fuzzy.py --count 1000000
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.services.fuzzy_index import TrigramIndex
+
+WORDS = (
+    "armbar triangle kimura americana omoplata guillotine choke sweep pass guard mount back side control "
+    "half butterfly spider lasso collar sleeve underhook overhook"
+).split()
+QUERIES = ["kimora", "trinagle", "arm bar", "omoplatta guard", "buterfly swep", "kimura trap"]
+SYLLABLES = "ka ri mo ta su ne ho mi to ra ze do gu pa fe li vo ba shi ken".split()
+
+
+def names(count: int) -> list[tuple[int, str]]:
+    rng = random.Random(0)
+
+    def filler() -> str:
+        return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+
+    rows = [
+        (i, f"{rng.choice(WORDS).capitalize()} {filler()} {rng.choice(['from', 'to', 'of'])} {rng.choice(WORDS)}")
+        for i in range(1, count)
+    ]
+    rows.append((count, "Kimura Trap"))
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=100_000)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rows = names(args.count)
+    by_id = dict(rows)
+    index = TrigramIndex()
+    started = time.perf_counter()
+    index.rebuild(rows)
+    print(f"indexed {args.count:,} names in {time.perf_counter() - started:.1f}s")
+
+    for q in QUERIES:
+        times = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            results = index.search(q, limit=args.limit)
+            times.append((time.perf_counter() - started) * 1000)
+        top = by_id[results[0][0]] if results else None
+        print(
+            f"{q!r:>18}: median {statistics.median(times):7.3f} ms  max {max(times):7.3f} ms  "
+            f"{len(results):>3} results, top {top!r}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Time path and reachability queries against the relationship graph on a synthetic graph.
+
+Builds a RelationshipGraph over --edges random relationships (1M by default) between
+--techniques techniques, with a few relationship types, then times shortest_path between
+random pairs (with and without a type filter), reachable within 2 and 3 moves, and
+adding and removing edges, which is what the graph endpoints run once it is loaded.
+Run from backend/:
+
+    python scripts/bench_graph.py --edges 1000000 --techniques 100000
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.services.relationship_graph import RelationshipGraph
+
+TYPES = ["leads_to", "counters", "escapes_from"]
+
+
+def timed(run, pairs: list) -> tuple[float, float, float]:
+    """Median and p99 milliseconds per call, and the mean of what `run` returns."""
+    times, sizes = [], []
+    for pair in pairs:
+        started = time.perf_counter()
+        sizes.append(run(*pair))
+        times.append((time.perf_counter() - started) * 1000)
+    times.sort()
+    return statistics.median(times), times[int(len(times) * 0.99)], statistics.mean(sizes)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--edges", type=int, default=1_000_000)
+    parser.add_argument("--techniques", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=1000, help="cap on reachable results")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    rows = [
+        (edge_id, rng.randrange(args.techniques), rng.randrange(args.techniques), rng.choice(TYPES))
+        for edge_id in range(1, args.edges + 1)
+    ]
+    graph = RelationshipGraph()
+    started = time.perf_counter()
+    graph.rebuild(rows)
+    print(f"loaded {len(graph):,} edges between {args.techniques:,} techniques in {time.perf_counter() - started:.1f}s")
+
+    pairs = [(rng.randrange(args.techniques), rng.randrange(args.techniques)) for _ in range(args.queries)]
+
+    def path(from_id: int, to_id: int, types=None) -> int:
+        steps = graph.shortest_path(from_id, to_id, types)
+        return len(steps) - 1 if steps else 0
+
+    for name, run in [
+        ("shortest_path", path),
+        ("shortest_path leads_to", lambda a, b: path(a, b, ["leads_to"])),
+        ("reachable depth 2", lambda a, _: len(graph.reachable(a, 2, limit=args.limit))),
+        ("reachable depth 3", lambda a, _: len(graph.reachable(a, 3, limit=args.limit))),
+        ("reachable depth 3 counters", lambda a, _: len(graph.reachable(a, 3, ["counters"], limit=args.limit))),
+    ]:
+        median, p99, size = timed(run, pairs)
+        print(f"{name:>28}: median {median:7.3f} ms  p99 {p99:7.3f} ms  mean size {size:8.1f}")
+
+    next_id = args.edges + 1
+    started = time.perf_counter()
+    for i in range(args.queries):
+        graph.add_edge(next_id + i, *pairs[i], "leads_to")
+        graph.remove_edge(next_id + i)
+    per_change = (time.perf_counter() - started) / (2 * args.queries) * 1e6
+    print(f"{'add_edge / remove_edge':>28}: {per_change:7.1f} us per change")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Compare FTS5 search with the ILIKE substring scan on a synthetic catalog.
+
+Builds a throwaway SQLite database of --count techniques (100k by default) and times the
+same queries through technique_service.search (FTS5, BM25-ranked) and
+technique_service.substring_search (ILIKE on name and description). Run from backend/:
+
+    python scripts/bench_search.py --count 100000
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlmodel import Session, SQLModel, create_engine, insert
+
+from src.models.technique import Technique
+from src.services import technique_service
+
+WORDS = (
+    "armbar triangle kimura americana omoplata guillotine choke sweep pass guard mount back side control "
+    "half butterfly spider lasso collar sleeve underhook overhook frame hip escape bridge shrimp posture "
+    "grip wrist elbow shoulder knee ankle heel hook leg lock takedown single double wrestling base pressure"
+).split()
+QUERIES = ["armbar", "triangle choke", "hip escape", "wrestl", "underhook pressure"]
+SYLLABLES = "ka ri mo ta su ne ho mi to ra ze do gu pa fe li vo ba shi ken".split()
+# One word in this many is a technique term, the rest filler from a larger vocabulary,
+# so a term appears in a few percent of techniques as in a real catalog
+TERM_EVERY = 50
+
+
+def filler(rng: random.Random) -> list[str]:
+    return ["".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))) for _ in range(20_000)]
+
+
+def sentence(rng: random.Random, vocabulary: list[str], words: int) -> str:
+    chosen = (rng.choice(WORDS) if rng.randrange(TERM_EVERY) == 0 else rng.choice(vocabulary) for _ in range(words))
+    return " ".join(chosen).capitalize() + "."
+
+
+def build(path: str, count: int) -> None:
+    engine = create_engine(f"sqlite:///{path}")
+    SQLModel.metadata.create_all(engine)
+    rng = random.Random(0)
+    vocabulary = filler(rng)
+    batch = 10_000
+    with engine.begin() as connection:
+        for start in range(0, count, batch):
+            rows = [
+                {
+                    "name": f"{rng.choice(WORDS).capitalize()} {rng.choice(vocabulary)} {i}",
+                    "position": rng.choice(["Guard", "Mount", "Back", "Standing"]),
+                    "type": rng.choice(["Submission", "Sweep", "Transition", "Escape"]),
+                    "difficulty": rng.choice(["Beginner", "Intermediate", "Advanced"]),
+                    "description": " ".join(sentence(rng, vocabulary, 12) for _ in range(3)),
+                    "steps": [sentence(rng, vocabulary, 10) for _ in range(5)],
+                    "common_mistakes": [sentence(rng, vocabulary, 8) for _ in range(3)],
+                    "counters": [sentence(rng, vocabulary, 8) for _ in range(2)],
+                }
+                for i in range(start, min(start + batch, count))
+            ]
+            connection.execute(insert(Technique), rows)
+    engine.dispose()
+
+
+def timed(run, repeat: int) -> tuple[float, int]:
+    """Median milliseconds per call and the number of results."""
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        results = run()
+        times.append((time.perf_counter() - started) * 1000)
+    return statistics.median(times), len(results)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        started = time.perf_counter()
+        build(path, args.count)
+        print(f"built {args.count:,} techniques (with FTS triggers) in {time.perf_counter() - started:.1f}s")
+
+        engine = create_engine(f"sqlite:///{path}")
+        with Session(engine) as session:
+            for q in QUERIES:
+                ilike_ms, ilike_hits = timed(lambda: technique_service.substring_search(session, q), args.repeat)
+                fts_ms, fts_hits = timed(lambda: technique_service.search(session, q), args.repeat)
+                top_ms, _ = timed(lambda: technique_service.search(session, q, limit=20, highlight=True), args.repeat)
+                print(
+                    f"{q!r:>22}: ILIKE {ilike_ms:8.1f} ms ({ilike_hits:>6,} rows)  "
+                    f"FTS5 {fts_ms:8.1f} ms ({fts_hits:>6,} rows)  FTS5 top 20 + snippets {top_ms:6.1f} ms"
+                )
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
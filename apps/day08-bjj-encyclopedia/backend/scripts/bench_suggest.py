@@ -0,0 +1,73 @@
+"""Time autocomplete lookups against the prefix index on a synthetic catalog.
+
+Builds a SuggestIndex over --count synthetic technique names (100k by default) with
+random degrees, then replays typing: every prefix of each query, one keystroke at a
+time, through SuggestIndex.suggest, which is what GET /techniques/suggest runs once the
+index is built. Latencies are per keystroke, grouped by prefix length. Run from backend/:
+
+    python scripts/bench_suggest.py --count 1000000
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.services.suggest_index import SuggestIndex
+
+WORDS = (
+    "armbar triangle kimura americana omoplata guillotine choke sweep pass guard mount back side control "
+    "half butterfly spider lasso collar sleeve underhook overhook"
+).split()
+QUERIES = ["kimura trap", "triangle", "guard pass", "omoplata sweep", "butterfly hook", "zzz"]
+SYLLABLES = "ka ri mo ta su ne ho mi to ra ze do gu pa fe li vo ba shi ken".split()
+
+
+def rows(count: int) -> list[tuple[int, str, int]]:
+    rng = random.Random(0)
+
+    def filler() -> str:
+        return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+
+    # Degrees skewed like a real graph: most techniques have a few links, some many
+    return [
+        (i, f"{rng.choice(WORDS).capitalize()} {filler()} {rng.choice(WORDS)}", int(rng.paretovariate(1.5)))
+        for i in range(1, count + 1)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=100_000)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    index = SuggestIndex()
+    data = rows(args.count)
+    started = time.perf_counter()
+    index.rebuild(data)
+    print(f"indexed {args.count:,} names in {time.perf_counter() - started:.1f}s")
+
+    by_length: dict[int, list[float]] = {}
+    for q in QUERIES:
+        for length in range(1, len(q) + 1):
+            prefix = q[:length]
+            suggest = index.suggest
+            started = time.perf_counter()
+            for _ in range(args.repeat):
+                suggest(prefix, args.limit)
+            by_length.setdefault(length, []).append((time.perf_counter() - started) / args.repeat * 1e6)
+
+    for length, times in sorted(by_length.items()):
+        print(f"prefix length {length:>2}: median {statistics.median(times):7.2f} us  max {max(times):7.2f} us")
+    every = [t for times in by_length.values() for t in times]
+    print(f"all {len(every)} prefixes: median {statistics.median(every):.2f} us, max {max(every):.2f} us")
+
+
+if __name__ == "__main__":
+    main()
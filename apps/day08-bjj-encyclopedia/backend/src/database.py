@@ -1,5 +1,7 @@
 from sqlmodel import Session, SQLModel, create_engine
 
+from src.models.technique import create_search_index
+
 DATABASE_URL = "sqlite:///./bjj.db"
 
 engine = create_engine(DATABASE_URL, echo=False)
@@ -7,6 +9,9 @@ engine = create_engine(DATABASE_URL, echo=False)
 
 def create_db_and_tables() -> None:
     SQLModel.metadata.create_all(engine)
+    # Databases created before the search index existed get it (and their rows) here
+    with engine.begin() as connection:
+        create_search_index(connection)
 
 
 def get_session():
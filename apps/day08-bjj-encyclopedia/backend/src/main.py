@@ -2,14 +2,20 @@ from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from sqlmodel import Session
 
-from src.database import create_db_and_tables
+from src.database import create_db_and_tables, engine
 from src.routes.techniques import router as techniques_router
+from src.services import technique_service
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     create_db_and_tables()
+    with Session(engine) as session:
+        technique_service.build_name_index(session)
+        technique_service.build_suggest_index(session)
+        technique_service.build_graph(session)
     yield
 
 
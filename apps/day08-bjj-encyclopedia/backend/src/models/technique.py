@@ -1,6 +1,6 @@
 from typing import Optional
 
-from sqlalchemy import JSON
+from sqlalchemy import JSON, Connection, Integer, MetaData, Table, event, inspect, text
 from sqlmodel import Column, Field, SQLModel
 
 
@@ -21,3 +21,41 @@ class TechniqueRelationship(SQLModel, table=True):
     from_technique_id: int = Field(foreign_key="technique.id", index=True)
     to_technique_id: int = Field(foreign_key="technique.id", index=True)
     relationship_type: str
+
+
+# Full-text index over every text field of a technique, in a SQLite FTS5 table that keeps
+# its own copy of the text (rowid = technique id). The JSON lists are indexed as plain
+# lines, so escaped characters and brackets never end up in the index or in snippets.
+# Triggers keep it in step with the technique table; it is not part of SQLModel.metadata.
+technique_fts = Table("technique_fts", MetaData(), Column("rowid", Integer, primary_key=True))
+
+_FTS_COLUMNS = "name, description, steps, common_mistakes, counters"
+_FTS_VALUES = (
+    "{row}.id, {row}.name, {row}.description, "
+    "(SELECT group_concat(value, char(10)) FROM json_each({row}.steps)), "
+    "(SELECT group_concat(value, char(10)) FROM json_each({row}.common_mistakes)), "
+    "(SELECT group_concat(value, char(10)) FROM json_each({row}.counters))"
+)
+_FTS_DDL = (
+    f"CREATE VIRTUAL TABLE technique_fts USING fts5({_FTS_COLUMNS}, tokenize='porter unicode61 remove_diacritics 2')",
+    f"INSERT INTO technique_fts(rowid, {_FTS_COLUMNS}) SELECT {_FTS_VALUES.format(row='technique')} FROM technique",
+    "CREATE TRIGGER technique_fts_insert AFTER INSERT ON technique BEGIN "
+    f"INSERT INTO technique_fts(rowid, {_FTS_COLUMNS}) VALUES ({_FTS_VALUES.format(row='new')}); END",
+    "CREATE TRIGGER technique_fts_update AFTER UPDATE ON technique BEGIN "
+    "DELETE FROM technique_fts WHERE rowid = old.id; "
+    f"INSERT INTO technique_fts(rowid, {_FTS_COLUMNS}) VALUES ({_FTS_VALUES.format(row='new')}); END",
+    "CREATE TRIGGER technique_fts_delete AFTER DELETE ON technique BEGIN DELETE FROM technique_fts WHERE rowid = old.id; END",
+)
+
+
+def create_search_index(connection: Connection) -> None:
+    """Create and fill the FTS5 index if the database does not have it yet (SQLite only)."""
+    if connection.dialect.name != "sqlite" or inspect(connection).has_table("technique_fts"):
+        return
+    for statement in _FTS_DDL:
+        connection.execute(text(statement))
+
+
+@event.listens_for(Technique.__table__, "after_create")
+def _create_search_index(target: Table, connection: Connection, **kw) -> None:
+    create_search_index(connection)
@@ -6,6 +6,7 @@ from sqlmodel import Session
 
 from src.database import get_session
 from src.services import technique_service
+from src.services.suggest_index import MAX_SUGGESTIONS
 
 router = APIRouter(prefix="/techniques", tags=["techniques"])
 
@@ -19,43 +20,105 @@ class TechniqueCard(BaseModel):
     description: str
 
 
+class SearchResult(TechniqueCard):
+    snippet: Optional[str] = None
+
+
+class Suggestion(BaseModel):
+    id: int
+    name: str
+
+
 class RelationshipOut(BaseModel):
     relationship_type: str
     technique: TechniqueCard
 
 
+class NeighborOut(BaseModel):
+    distance: int
+    technique: TechniqueCard
+
+
+class PathStep(BaseModel):
+    relationship_type: Optional[str]
+    technique: TechniqueCard
+
+
+class EdgeOut(BaseModel):
+    from_technique_id: int
+    to_technique_id: int
+    relationship_type: str
+
+
 class TechniqueDetail(TechniqueCard):
     steps: list[str]
     common_mistakes: list[str]
     counters: list[str]
     outgoing: list[RelationshipOut]
     incoming: list[RelationshipOut]
+    neighborhood: list[NeighborOut]
+    edges: list[EdgeOut]
 
 
-@router.get("", response_model=list[TechniqueCard])
+@router.get("", response_model=list[SearchResult], response_model_exclude_none=True)
 def list_techniques(
     position: Optional[str] = Query(default=None),
     type: Optional[str] = Query(default=None),
     difficulty: Optional[str] = Query(default=None),
     q: Optional[str] = Query(default=None),
+    highlight: bool = Query(default=False),
+    fuzzy: bool = Query(default=False),
+    limit: Optional[int] = Query(default=None, ge=1, le=1000),
     session: Session = Depends(get_session),
-) -> list[TechniqueCard]:
+) -> list[SearchResult]:
+    if q and fuzzy:
+        techniques = technique_service.fuzzy_search(
+            session=session,
+            q=q,
+            position=position,
+            type=type,
+            difficulty=difficulty,
+            limit=limit or 20,
+        )
+        return [SearchResult.model_validate(t, from_attributes=True) for t in techniques]
+    if q:
+        matches = technique_service.search(
+            session=session,
+            q=q,
+            position=position,
+            type=type,
+            difficulty=difficulty,
+            highlight=highlight,
+            limit=limit,
+        )
+        return [
+            SearchResult.model_validate(t, from_attributes=True).model_copy(update={"snippet": snippet}) for t, snippet in matches
+        ]
     techniques = technique_service.get_all(
         session=session,
         position=position,
         type=type,
         difficulty=difficulty,
-        q=q,
     )
-    return [TechniqueCard.model_validate(t, from_attributes=True) for t in techniques]
+    return [SearchResult.model_validate(t, from_attributes=True) for t in techniques[:limit]]
+
+
+@router.get("/suggest", response_model=list[Suggestion])
+def suggest_techniques(
+    prefix: str = Query(min_length=1, max_length=100),
+    limit: int = Query(default=10, ge=1, le=MAX_SUGGESTIONS),
+    session: Session = Depends(get_session),
+) -> list[Suggestion]:
+    return [Suggestion(id=technique_id, name=name) for technique_id, name in technique_service.suggest(session, prefix, limit)]
 
 
 @router.get("/{technique_id}", response_model=TechniqueDetail)
 def get_technique(
     technique_id: int,
+    depth: int = Query(default=1, ge=1, le=technique_service.MAX_DEPTH),
     session: Session = Depends(get_session),
 ) -> TechniqueDetail:
-    result = technique_service.get_by_id(session=session, technique_id=technique_id)
+    result = technique_service.get_by_id(session=session, technique_id=technique_id, depth=depth)
     if result is None:
         raise HTTPException(status_code=404, detail="Technique not found")
 
@@ -86,4 +149,67 @@ def get_technique(
         counters=result["counters"],
         outgoing=outgoing,
         incoming=incoming,
+        neighborhood=[
+            NeighborOut(
+                distance=n["distance"],
+                technique=TechniqueCard.model_validate(n["technique"], from_attributes=True),
+            )
+            for n in result["neighborhood"]
+        ],
+        edges=[EdgeOut(**e) for e in result["edges"]],
+    )
+
+
+@router.get("/{technique_id}/path/{target_id}", response_model=list[PathStep])
+def get_path(
+    technique_id: int,
+    target_id: int,
+    relationship_type: Optional[list[str]] = Query(default=None),
+    session: Session = Depends(get_session),
+) -> list[PathStep]:
+    try:
+        steps = technique_service.shortest_path(
+            session=session,
+            from_id=technique_id,
+            to_id=target_id,
+            relationship_types=relationship_type,
+        )
+    except technique_service.StalePathError:
+        raise HTTPException(status_code=409, detail="The path runs through a technique that no longer exists")
+    if steps is None:
+        raise HTTPException(status_code=404, detail="Technique not found")
+    if not steps:
+        raise HTTPException(status_code=404, detail="No path between these techniques")
+    return [
+        PathStep(
+            relationship_type=s["relationship_type"],
+            technique=TechniqueCard.model_validate(s["technique"], from_attributes=True),
+        )
+        for s in steps
+    ]
+
+
+@router.get("/{technique_id}/reachable", response_model=list[NeighborOut])
+def get_reachable(
+    technique_id: int,
+    depth: int = Query(default=1, ge=1, le=technique_service.MAX_DEPTH),
+    relationship_type: Optional[list[str]] = Query(default=None),
+    limit: int = Query(default=technique_service.REACHABLE_LIMIT, ge=1, le=technique_service.MAX_REACHABLE_LIMIT),
+    session: Session = Depends(get_session),
+) -> list[NeighborOut]:
+    found = technique_service.reachable(
+        session=session,
+        technique_id=technique_id,
+        depth=depth,
+        relationship_types=relationship_type,
+        limit=limit,
     )
+    if found is None:
+        raise HTTPException(status_code=404, detail="Technique not found")
+    return [
+        NeighborOut(
+            distance=n["distance"],
+            technique=TechniqueCard.model_validate(n["technique"], from_attributes=True),
+        )
+        for n in found
+    ]
@@ -0,0 +1,124 @@
+"""In-memory trigram index over technique names for typo-tolerant search.
+
+Names are normalized (lowercase, accents and punctuation dropped) and split into words;
+every word contributes its trigrams padded the way pg_trgm pads them ("  k", " ki",
+"kim", ..., "ra "), so "kimora" still shares most trigrams with "kimura", and "arm bar"
+with "armbar". A name's similarity to a query is the share of the query's trigrams it
+contains.
+
+Postings are arrays of technique ids per trigram. A search walks the postings of the
+query's rarest trigrams only (a name reaching the similarity threshold must contain at
+least one of them), and stops as soon as no name it has not seen yet could make the top
+results, so common trigrams like " ar" are rarely scanned to the end.
+"""
+
+import heapq
+import math
+import re
+import unicodedata
+from array import array
+
+NON_ALNUM = re.compile(r"[^a-z0-9]+")
+DEFAULT_THRESHOLD = 0.4
+
+
+def normalize(text: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return NON_ALNUM.sub(" ", stripped).strip()
+
+
+def _word_trigrams(normalized: str) -> set[str]:
+    grams = set()
+    for word in normalized.split():
+        padded = f"  {word} "
+        grams.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def trigrams(text: str) -> set[str]:
+    return _word_trigrams(normalize(text))
+
+
+def _padded(text: str) -> str:
+    """Every word padded like its trigrams, so a trigram is in the name iff it is a substring."""
+    return "".join(f"  {word} " for word in normalize(text).split())
+
+
+class TrigramIndex:
+    """Trigram postings over technique names, updated one technique at a time."""
+
+    def __init__(self) -> None:
+        self._postings: dict[str, array] = {}
+        # Padded names (see _padded), so a candidate is checked with substring tests
+        self._names: dict[int, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def rebuild(self, rows: list[tuple[int, str]]) -> None:
+        """Replace the contents with (id, name) rows."""
+        names = {technique_id: _padded(name) for technique_id, name in sorted(rows)}
+        postings: dict[str, list[int]] = {}
+        for technique_id, padded in names.items():
+            for gram in _word_trigrams(padded):
+                postings.setdefault(gram, []).append(technique_id)
+        self._postings = {gram: array("I", ids) for gram, ids in postings.items()}
+        self._names = names
+
+    def add(self, technique_id: int, name: str) -> None:
+        if technique_id in self._names:
+            self.remove(technique_id)
+        padded = self._names[technique_id] = _padded(name)
+        for gram in _word_trigrams(padded):
+            self._postings.setdefault(gram, array("I")).append(technique_id)
+
+    def remove(self, technique_id: int) -> None:
+        padded = self._names.pop(technique_id, None)
+        if padded is None:
+            return
+        for gram in _word_trigrams(padded):
+            posting = self._postings[gram]
+            posting.remove(technique_id)
+            if not posting:
+                del self._postings[gram]
+
+    def search(self, q: str, limit: int = 20, threshold: float = DEFAULT_THRESHOLD) -> list[tuple[int, float]]:
+        """Up to `limit` (id, similarity) pairs, most similar first.
+
+        Postings are walked rarest trigram first. A name first seen in the j-th posting
+        lacks the j rarer trigrams, so once `limit` names at least that similar are in
+        hand the walk stops; equally similar names found later are not looked at, and
+        among those verified, shorter names win ties.
+        """
+        query = trigrams(q)
+        if not query:
+            return []
+        postings = self._postings
+        names = self._names
+        needed = max(1, math.ceil(threshold * len(query)))
+        by_rarity = sorted(query, key=lambda gram: len(postings.get(gram, ())))
+        seen: set[int] = set()
+        best: list[tuple[int, int, int]] = []  # heap of (shared, -length, -id), worst first
+        # A name sharing `needed` trigrams has one of the len(query) - needed + 1 rarest
+        for j, gram in enumerate(by_rarity[: len(query) - needed + 1]):
+            unseen_bound = len(query) - j
+            if len(best) == limit and unseen_bound <= best[0][0]:
+                break
+            for technique_id in postings.get(gram, ()):
+                if len(best) == limit and unseen_bound <= best[0][0]:
+                    break
+                if technique_id in seen:
+                    continue
+                seen.add(technique_id)
+                padded = names[technique_id]
+                shared = sum(gram in padded for gram in by_rarity)
+                if shared < needed:
+                    continue
+                entry = (shared, -len(padded), -technique_id)
+                if len(best) < limit:
+                    heapq.heappush(best, entry)
+                elif entry > best[0]:
+                    heapq.heapreplace(best, entry)
+        best.sort(reverse=True)
+        return [(-negative_id, shared / len(query)) for shared, _, negative_id in best]
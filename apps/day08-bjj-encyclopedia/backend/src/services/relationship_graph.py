@@ -0,0 +1,249 @@
+"""In-memory graph of technique relationships for path and reachability queries.
+
+Edges are held in compressed sparse row form, once per direction: the edges leaving node
+n are targets[offsets[n]:offsets[n + 1]], with their relationship type codes and row ids
+in parallel arrays. Techniques are numbered densely in the order they first appear.
+
+Changes are not written into the arrays. Added edges go to a small per-node overlay and
+removed ones to a set of ids skipped while walking, and once those outgrow COMPACT_RATIO
+of the graph the arrays are rebuilt with them folded in.
+"""
+
+import threading
+from array import array
+from collections.abc import Iterable, Iterator
+from typing import Optional
+
+# Rebuild the arrays once pending changes reach this share of the edges (or COMPACT_MIN)
+COMPACT_RATIO = 0.1
+COMPACT_MIN = 1024
+
+
+class _Adjacency:
+    """One direction of the graph: CSR arrays plus the edges added since they were built."""
+
+    __slots__ = ("offsets", "targets", "codes", "edge_ids", "added")
+
+    def __init__(self, size: int, sources: array, targets: array, codes: array, edge_ids: array) -> None:
+        # Counting sort of the edges by source node
+        offsets = array("I", bytes(4 * (size + 1)))
+        for source in sources:
+            offsets[source + 1] += 1
+        for node in range(size):
+            offsets[node + 1] += offsets[node]
+        position = offsets[:-1]
+        self.targets = array("I", bytes(4 * len(sources)))
+        self.codes = array("H", bytes(2 * len(sources)))
+        self.edge_ids = array("I", bytes(4 * len(sources)))
+        for i, source in enumerate(sources):
+            slot = position[source]
+            position[source] = slot + 1
+            self.targets[slot] = targets[i]
+            self.codes[slot] = codes[i]
+            self.edge_ids[slot] = edge_ids[i]
+        self.offsets = offsets
+        # node -> [(target, code, edge id)]
+        self.added: dict[int, list[tuple[int, int, int]]] = {}
+
+    def neighbors(self, node: int, allowed: Optional[set[int]], removed: set[int]) -> Iterator[tuple[int, int]]:
+        """(target, type code) of the edges leaving `node` whose type is `allowed` (None for any)."""
+        if node + 1 < len(self.offsets):
+            codes, edge_ids, targets = self.codes, self.edge_ids, self.targets
+            for slot in range(self.offsets[node], self.offsets[node + 1]):
+                if (allowed is None or codes[slot] in allowed) and (not removed or edge_ids[slot] not in removed):
+                    yield targets[slot], codes[slot]
+        for target, code, _ in self.added.get(node, ()):
+            if allowed is None or code in allowed:
+                yield target, code
+
+
+def _empty() -> _Adjacency:
+    return _Adjacency(0, array("I"), array("I"), array("H"), array("I"))
+
+
+class RelationshipGraph:
+    """Directed graph of (edge id, from technique, to technique, relationship type) rows."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._nodes: dict[int, int] = {}  # technique id -> node
+        self._technique_ids: list[int] = []  # node -> technique id
+        self._codes: dict[str, int] = {}  # relationship type -> code
+        self._types: list[str] = []  # code -> relationship type
+        # Forward and reverse adjacency and the ids of compacted edges since removed, swapped
+        # in as one by compaction so a query never mixes two generations
+        self._state: tuple[_Adjacency, _Adjacency, set[int]] = (_empty(), _empty(), set())
+        self._compacted_edges = 0
+        self._added: dict[int, tuple[int, int, int]] = {}  # edge id -> (source, target, code), not yet compacted
+
+    def __len__(self) -> int:
+        return self._compacted_edges - len(self._state[2]) + len(self._added)
+
+    def _node(self, technique_id: int) -> int:
+        node = self._nodes.get(technique_id)
+        if node is None:
+            node = self._nodes[technique_id] = len(self._technique_ids)
+            self._technique_ids.append(technique_id)
+        return node
+
+    def _code(self, relationship_type: str) -> int:
+        code = self._codes.get(relationship_type)
+        if code is None:
+            code = self._codes[relationship_type] = len(self._types)
+            self._types.append(relationship_type)
+        return code
+
+    def rebuild(self, rows: Iterable[tuple[int, int, int, str]]) -> None:
+        """Replace the contents with (edge id, from technique id, to technique id, type) rows."""
+        with self._lock:
+            self._nodes, self._technique_ids, self._codes, self._types = {}, [], {}, []
+            sources, targets, codes, edge_ids = array("I"), array("I"), array("H"), array("I")
+            for edge_id, from_id, to_id, relationship_type in rows:
+                edge_ids.append(edge_id)
+                sources.append(self._node(from_id))
+                targets.append(self._node(to_id))
+                codes.append(self._code(relationship_type))
+            self._compact(sources, targets, codes, edge_ids)
+
+    def _compact(self, sources: array, targets: array, codes: array, edge_ids: array) -> None:
+        size = len(self._technique_ids)
+        forward = _Adjacency(size, sources, targets, codes, edge_ids)
+        reverse = _Adjacency(size, targets, sources, codes, edge_ids)
+        self._state = (forward, reverse, set())
+        self._added = {}
+        self._compacted_edges = len(edge_ids)
+
+    def _compact_pending(self) -> None:
+        sources, targets, codes, edge_ids = array("I"), array("I"), array("H"), array("I")
+        forward, _, removed = self._state
+        for node in range(len(forward.offsets) - 1):
+            for slot in range(forward.offsets[node], forward.offsets[node + 1]):
+                if forward.edge_ids[slot] not in removed:
+                    sources.append(node)
+                    targets.append(forward.targets[slot])
+                    codes.append(forward.codes[slot])
+                    edge_ids.append(forward.edge_ids[slot])
+        for edge_id, (source, target, code) in self._added.items():
+            sources.append(source)
+            targets.append(target)
+            codes.append(code)
+            edge_ids.append(edge_id)
+        self._compact(sources, targets, codes, edge_ids)
+
+    def _maybe_compact(self) -> None:
+        if len(self._added) + len(self._state[2]) >= max(COMPACT_MIN, COMPACT_RATIO * self._compacted_edges):
+            self._compact_pending()
+
+    def add_edge(self, edge_id: int, from_id: int, to_id: int, relationship_type: str) -> None:
+        with self._lock:
+            source, target, code = self._node(from_id), self._node(to_id), self._code(relationship_type)
+            self._added[edge_id] = (source, target, code)
+            forward, reverse, _ = self._state
+            forward.added.setdefault(source, []).append((target, code, edge_id))
+            reverse.added.setdefault(target, []).append((source, code, edge_id))
+            self._maybe_compact()
+
+    def remove_edge(self, edge_id: int) -> None:
+        with self._lock:
+            forward, reverse, removed = self._state
+            pending = self._added.pop(edge_id, None)
+            if pending is None:
+                removed.add(edge_id)
+            else:
+                source, target, _ = pending
+                for adjacency, node in ((forward, source), (reverse, target)):
+                    adjacency.added[node] = [edge for edge in adjacency.added[node] if edge[2] != edge_id]
+            self._maybe_compact()
+
+    def _allowed(self, relationship_types: Optional[Iterable[str]]) -> Optional[set[int]]:
+        if relationship_types is None:
+            return None
+        return {self._codes[name] for name in relationship_types if name in self._codes}
+
+    def shortest_path(
+        self, from_id: int, to_id: int, relationship_types: Optional[Iterable[str]] = None
+    ) -> Optional[list[tuple[int, Optional[str]]]]:
+        """Fewest-moves chain from `from_id` to `to_id` following edges forward, or None.
+
+        Each step is (technique id, type of the relationship leading to it), None for the
+        first. Searches from both ends at once, always widening the smaller frontier by a
+        whole level, so a chain of length d touches about twice the d/2-hop neighborhoods
+        rather than the d-hop one.
+        """
+        if from_id == to_id:
+            return [(from_id, None)]
+        source, target = self._nodes.get(from_id), self._nodes.get(to_id)
+        if source is None or target is None:
+            return None
+        allowed = self._allowed(relationship_types)
+        forward, reverse, removed = self._state
+        adjacencies = (forward, reverse)
+        # Per side: node -> (node it was reached from, type code, moves from that side's end)
+        seen: tuple[dict[int, tuple[int, int, int]], ...] = ({source: (-1, -1, 0)}, {target: (-1, -1, 0)})
+        frontiers = [[source], [target]]
+        while frontiers[0] and frontiers[1]:
+            side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+            mine, other = seen[side], seen[1 - side]
+            meeting: Optional[tuple[int, int]] = None  # (total moves, node)
+            widened = []
+            for node in frontiers[side]:
+                moves = mine[node][2] + 1
+                for neighbor, code in adjacencies[side].neighbors(node, allowed, removed):
+                    if neighbor in mine:
+                        continue
+                    mine[neighbor] = (node, code, moves)
+                    widened.append(neighbor)
+                    if neighbor in other and (meeting is None or moves + other[neighbor][2] < meeting[0]):
+                        meeting = (moves + other[neighbor][2], neighbor)
+            # The whole level is widened first, as a later meeting in it can be shorter
+            if meeting is not None:
+                return self._chain(meeting[1], seen[0], seen[1])
+            frontiers[side] = widened
+        return None
+
+    def _chain(
+        self, meeting: int, forward: dict[int, tuple[int, int, int]], backward: dict[int, tuple[int, int, int]]
+    ) -> list[tuple[int, Optional[str]]]:
+        ids, types = self._technique_ids, self._types
+        steps: list[tuple[int, Optional[str]]] = []
+        node = meeting
+        while node != -1:
+            parent, code, _ = forward[node]
+            steps.append((ids[node], types[code] if code >= 0 else None))
+            node = parent
+        steps.reverse()
+        node, (following, code, _) = meeting, backward[meeting]
+        while following != -1:
+            steps.append((ids[following], types[code]))
+            node = following
+            following, code, _ = backward[node]
+        return steps
+
+    def reachable(
+        self, from_id: int, depth: int, relationship_types: Optional[Iterable[str]] = None, limit: Optional[int] = None
+    ) -> list[tuple[int, int]]:
+        """(technique id, moves) for every technique 1 to `depth` moves from `from_id`, closest first."""
+        source = self._nodes.get(from_id)
+        if source is None:
+            return []
+        allowed = self._allowed(relationship_types)
+        forward, _, removed = self._state
+        ids = self._technique_ids
+        distances = {source: 0}
+        found: list[tuple[int, int]] = []
+        frontier = [source]
+        for moves in range(1, depth + 1):
+            widened = []
+            for node in frontier:
+                for neighbor, _ in forward.neighbors(node, allowed, removed):
+                    if neighbor in distances:
+                        continue
+                    distances[neighbor] = moves
+                    widened.append(neighbor)
+                    found.append((ids[neighbor], moves))
+                    if len(found) == limit:
+                        return found
+            if not widened:
+                break
+            frontier = widened
+        return found
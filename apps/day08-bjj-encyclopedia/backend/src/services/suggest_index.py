@@ -0,0 +1,98 @@
+"""Precomputed prefix index over technique names for autocomplete.
+
+Every name is normalized like the fuzzy index does (lowercase, accents and punctuation
+dropped) and stored under a key per word it contains, from that word to the end: "Armbar
+from Guard" under "armbar from guard", "from guard" and "guard", so "gua" suggests it as
+well as "arm". Keys are kept in one sorted list next to an array of the names' ranks
+(most connected technique first), and a prefix's matches are the range bisect finds.
+
+Prefixes matching more than SCAN_LIMIT keys, the short ones a user types first, have their
+top MAX_SUGGESTIONS worked out when the index is built; any other prefix scans at most
+SCAN_LIMIT ranks. Either way a request allocates only the list it returns.
+"""
+
+import heapq
+from array import array
+from bisect import bisect_left, insort
+
+from src.services.fuzzy_index import normalize
+
+MAX_SUGGESTIONS = 25
+SCAN_LIMIT = 256
+# Sorts after every character a normalized key can hold
+PAST_KEY = "\x7f"
+
+
+def _keys(name: str) -> set[str]:
+    words = normalize(name).split()
+    return {" ".join(words[i:]) for i in range(len(words))}
+
+
+class SuggestIndex:
+    """Prefix lookups over (id, name) pairs ranked by degree, rebuilt as a whole."""
+
+    def __init__(self) -> None:
+        # One tuple, swapped in at once by rebuild, so a request never sees half of two builds:
+        # (sorted keys, rank of each key's technique, (id, name) by rank, heavy prefix -> top)
+        self._data: tuple[list[str], array, list[tuple[int, str]], dict[str, list[tuple[int, str]]]] = ([], array("I"), [], {})
+        # Set by the owner when the rows it was built from change
+        self.stale = True
+
+    def __len__(self) -> int:
+        return len(self._data[2])
+
+    def rebuild(self, rows: list[tuple[int, str, int]]) -> None:
+        """Replace the contents with (id, name, degree) rows; higher degrees rank first."""
+        ranked = sorted(rows, key=lambda row: (-row[2], len(row[1]), row[1], row[0]))
+        results = [(technique_id, name) for technique_id, name, _ in ranked]
+        entries = sorted((key, rank) for rank, (_, name) in enumerate(results) for key in _keys(name))
+        keys = [key for key, _ in entries]
+        ranks = array("I", (rank for _, rank in entries))
+
+        top: dict[str, list[tuple[int, str]]] = {}
+        groups = [(0, len(keys))]
+        depth = 0
+        # Split the ranges of heavy prefixes one character deeper until none is heavy
+        while groups:
+            depth += 1
+            heavy = []
+            for lo, hi in groups:
+                i = lo
+                while i < hi:
+                    if len(keys[i]) < depth:
+                        i += 1
+                        continue
+                    prefix = keys[i][:depth]
+                    end = bisect_left(keys, prefix + PAST_KEY, i, hi)
+                    if end - i > SCAN_LIMIT:
+                        best = heapq.nsmallest(MAX_SUGGESTIONS, set(ranks[i:end]))
+                        top[prefix] = [results[rank] for rank in best]
+                        heavy.append((i, end))
+                    i = end
+            groups = heavy
+
+        self._data = (keys, ranks, results, top)
+
+    def suggest(self, prefix: str, limit: int = 10) -> list[tuple[int, str]]:
+        """Up to `limit` (id, name) pairs whose names have a word starting with `prefix`."""
+        key = normalize(prefix)
+        if not key:
+            return []
+        keys, ranks, results, top = self._data
+        precomputed = top.get(key)
+        if precomputed is not None:
+            return precomputed[:limit]
+        lo = bisect_left(keys, key)
+        hi = bisect_left(keys, key + PAST_KEY, lo)
+        # Collect the best ranks in the list that is returned, then swap in their names
+        best: list = []
+        for i in range(lo, hi):
+            rank = ranks[i]
+            if len(best) == limit and rank >= best[-1] or rank in best:
+                continue
+            insort(best, rank)
+            if len(best) > limit:
+                best.pop()
+        for i, rank in enumerate(best):
+            best[i] = results[rank]
+        return best
@@ -1,62 +1,314 @@
-from typing import Optional
+import re
+import threading
+from collections import Counter
+from collections.abc import Callable, Iterable, Iterator
+from functools import partial
+from typing import Any, Optional, TypeVar
 
-from sqlmodel import Session, select
+from sqlalchemy import Connection, Row, event, func, inspect, literal_column, null, text
+from sqlalchemy.orm import Mapper, SessionTransaction, object_session
+from sqlmodel import Session, col, select
+from sqlmodel.sql.expression import Select, SelectOfScalar
 
-from src.models.technique import Technique, TechniqueRelationship
+from src.models.technique import Technique, TechniqueRelationship, technique_fts
+from src.services.fuzzy_index import TrigramIndex
+from src.services.relationship_graph import RelationshipGraph
+from src.services.suggest_index import SuggestIndex
 
+StatementT = TypeVar("StatementT", Select, SelectOfScalar)
 
-def get_all(
-    session: Session,
-    position: Optional[str] = None,
-    type: Optional[str] = None,
-    difficulty: Optional[str] = None,
-    q: Optional[str] = None,
-) -> list[Technique]:
-    statement = select(Technique)
+MAX_DEPTH = 5
+# Ids per IN (...) list, well below SQLite's limit on bound parameters
+IN_BATCH_SIZE = 500
+# Default and largest number of techniques a reachability query returns
+REACHABLE_LIMIT = 1000
+MAX_REACHABLE_LIMIT = 10_000
+# Column weights for BM25 (name, description, steps, common_mistakes, counters); a hit in
+# the name counts most. bm25() is lower for better matches.
+BM25_RANK = literal_column("bm25(technique_fts, 10.0, 4.0, 1.0, 1.0, 1.0)")
+SNIPPET = literal_column("snippet(technique_fts, -1, '<mark>', '</mark>', '…', 12)")
+SEARCH_WORD = re.compile(r"\w+")
+# With filters, fuzzy search ranks this many times `limit` names before filtering them
+FUZZY_FILTER_HEADROOM = 10
+# session.info key of the in-memory index changes waiting for their transaction to commit
+STAGED_CHANGES = "technique_service.staged"
+# What a TechniqueCard needs; neighbors are loaded without their text lists
+CARD_COLUMNS = (Technique.id, Technique.name, Technique.position, Technique.type, Technique.difficulty, Technique.description)
 
+
+def _filtered(statement: StatementT, position: Optional[str], type: Optional[str], difficulty: Optional[str]) -> StatementT:
     if position:
         statement = statement.where(Technique.position == position)
     if type:
         statement = statement.where(Technique.type == type)
     if difficulty:
         statement = statement.where(Technique.difficulty == difficulty)
+    return statement
+
+
+def get_all(
+    session: Session,
+    position: Optional[str] = None,
+    type: Optional[str] = None,
+    difficulty: Optional[str] = None,
+    q: Optional[str] = None,
+) -> list[Technique]:
     if q:
-        search = f"%{q}%"
-        statement = statement.where(
-            Technique.name.ilike(search) | Technique.description.ilike(search)
-        )
+        return [technique for technique, _ in search(session, q, position=position, type=type, difficulty=difficulty)]
+    statement = _filtered(select(Technique), position, type, difficulty)
+    return list(session.exec(statement).all())
+
 
+def substring_search(
+    session: Session,
+    q: str,
+    position: Optional[str] = None,
+    type: Optional[str] = None,
+    difficulty: Optional[str] = None,
+) -> list[Technique]:
+    """Unranked ILIKE match on name and description; what `search` falls back to off SQLite."""
+    pattern = f"%{q}%"
+    statement = _filtered(select(Technique), position, type, difficulty)
+    statement = statement.where(col(Technique.name).ilike(pattern) | col(Technique.description).ilike(pattern))
     return list(session.exec(statement).all())
 
 
-def get_by_id(session: Session, technique_id: int) -> Optional[dict]:
-    technique = session.get(Technique, technique_id)
-    if technique is None:
+def match_expression(q: str) -> Optional[str]:
+    """FTS5 query for user input: every word must match, the last one as a prefix.
+
+    Words are quoted, so FTS5 operators and punctuation in the input are taken literally.
+    """
+    words = SEARCH_WORD.findall(q)
+    if not words:
         return None
+    return " ".join(f'"{word}"' for word in words) + "*"
 
-    outgoing_rels = session.exec(
-        select(TechniqueRelationship).where(
-            TechniqueRelationship.from_technique_id == technique_id
-        )
-    ).all()
 
-    incoming_rels = session.exec(
-        select(TechniqueRelationship).where(
-            TechniqueRelationship.to_technique_id == technique_id
+def search(
+    session: Session,
+    q: str,
+    position: Optional[str] = None,
+    type: Optional[str] = None,
+    difficulty: Optional[str] = None,
+    highlight: bool = False,
+    limit: Optional[int] = None,
+) -> list[tuple[Technique, Optional[str]]]:
+    """Techniques matching `q` in any text field, best BM25 match first.
+
+    With `highlight`, each comes with a snippet of its best matching field, matches
+    wrapped in ``<mark>``.
+    """
+    if session.get_bind().dialect.name != "sqlite":
+        matches = substring_search(session, q, position, type, difficulty)
+        return [(technique, None) for technique in matches[:limit]]
+    match = match_expression(q)
+    if match is None:
+        return []
+    snippet = SNIPPET if highlight else null()
+    statement = (
+        select(Technique, snippet)
+        .join(technique_fts, technique_fts.c.rowid == Technique.id)
+        .where(text("technique_fts MATCH :match").bindparams(match=match))
+        .order_by(BM25_RANK)
+    )
+    statement = _filtered(statement, position, type, difficulty).limit(limit)
+    return [(technique, snippet) for technique, snippet in session.exec(statement)]
+
+
+def _stage(target: Any, change: Callable[[], None]) -> None:
+    """Run `change` once the transaction flushing `target` commits; a rollback drops it."""
+    session = object_session(target)
+    transaction = session.get_nested_transaction() or session.get_transaction()
+    session.info.setdefault(STAGED_CHANGES, []).append((transaction, change))
+
+
+def _within(transaction: Optional[SessionTransaction], outer: SessionTransaction) -> bool:
+    while transaction is not None and transaction is not outer:
+        transaction = transaction.parent
+    return transaction is outer
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_staged(session: Session) -> None:
+    # Releasing a savepoint fires this too; its changes wait for the outer commit
+    if session.in_nested_transaction():
+        return
+    for _, change in session.info.pop(STAGED_CHANGES, ()):
+        change()
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_staged(session: Session, previous_transaction: SessionTransaction) -> None:
+    # Only what the rolled back transaction (maybe just a savepoint) and those inside it staged
+    staged = session.info.get(STAGED_CHANGES)
+    if staged:
+        staged[:] = [(transaction, change) for transaction, change in staged if not _within(transaction, previous_transaction)]
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _drop_staged(session: Session, transaction: SessionTransaction) -> None:
+    # A session closed without committing or rolling back ends its transaction here
+    if transaction.parent is None:
+        session.info.pop(STAGED_CHANGES, None)
+
+
+# Trigram index over technique names for fuzzy search; filled at startup by
+# build_name_index and kept current by the mapper hooks below, as their transactions commit
+name_index = TrigramIndex()
+
+
+def build_name_index(session: Session) -> None:
+    name_index.rebuild([(row.id, row.name) for row in session.exec(select(Technique.id, Technique.name))])
+
+
+@event.listens_for(Technique, "after_insert")
+@event.listens_for(Technique, "after_update")
+def _index_name(mapper: Mapper, connection: Connection, technique: Technique) -> None:
+    _stage(technique, partial(name_index.add, technique.id, technique.name))
+
+
+@event.listens_for(Technique, "after_delete")
+def _unindex_name(mapper: Mapper, connection: Connection, technique: Technique) -> None:
+    _stage(technique, partial(name_index.remove, technique.id))
+
+
+def fuzzy_search(
+    session: Session,
+    q: str,
+    position: Optional[str] = None,
+    type: Optional[str] = None,
+    difficulty: Optional[str] = None,
+    limit: int = 20,
+) -> list[Technique]:
+    """Techniques whose names are most similar to `q`, typos and spacing included."""
+    filtered = bool(position or type or difficulty)
+    matches = name_index.search(q, limit=limit * FUZZY_FILTER_HEADROOM if filtered else limit)
+    if not matches:
+        return []
+    rank = {technique_id: i for i, (technique_id, _) in enumerate(matches)}
+    statement = _filtered(select(Technique).where(col(Technique.id).in_(list(rank))), position, type, difficulty)
+    techniques = sorted(session.exec(statement), key=lambda technique: rank[technique.id])
+    return techniques[:limit]
+
+
+# Prefix index for autocomplete, ranked by how many relationships a technique has. Any
+# committed change to names or relationships marks it stale and the next suggest call
+# rebuilds it
+suggest_index = SuggestIndex()
+# Held while rebuilding, so requests arriving meanwhile wait for that build instead of each
+# starting their own
+_suggest_rebuild = threading.Lock()
+
+
+def build_suggest_index(session: Session) -> None:
+    # Cleared before reading, so a change committed meanwhile leaves it stale again
+    suggest_index.stale = False
+    degree: Counter[int] = Counter()
+    for column in (TechniqueRelationship.from_technique_id, TechniqueRelationship.to_technique_id):
+        for technique_id, count in session.exec(select(column, func.count()).group_by(column)):
+            degree[technique_id] += count
+    suggest_index.rebuild([(row.id, row.name, degree[row.id]) for row in session.exec(select(Technique.id, Technique.name))])
+
+
+def _mark_suggestions_stale() -> None:
+    suggest_index.stale = True
+
+
+@event.listens_for(Technique, "after_insert")
+@event.listens_for(Technique, "after_delete")
+@event.listens_for(TechniqueRelationship, "after_insert")
+@event.listens_for(TechniqueRelationship, "after_update")
+@event.listens_for(TechniqueRelationship, "after_delete")
+def _suggestions_changed(mapper: Mapper, connection: Connection, target: Any) -> None:
+    _stage(target, _mark_suggestions_stale)
+
+
+@event.listens_for(Technique, "after_update")
+def _suggestion_renamed(mapper: Mapper, connection: Connection, technique: Technique) -> None:
+    if inspect(technique).attrs.name.history.has_changes():
+        _stage(technique, _mark_suggestions_stale)
+
+
+def suggest(session: Session, prefix: str, limit: int = 10) -> list[tuple[int, str]]:
+    """(id, name) of the best connected techniques with a word in the name starting with `prefix`."""
+    if suggest_index.stale:
+        with _suggest_rebuild:
+            if suggest_index.stale:
+                build_suggest_index(session)
+    return suggest_index.suggest(prefix, limit)
+
+
+def _batches(ids: Iterable[int]) -> Iterator[list[int]]:
+    ordered = sorted(ids)
+    for start in range(0, len(ordered), IN_BATCH_SIZE):
+        yield ordered[start : start + IN_BATCH_SIZE]
+
+
+def _edges_touching(session: Session, ids: set[int]) -> list[TechniqueRelationship]:
+    edges: dict[int, TechniqueRelationship] = {}
+    for batch in _batches(ids):
+        statement = select(TechniqueRelationship).where(
+            col(TechniqueRelationship.from_technique_id).in_(batch) | col(TechniqueRelationship.to_technique_id).in_(batch)
         )
-    ).all()
+        for edge in session.exec(statement):
+            edges[edge.id] = edge
+    return list(edges.values())
+
 
-    outgoing = []
-    for rel in outgoing_rels:
-        neighbor = session.get(Technique, rel.to_technique_id)
-        if neighbor:
-            outgoing.append({"relationship_type": rel.relationship_type, "technique": neighbor})
+def _cards(session: Session, ids: set[int]) -> dict[int, Row]:
+    cards = {}
+    for batch in _batches(ids):
+        for row in session.exec(select(*CARD_COLUMNS).where(col(Technique.id).in_(batch))):
+            cards[row.id] = row
+    return cards
 
-    incoming = []
-    for rel in incoming_rels:
-        neighbor = session.get(Technique, rel.from_technique_id)
-        if neighbor:
-            incoming.append({"relationship_type": rel.relationship_type, "technique": neighbor})
+
+def get_by_id(session: Session, technique_id: int, depth: int = 1) -> Optional[dict]:
+    """Technique detail plus everything within `depth` hops of it, in either direction.
+
+    Takes one query for the technique and two per hop (the edges touching the frontier,
+    then the cards of the techniques they reach), however many neighbors there are.
+    """
+    technique = session.exec(select(Technique).where(Technique.id == technique_id)).first()
+    if technique is None:
+        return None
+
+    distances = {technique_id: 0}
+    cards: dict[int, Any] = {technique_id: technique}
+    edges: list[TechniqueRelationship] = []
+    seen_edges: set[int] = set()
+    frontier = {technique_id}
+    for hop in range(1, depth + 1):
+        discovered = set()
+        for edge in _edges_touching(session, frontier):
+            if edge.id in seen_edges:
+                continue
+            seen_edges.add(edge.id)
+            edges.append(edge)
+            for neighbor_id in (edge.from_technique_id, edge.to_technique_id):
+                if neighbor_id not in distances:
+                    distances[neighbor_id] = hop
+                    discovered.add(neighbor_id)
+        if not discovered:
+            break
+        cards.update(_cards(session, discovered))
+        frontier = discovered
+
+    outgoing = [
+        {"relationship_type": edge.relationship_type, "technique": cards[edge.to_technique_id]}
+        for edge in edges
+        if edge.from_technique_id == technique_id and edge.to_technique_id in cards
+    ]
+    incoming = [
+        {"relationship_type": edge.relationship_type, "technique": cards[edge.from_technique_id]}
+        for edge in edges
+        if edge.to_technique_id == technique_id and edge.from_technique_id in cards
+    ]
+    neighborhood = [
+        {"distance": distance, "technique": cards[neighbor_id]}
+        for neighbor_id, distance in distances.items()
+        if distance and neighbor_id in cards
+    ]
 
     return {
         "id": technique.id,
@@ -70,4 +322,89 @@ def get_by_id(session: Session, technique_id: int) -> Optional[dict]:
         "counters": technique.counters,
         "outgoing": outgoing,
         "incoming": incoming,
+        "neighborhood": neighborhood,
+        "edges": [
+            {
+                "from_technique_id": edge.from_technique_id,
+                "to_technique_id": edge.to_technique_id,
+                "relationship_type": edge.relationship_type,
+            }
+            for edge in edges
+        ],
     }
+
+
+# All relationships as one directed graph; loaded at startup by build_graph and kept
+# current by the mapper hooks below, as their transactions commit
+graph = RelationshipGraph()
+
+
+def build_graph(session: Session) -> None:
+    columns = (
+        TechniqueRelationship.id,
+        TechniqueRelationship.from_technique_id,
+        TechniqueRelationship.to_technique_id,
+        TechniqueRelationship.relationship_type,
+    )
+    graph.rebuild(session.exec(select(*columns).order_by(TechniqueRelationship.id)))
+
+
+@event.listens_for(TechniqueRelationship, "after_insert")
+def _add_edge(mapper: Mapper, connection: Connection, edge: TechniqueRelationship) -> None:
+    _stage(edge, partial(graph.add_edge, edge.id, edge.from_technique_id, edge.to_technique_id, edge.relationship_type))
+
+
+@event.listens_for(TechniqueRelationship, "after_update")
+def _replace_edge(mapper: Mapper, connection: Connection, edge: TechniqueRelationship) -> None:
+    _stage(edge, partial(graph.remove_edge, edge.id))
+    _stage(edge, partial(graph.add_edge, edge.id, edge.from_technique_id, edge.to_technique_id, edge.relationship_type))
+
+
+@event.listens_for(TechniqueRelationship, "after_delete")
+def _remove_edge(mapper: Mapper, connection: Connection, edge: TechniqueRelationship) -> None:
+    _stage(edge, partial(graph.remove_edge, edge.id))
+
+
+class StalePathError(LookupError):
+    """The graph's path runs through a technique that is no longer stored."""
+
+
+def _exists(session: Session, technique_id: int) -> bool:
+    return session.exec(select(Technique.id).where(Technique.id == technique_id)).first() is not None
+
+
+def shortest_path(
+    session: Session, from_id: int, to_id: int, relationship_types: Optional[list[str]] = None
+) -> Optional[list[dict]]:
+    """Fewest-moves chain of techniques from `from_id` to `to_id`, following relationships forward.
+
+    Returns None if either technique does not exist and an empty list if no chain joins them.
+    Raises StalePathError if a technique along the chain has since been deleted, rather
+    than returning a chain with a hop missing.
+    """
+    cards = _cards(session, {from_id, to_id})
+    if from_id not in cards or to_id not in cards:
+        return None
+    steps = graph.shortest_path(from_id, to_id, relationship_types)
+    if not steps:
+        return []
+    cards.update(_cards(session, {technique_id for technique_id, _ in steps} - cards.keys()))
+    missing = [step_id for step_id, _ in steps if step_id not in cards]
+    if missing:
+        raise StalePathError(missing)
+    return [{"relationship_type": edge_type, "technique": cards[step_id]} for step_id, edge_type in steps]
+
+
+def reachable(
+    session: Session,
+    technique_id: int,
+    depth: int,
+    relationship_types: Optional[list[str]] = None,
+    limit: int = REACHABLE_LIMIT,
+) -> Optional[list[dict]]:
+    """Techniques 1 to `depth` moves away following relationships forward, closest first."""
+    if not _exists(session, technique_id):
+        return None
+    found = graph.reachable(technique_id, depth, relationship_types, limit)
+    cards = _cards(session, {neighbor_id for neighbor_id, _ in found})
+    return [{"distance": moves, "technique": cards[neighbor_id]} for neighbor_id, moves in found if neighbor_id in cards]
@@ -1,13 +1,22 @@
 """Tests for the BJJ Technique Encyclopedia API."""
 
+import threading
+import time
+from contextlib import contextmanager
+
 import pytest
 from fastapi.testclient import TestClient
-from sqlmodel import Session, SQLModel, create_engine
+from sqlalchemy import event
+from sqlmodel import Session, SQLModel, create_engine, delete, select
 from sqlmodel.pool import StaticPool
 
 from src.database import get_session
 from src.main import app
 from src.models.technique import Technique, TechniqueRelationship
+from src.services import technique_service
+from src.services.fuzzy_index import TrigramIndex
+from src.services.relationship_graph import RelationshipGraph
+from src.services.suggest_index import SCAN_LIMIT, SuggestIndex
 
 
 @pytest.fixture(name="session")
@@ -83,6 +92,39 @@ def _seed_techniques(session: Session) -> list[Technique]:
     return [t1, t2, t3]
 
 
+def _seed_star(session: Session, spokes: int) -> Technique:
+    """A hub that leads to `spokes` techniques, each of which leads to one more."""
+    hub = Technique(name="Hub", position="Guard", type="Sweep", difficulty="Beginner", description="Hub.")
+    session.add(hub)
+    session.flush()
+    for i in range(spokes):
+        spoke = Technique(name=f"Spoke {i}", position="Mount", type="Submission", difficulty="Beginner", description="Spoke.")
+        rim = Technique(name=f"Rim {i}", position="Back", type="Submission", difficulty="Advanced", description="Rim.")
+        session.add(spoke)
+        session.add(rim)
+        session.flush()
+        session.add(TechniqueRelationship(from_technique_id=hub.id, to_technique_id=spoke.id, relationship_type="leads_to"))
+        session.add(TechniqueRelationship(from_technique_id=spoke.id, to_technique_id=rim.id, relationship_type="leads_to"))
+    session.commit()
+    session.refresh(hub)
+    return hub
+
+
+@contextmanager
+def _count_queries(session: Session):
+    statements: list[str] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = session.get_bind()
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
 class TestHealthEndpoint:
     def test_health_returns_ok(self, client: TestClient):
         response = client.get("/health")
@@ -233,3 +275,378 @@ class TestGetTechnique:
         response = client.get("/techniques/9999")
         assert response.status_code == 404
         assert response.json()["detail"] == "Technique not found"
+
+
+class TestTechniqueNeighborhood:
+    @pytest.mark.parametrize("spokes", [1, 50])
+    def test_detail_query_count_does_not_grow_with_degree(self, client: TestClient, session: Session, spokes: int):
+        hub = _seed_star(session, spokes)
+        with _count_queries(session) as statements:
+            response = client.get(f"/techniques/{hub.id}")
+        assert response.status_code == 200
+        assert len(response.json()["outgoing"]) == spokes
+        # The technique, the edges touching it and the neighbor cards
+        assert len(statements) == 3
+
+    def test_depth_expands_hops_with_two_queries_each(self, client: TestClient, session: Session):
+        hub = _seed_star(session, 20)
+        with _count_queries(session) as statements:
+            response = client.get(f"/techniques/{hub.id}?depth=2")
+        assert response.status_code == 200
+        data = response.json()
+        assert len(statements) == 5
+        distances = {n["technique"]["name"]: n["distance"] for n in data["neighborhood"]}
+        assert distances["Spoke 3"] == 1
+        assert distances["Rim 3"] == 2
+        assert len(distances) == 40
+        assert len(data["edges"]) == 40
+        assert len(data["outgoing"]) == 20
+
+    def test_depth_stops_early_when_nothing_new_is_reachable(self, client: TestClient, session: Session):
+        hub = _seed_star(session, 3)
+        with _count_queries(session) as statements:
+            response = client.get(f"/techniques/{hub.id}?depth=5")
+        assert response.status_code == 200
+        assert len(response.json()["neighborhood"]) == 6
+        assert len(statements) == 6  # two hops find techniques, the third finds none
+
+    def test_neighborhood_follows_incoming_edges(self, client: TestClient, session: Session):
+        techniques = _seed_techniques(session)
+        response = client.get(f"/techniques/{techniques[1].id}?depth=2")
+        assert response.status_code == 200
+        data = response.json()
+        assert [(n["technique"]["name"], n["distance"]) for n in data["neighborhood"]] == [("Armbar from Guard", 1)]
+        assert data["edges"] == [
+            {"from_technique_id": techniques[0].id, "to_technique_id": techniques[1].id, "relationship_type": "leads_to"}
+        ]
+
+    def test_rejects_depth_out_of_range(self, client: TestClient, session: Session):
+        techniques = _seed_techniques(session)
+        assert client.get(f"/techniques/{techniques[0].id}?depth=0").status_code == 422
+        assert client.get(f"/techniques/{techniques[0].id}?depth=6").status_code == 422
+
+
+class TestFullTextSearch:
+    def test_search_covers_steps_mistakes_and_counters(self, client: TestClient, session: Session):
+        techniques = _seed_techniques(session)
+        techniques[2].steps = ["Change levels and penetrate step deep"]
+        techniques[1].counters = ["Posture up and stack"]
+        session.add_all(techniques)
+        session.commit()
+        assert [t["name"] for t in client.get("/techniques?q=penetrate").json()] == ["Double Leg Takedown"]
+        assert [t["name"] for t in client.get("/techniques?q=stack").json()] == ["Triangle Choke"]
+
+    def test_search_ranks_name_matches_first(self, client: TestClient, session: Session):
+        _seed_techniques(session)
+        session.add(
+            Technique(
+                name="Kimura",
+                position="Guard",
+                type="Submission",
+                difficulty="Beginner",
+                description="Often chained with the triangle choke and the armbar.",
+            )
+        )
+        session.commit()
+        names = [t["name"] for t in client.get("/techniques?q=triangle").json()]
+        assert names == ["Triangle Choke", "Kimura"]
+
+    def test_search_matches_word_prefixes_and_stems(self, client: TestClient, session: Session):
+        _seed_techniques(session)
+        assert [t["name"] for t in client.get("/techniques?q=trian").json()] == ["Triangle Choke"]
+        assert [t["name"] for t in client.get("/techniques?q=chokes").json()] == ["Triangle Choke"]
+
+    def test_search_follows_updates_and_deletes(self, client: TestClient, session: Session):
+        techniques = _seed_techniques(session)
+        techniques[0].name = "Juji Gatame"
+        session.add(techniques[0])
+        session.commit()
+        assert [t["name"] for t in client.get("/techniques?q=juji").json()] == ["Juji Gatame"]
+        session.delete(techniques[0])
+        session.commit()
+        assert client.get("/techniques?q=juji").json() == []
+
+    def test_highlight_returns_snippets(self, client: TestClient, session: Session):
+        _seed_techniques(session)
+        data = client.get("/techniques?q=wrestling&highlight=true").json()
+        assert len(data) == 1
+        assert "<mark>wrestling</mark>" in data[0]["snippet"]
+        assert "snippet" not in client.get("/techniques?q=wrestling").json()[0]
+
+    def test_limit_keeps_the_best_matches(self, client: TestClient, session: Session):
+        _seed_techniques(session)
+        data = client.get("/techniques?q=guard&limit=1").json()
+        assert [t["name"] for t in data] == ["Armbar from Guard"]
+        assert len(client.get("/techniques?limit=2").json()) == 2
+
+    def test_search_treats_operators_as_text(self, client: TestClient, session: Session):
+        _seed_techniques(session)
+        for q in ['"', "AND", "armbar OR", "NEAR(", "*", "guard)"]:
+            assert client.get("/techniques", params={"q": q}).status_code == 200
+        assert client.get("/techniques", params={"q": "!!"}).json() == []
+
+
+class TestTrigramIndex:
+    def test_ranks_closest_names_first(self):
+        index = TrigramIndex()
+        index.rebuild([(1, "Kimura"), (2, "Kimura Trap"), (3, "Americana"), (4, "Triangle Choke")])
+        assert [i for i, _ in index.search("kimora")] == [1, 2]
+        assert [i for i, _ in index.search("trinagle")] == [4]
+        assert index.search("Kimura")[0] == (1, 1.0)
+        assert index.search("!!") == []
+
+    def test_add_and_remove(self):
+        index = TrigramIndex()
+        index.add(1, "Armbar")
+        index.add(1, "Omoplata")
+        assert index.search("armbar") == []
+        assert [i for i, _ in index.search("omoplatta")] == [1]
+        index.remove(1)
+        assert index.search("omoplata") == []
+        assert len(index) == 0
+
+    def test_limit_keeps_the_most_similar(self):
+        index = TrigramIndex()
+        index.rebuild([(i, f"Guard pass {i}") for i in range(100)] + [(100, "Guard")])
+        results = index.search("guard", limit=5)
+        assert len(results) == 5
+        assert all(similarity == 1.0 for _, similarity in results)
+
+
+class TestFuzzySearch:
+    @pytest.fixture(autouse=True)
+    def seeded(self, session: Session):
+        _seed_techniques(session)
+        technique_service.build_name_index(session)
+
+    @pytest.mark.parametrize(
+        "q, name",
+        [("trinagle", "Triangle Choke"), ("arm bar", "Armbar from Guard"), ("dubble leg", "Double Leg Takedown")],
+    )
+    def test_tolerates_typos_and_spacing(self, client: TestClient, q: str, name: str):
+        assert client.get("/techniques", params={"q": q}).json() == []
+        data = client.get("/techniques", params={"q": q, "fuzzy": "true"}).json()
+        assert data[0]["name"] == name
+
+    def test_follows_inserts_and_deletes(self, client: TestClient, session: Session):
+        kimura = Technique(
+            name="Kimura", position="Guard", type="Submission", difficulty="Beginner", description="Shoulder lock."
+        )
+        session.add(kimura)
+        session.commit()
+        assert [t["name"] for t in client.get("/techniques?q=kimora&fuzzy=true").json()] == ["Kimura"]
+        session.delete(kimura)
+        session.commit()
+        assert client.get("/techniques?q=kimora&fuzzy=true").json() == []
+
+    def test_waits_for_commit_and_skips_rollbacks(self, client: TestClient, session: Session):
+        def technique(name: str) -> Technique:
+            return Technique(name=name, position="Guard", type="Submission", difficulty="Beginner", description="Lock.")
+
+        session.add(technique("Kimura"))
+        session.flush()
+        assert client.get("/techniques?q=kimora&fuzzy=true").json() == []
+        session.rollback()
+        assert client.get("/techniques?q=kimora&fuzzy=true").json() == []
+
+        session.add(technique("Omoplata"))
+        savepoint = session.begin_nested()
+        session.add(technique("Gogoplata"))
+        session.flush()
+        savepoint.rollback()
+        session.commit()
+        assert [t["name"] for t in client.get("/techniques?q=omoplata&fuzzy=true").json()] == ["Omoplata"]
+
+    def test_applies_filters(self, client: TestClient):
+        data = client.get("/techniques?q=gard&fuzzy=true&position=Guard&type=Submission").json()
+        assert [t["name"] for t in data] == ["Armbar from Guard"]
+        assert client.get("/techniques?q=gard&fuzzy=true&position=Standing").json() == []
+
+
+class TestSuggestIndex:
+    def test_matches_any_word_and_ranks_by_degree(self):
+        index = SuggestIndex()
+        index.rebuild([(1, "Armbar from Guard", 1), (2, "Guard Pass", 5), (3, "Triangle Choke", 2), (4, "Ármbar", 0)])
+        assert index.suggest("gua") == [(2, "Guard Pass"), (1, "Armbar from Guard")]
+        assert index.suggest("ARM") == [(1, "Armbar from Guard"), (4, "Ármbar")]
+        assert index.suggest("from g") == [(1, "Armbar from Guard")]
+        assert index.suggest("choke", limit=1) == [(3, "Triangle Choke")]
+        assert index.suggest("zz") == []
+        assert index.suggest("  ") == []
+
+    def test_heavy_prefixes_match_a_scan(self):
+        rows = [(i, f"Guard {i}", i % 7) for i in range(SCAN_LIMIT * 3)]
+        index = SuggestIndex()
+        index.rebuild(rows)
+        expected = sorted(rows, key=lambda row: (-row[2], len(row[1]), row[1]))[:10]
+        assert index.suggest("g") == index.suggest("guard") == [(i, name) for i, name, _ in expected]
+        expected = [
+            (i, name) for i, name, _ in sorted(rows, key=lambda row: (-row[2], len(row[1]), row[1])) if name.startswith("Guard 1")
+        ]
+        assert index.suggest("guard 1", limit=3) == expected[:3]
+
+
+class TestSuggestEndpoint:
+    @pytest.fixture(autouse=True)
+    def fresh_index(self):
+        technique_service.suggest_index.stale = True
+
+    def test_empty(self, client: TestClient):
+        assert client.get("/techniques/suggest?prefix=arm").json() == []
+
+    def test_returns_ids_and_names(self, client: TestClient, session: Session):
+        t1, t2, t3 = _seed_techniques(session)
+        response = client.get("/techniques/suggest", params={"prefix": "t"})
+        assert response.status_code == 200
+        assert response.json() == [{"id": t2.id, "name": "Triangle Choke"}, {"id": t3.id, "name": "Double Leg Takedown"}]
+
+    def test_follows_changes(self, client: TestClient, session: Session):
+        t1, t2, t3 = _seed_techniques(session)
+        assert [s["name"] for s in client.get("/techniques/suggest?prefix=d").json()] == ["Double Leg Takedown"]
+        session.add(TechniqueRelationship(from_technique_id=t3.id, to_technique_id=t1.id, relationship_type="leads_to"))
+        session.add(TechniqueRelationship(from_technique_id=t3.id, to_technique_id=t2.id, relationship_type="leads_to"))
+        session.add(TechniqueRelationship(from_technique_id=t2.id, to_technique_id=t3.id, relationship_type="counters"))
+        t1.name = "Double Armbar"
+        session.add(t1)
+        session.commit()
+        data = client.get("/techniques/suggest?prefix=d").json()
+        assert [s["name"] for s in data] == ["Double Leg Takedown", "Double Armbar"]
+
+    def test_concurrent_requests_share_one_rebuild(self, session: Session, monkeypatch: pytest.MonkeyPatch):
+        _seed_techniques(session)
+        builds = []
+        rebuild = technique_service.build_suggest_index
+
+        def slow_build(session: Session) -> None:
+            builds.append(threading.get_ident())
+            time.sleep(0.05)
+            rebuild(session)
+
+        monkeypatch.setattr(technique_service, "build_suggest_index", slow_build)
+        threads = [threading.Thread(target=technique_service.suggest, args=(session, "t")) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(builds) == 1
+
+    def test_ignores_rolled_back_changes(self, client: TestClient, session: Session):
+        t1, t2, t3 = _seed_techniques(session)
+        assert [s["name"] for s in client.get("/techniques/suggest?prefix=d").json()] == ["Double Leg Takedown"]
+        t1.name = "Double Armbar"
+        session.add(t1)
+        session.flush()
+        session.rollback()
+        assert not technique_service.suggest_index.stale
+
+    def test_validates_params(self, client: TestClient):
+        assert client.get("/techniques/suggest").status_code == 422
+        assert client.get("/techniques/suggest?prefix=a&limit=0").status_code == 422
+        assert client.get("/techniques/suggest?prefix=a&limit=26").status_code == 422
+
+
+class TestRelationshipGraph:
+    def test_shortest_path_follows_edges_forward(self):
+        graph = RelationshipGraph()
+        graph.rebuild([(1, 10, 20, "leads_to"), (2, 20, 30, "leads_to"), (3, 10, 30, "counters"), (4, 30, 40, "leads_to")])
+        assert graph.shortest_path(10, 40) == [(10, None), (30, "counters"), (40, "leads_to")]
+        assert graph.shortest_path(10, 40, ["leads_to"]) == [(10, None), (20, "leads_to"), (30, "leads_to"), (40, "leads_to")]
+        assert graph.shortest_path(40, 10) is None
+        assert graph.shortest_path(10, 99) is None
+        assert graph.shortest_path(10, 10) == [(10, None)]
+
+    def test_reachable_within_depth(self):
+        graph = RelationshipGraph()
+        graph.rebuild([(1, 1, 2, "leads_to"), (2, 2, 3, "leads_to"), (3, 3, 4, "leads_to"), (4, 1, 5, "counters")])
+        assert graph.reachable(1, 2) == [(2, 1), (5, 1), (3, 2)]
+        assert graph.reachable(1, 5, ["leads_to"]) == [(2, 1), (3, 2), (4, 3)]
+        assert graph.reachable(1, 5, limit=2) == [(2, 1), (5, 1)]
+        assert graph.reachable(4, 3) == []
+
+    @pytest.mark.parametrize("compact_min", [1, 1024])
+    def test_changes_apply_with_and_without_compaction(self, monkeypatch: pytest.MonkeyPatch, compact_min: int):
+        monkeypatch.setattr("src.services.relationship_graph.COMPACT_MIN", compact_min)
+        graph = RelationshipGraph()
+        graph.rebuild([(1, 1, 2, "leads_to"), (2, 2, 3, "leads_to")])
+        graph.add_edge(3, 3, 4, "leads_to")
+        graph.add_edge(4, 1, 3, "counters")
+        assert graph.shortest_path(1, 4) == [(1, None), (3, "counters"), (4, "leads_to")]
+        graph.remove_edge(4)
+        graph.remove_edge(1)
+        assert graph.shortest_path(1, 4) is None
+        assert graph.shortest_path(4, 2, []) is None
+        assert graph.reachable(2, 5) == [(3, 1), (4, 2)]
+        assert len(graph) == 2
+
+
+class TestGraphEndpoints:
+    @pytest.fixture(autouse=True)
+    def empty_graph(self):
+        # The seeding below reaches the graph through the mapper hooks
+        technique_service.graph.rebuild([])
+
+    def test_path_follows_relationships(self, client: TestClient, session: Session):
+        t1, t2, t3 = _seed_techniques(session)
+        session.add(TechniqueRelationship(from_technique_id=t3.id, to_technique_id=t1.id, relationship_type="leads_to"))
+        session.commit()
+        response = client.get(f"/techniques/{t3.id}/path/{t2.id}")
+        assert response.status_code == 200
+        assert [(s["relationship_type"], s["technique"]["name"]) for s in response.json()] == [
+            (None, "Double Leg Takedown"),
+            ("leads_to", "Armbar from Guard"),
+            ("leads_to", "Triangle Choke"),
+        ]
+
+    def test_path_filters_and_misses(self, client: TestClient, session: Session):
+        t1, t2, t3 = _seed_techniques(session)
+        assert client.get(f"/techniques/{t1.id}/path/{t2.id}?relationship_type=counters").status_code == 404
+        response = client.get(f"/techniques/{t2.id}/path/{t1.id}")
+        assert response.status_code == 404
+        assert response.json()["detail"] == "No path between these techniques"
+        assert client.get(f"/techniques/{t1.id}/path/999").json()["detail"] == "Technique not found"
+
+    def test_reachable(self, client: TestClient, session: Session):
+        hub = _seed_star(session, spokes=3)
+        data = client.get(f"/techniques/{hub.id}/reachable", params={"depth": 2}).json()
+        assert sorted((n["distance"], n["technique"]["name"]) for n in data) == [
+            (1, "Spoke 0"),
+            (1, "Spoke 1"),
+            (1, "Spoke 2"),
+            (2, "Rim 0"),
+            (2, "Rim 1"),
+            (2, "Rim 2"),
+        ]
+        assert len(client.get(f"/techniques/{hub.id}/reachable?depth=2&limit=4").json()) == 4
+        assert client.get(f"/techniques/{hub.id}/reachable?relationship_type=counters").json() == []
+
+    def test_follows_deletes(self, client: TestClient, session: Session):
+        t1, t2, t3 = _seed_techniques(session)
+        assert client.get(f"/techniques/{t1.id}/path/{t2.id}").status_code == 200
+        for edge in session.exec(select(TechniqueRelationship)):
+            session.delete(edge)
+        session.commit()
+        assert client.get(f"/techniques/{t1.id}/path/{t2.id}").status_code == 404
+
+    def test_path_through_a_deleted_technique_conflicts(self, client: TestClient, session: Session):
+        t1, t2, t3 = _seed_techniques(session)
+        session.add(TechniqueRelationship(from_technique_id=t3.id, to_technique_id=t1.id, relationship_type="leads_to"))
+        session.commit()
+        # Deleted without its relationships, so the graph still routes through it
+        session.exec(delete(Technique).where(Technique.id == t1.id))
+        session.commit()
+        response = client.get(f"/techniques/{t3.id}/path/{t2.id}")
+        assert response.status_code == 409
+        assert response.json()["detail"] == "The path runs through a technique that no longer exists"
+
+    def test_ignores_rolled_back_edges(self, client: TestClient, session: Session):
+        t1, t2, t3 = _seed_techniques(session)
+        session.add(TechniqueRelationship(from_technique_id=t3.id, to_technique_id=t1.id, relationship_type="leads_to"))
+        session.flush()
+        session.rollback()
+        assert client.get(f"/techniques/{t3.id}/path/{t1.id}").status_code == 404
+
+    def test_validates_params(self, client: TestClient, session: Session):
+        t1, _, _ = _seed_techniques(session)
+        assert client.get(f"/techniques/{t1.id}/reachable?depth=0").status_code == 422
+        assert client.get(f"/techniques/{t1.id}/reachable?depth=6").status_code == 422
+        assert client.get("/techniques/999/reachable").status_code == 404